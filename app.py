@@ -1,5 +1,6 @@
 """
 BankVista AI - ULTIMATE COMPLETE VERSION
+Streamlit UI over the headless `bankvista` package.
 ✅ Chat scrolls properly in white space
 ✅ ALL features included (nothing removed)
 ✅ Hero section + Status bar + KPI cards
@@ -13,18 +14,37 @@ BankVista AI - ULTIMATE COMPLETE VERSION
 
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
-from datetime import date, datetime, timedelta
-import io
-import os
+from datetime import date
+import functools
 import warnings
 from dotenv import load_dotenv
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.worksheet.datavalidation import DataValidation
+
+from bankvista.analytics import PredictiveAnalytics, multivariate_anomalies
+from bankvista.charts import (
+    build_chat_chart,
+    chat_chart_kind,
+    create_performance_heatmap,
+    heatmap_groups,
+    create_prediction_chart,
+    create_top10_chart,
+    create_zone_comparison,
+    should_show_chart,
+)
+from bankvista import perf
+from bankvista.answercache import ANSWERS
+from bankvista.chat import call_ai
+from bankvista.data import dataset_key, generate_sample_data
+from bankvista.export import create_excel_dashboard, create_profiles_zip
+from bankvista.figcache import FIGURES, cached_figure, figure_json, load_figure
+from bankvista.gateway import GATEWAY
+from bankvista.ingest import load_files
+from bankvista.memory import ChatMemory
+from bankvista.narratives import narrate
+from bankvista.peers import KNN_MAX_ROWS, peer_benchmarks, peer_table
+from bankvista.profile import profile_frame
+from bankvista.rollup import rollup_cube
+from bankvista.scenario import scenario_model
+from bankvista.warehouse import DuckDBBackend, FrameBackend, available as duckdb_available
 
 warnings.filterwarnings('ignore')
 load_dotenv()
@@ -301,636 +321,551 @@ st.markdown("""
 
 
 # ═══════════════════════════════════════════════════════════════
-# AI BACKENDS - ALL INCLUDED
+# DATA BACKEND
 # ═══════════════════════════════════════════════════════════════
+# With a DuckDB warehouse connected, aggregates, top-N lists, anomaly stats
+# and structured chat questions are pushed down to SQL over the Parquet
+# files; st.session_state.df holds only the latest snapshot (sampled to
+# WAREHOUSE_MAX_ROWS) for the row-level views.
 
-@st.cache_resource(show_spinner=False)
-def init_ai_backends():
-    """Initialize all AI backends"""
-    backends = {}
-    
-    # OpenAI
-    try:
-        from openai import OpenAI
-        key = os.getenv('OPENAI_API_KEY')
-        if key and len(key.strip()) > 20:
-            client = OpenAI(api_key=key.strip())
-            try:
-                test = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[{"role": "user", "content": "test"}],
-                    max_tokens=5
-                )
-                backends['openai'] = client
-            except: pass
-    except: pass
-    
-    # Groq
-    try:
-        from groq import Groq
-        key = os.getenv('GROQ_API_KEY')
-        if key and len(key.strip()) > 20:
-            client = Groq(api_key=key.strip())
-            try:
-                test = client.chat.completions.create(
-                    model="llama-3.3-70b-versatile",
-                    messages=[{"role": "user", "content": "test"}],
-                    max_tokens=5
-                )
-                backends['groq'] = client
-            except: pass
-    except: pass
-    
-    # Gemini
-    try:
-        import google.genai as genai
-        key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
-        if key:
-            client = genai.Client(api_key=key)
-            backends['gemini'] = {'client': client, 'type': 'new'}
-    except:
-        try:
-            import google.generativeai as genai_old
-            key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
-            if key:
-                genai_old.configure(api_key=key)
-                model = genai_old.GenerativeModel('gemini-1.5-flash')
-                backends['gemini'] = {'client': model, 'type': 'old'}
-        except: pass
-    
-    # Ollama
-    try:
-        import requests
-        r = requests.get('http://localhost:11434/api/tags', timeout=2)
-        if r.status_code == 200:
-            backends['ollama'] = True
-    except: pass
-    
-    return backends
-
-
-def build_enhanced_context(query, df):
-    """Build comprehensive AI context"""
-    total_deposits = df['Total_Deposits'].sum()
-    total_advances = df['Advances'].sum()
-    avg_npa = df['NPA_Percent'].mean()
-    avg_casa = df['CASA_Percent'].mean()
-    high_npa = df.nlargest(3, 'NPA_Percent')[['Branch_Name', 'NPA_Percent']].to_dict('records')
-    low_casa = df.nsmallest(3, 'CASA_Percent')[['Branch_Name', 'CASA_Percent']].to_dict('records')
-    top_performers = df.nlargest(3, 'Total_Deposits')[['Branch_Name', 'Total_Deposits']].to_dict('records')
-    
-    context = f"""You are BankVista AI, an expert banking analyst. You are BankVista AI, a banking analytics assistant. Provide calm, data-backed insights.
-
-BANKING DATA OVERVIEW:
-- Total Branches: {len(df)}
-- Total Deposits: ₹{total_deposits:.2f} Crores
-- Total Advances: ₹{total_advances:.2f} Crores
-- Average NPA: {avg_npa:.2f}%
-- Average CASA: {avg_casa:.2f}%
-
-HIGH NPA BRANCHES (Needs Attention):
-{chr(10).join([f"• {b['Branch_Name']}: {b['NPA_Percent']:.2f}%" for b in high_npa])}
-
-LOW CASA BRANCHES (Growth Opportunity):
-{chr(10).join([f"• {b['Branch_Name']}: {b['CASA_Percent']:.2f}%" for b in low_casa])}
-
-TOP PERFORMERS (By Deposits):
-{chr(10).join([f"• {b['Branch_Name']}: ₹{b['Total_Deposits']:.2f}Cr" for b in top_performers])}
-
-USER QUERY: {query}
-
-RESPONSE GUIDELINES:
-- Max 6–8 short bullet points
-- Be concise and calm
-- Avoid commanding language
-- Use suggestive tone (e.g., "may consider", "could explore")
-- Do not create urgency or pressure
-- No long explanations
-- Focus on insights, not instructions
-- Avoid using words like "must", "urgent", "immediately"
-- Use balanced analytical language
-- Present observations before suggestions
-
-Respond now:"""
-    
-    return context
+WAREHOUSE_MAX_ROWS = 200_000
 
 
-def call_ai(query, df):
-    """Call AI with all backends"""
-    backends = init_ai_backends()
-    context = build_enhanced_context(query, df)
-    
-    # Try OpenAI
-    if 'openai' in backends:
-        try:
-            response = backends['openai'].chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": context}],
-                max_tokens=1000,
-                temperature=0.7
-            )
-            return response.choices[0].message.content
-        except: pass
-    
-    # Try Groq
-    if 'groq' in backends:
-        try:
-            response = backends['groq'].chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[{"role": "user", "content": context}],
-                max_tokens=1000,
-                temperature=0.7
-            )
-            return response.choices[0].message.content
-        except: pass
-    
-    # Try Gemini
-    if 'gemini' in backends:
-        try:
-            client_info = backends['gemini']
-            if client_info['type'] == 'new':
-                response = client_info['client'].models.generate_content(
-                    model='gemini-2.0-flash-exp',
-                    contents=context
-                )
-                return response.text
-            else:
-                response = client_info['client'].generate_content(context)
-                return response.text
-        except: pass
-    
-    # Try Ollama
-    if 'ollama' in backends:
-        try:
-            import requests
-            response = requests.post('http://localhost:11434/api/generate', json={
-                "model": "llama3.2",
-                "prompt": context,
-                "stream": False
-            }, timeout=30)
-            return response.json()['response']
-        except: pass
-    
-    # Local fallback
-    return get_enhanced_local_response(query, df)
+def data_backend(df):
+    return st.session_state.get('backend') or FrameBackend(df, st.session_state.df_key)
 
 
-def get_enhanced_local_response(query, df):
-    """Enhanced local responses"""
-    q = query.lower()
-    
-    # NPA Analysis
-# NPA Analysis
-    if any(word in q for word in ['npa', 'bad', 'loan', 'default']):
-
-        high_npa = df.nlargest(5, 'NPA_Percent')
+# ═══════════════════════════════════════════════════════════════
+# TAB FRAGMENTS
+# ═══════════════════════════════════════════════════════════════
+# Only the selected tab is rendered, and each tab body is an st.fragment:
+# its widgets (chat input, branch picker, anomaly filters, export buttons)
+# rerun that tab alone instead of the whole page.
+
+def tab_fragment(name):
+    """st.fragment that times the tab body, as a perf run of its own when it reruns alone"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def body(*args, **kwargs):
+            standalone = perf.ENABLED and not perf.in_run()
+            if standalone:
+                perf.begin_run(session=st.session_state.get('perf_session'), fragment=name)
+            try:
+                with perf.span(f'tab.{name}'):
+                    fn(*args, **kwargs)
+            finally:
+                if standalone:
+                    perf.end_run()
+        return st.fragment(body)
+    return decorate
 
-        response = f"""
-    🔴 **NPA Overview**
 
-    (Org Avg: {df['NPA_Percent'].mean():.2f}%)
+# ═══════════════════════════════════════════════════════════════
+# TAB 1: AI CHAT
+# ═══════════════════════════════════════════════════════════════
+# Messages keep a compact chart spec ({'kind', 'data'}) instead of a plotly
+# figure; charts are served from the shared figure cache for (kind, dataset key).
+# Only the last CHAT_PAGE messages are drawn until "Load older" is pressed.
+# Earlier turns reach the model through st.session_state.chat_memory, which
+# keeps the last few verbatim and summarizes the rest within a token budget.
+
+CHAT_PAGE = 20
+
+
+def ask(prompt, df, chart=True):
+    """Answer a chat prompt and append both messages to the history"""
+    st.session_state.messages.append({"role": "user", "content": prompt})
+    memory = st.session_state.chat_memory
+    usage = {}
+    response = call_ai(prompt, df, data=st.session_state.get('backend'), key=st.session_state.df_key,
+                       history=memory.messages(), usage=usage)
+    memory.add(prompt, response)
+    kind = chat_chart_kind(prompt) if chart else None
+    st.session_state.messages.append({
+        "role": "assistant",
+        "content": response,
+        "chart": {"kind": kind, "data": st.session_state.df_key} if kind else None,
+        "usage": usage
+    })
 
-    **Top Risk Branches:**
-    """
 
-        for _, row in high_npa.iterrows():
-            response += f"- {row['Branch_Name']} → {row['NPA_Percent']:.2f}%\n"
+def usage_caption(usage):
+    """One-line token summary of an assistant turn"""
+    if usage['backend'] in ('query', 'local'):
+        return "🧮 Answered locally · no LLM tokens"
+    if usage['backend'] == 'cache':
+        return f"♻️ Reused the answer to “{usage['matched']}” (similarity {usage['similarity']:.2f}) · no LLM call"
+    approx = "~" if usage['estimated'] else ""
+    cached = f" ({usage['cached_tokens']:,} cached)" if usage['cached_tokens'] else ""
+    return (f"🧮 {usage['backend']} · prompt {approx}{usage['prompt_tokens']:,} tokens{cached} "
+            f"incl. history ~{usage['history_tokens']:,} · reply {usage['completion_tokens']:,}")
 
-        response += """
-    Observations & Possible Considerations:
-    • Some branches show elevated stress
-    • Recovery follow-ups may be explored gradually
-    • Monitoring trends over time could help assess trajectory
 
+@tab_fragment('chat')
+def render_chat_tab(df):
+    st.markdown('<div class="section-header">💬 AI Chat</div>', unsafe_allow_html=True)
 
-    """
+    messages = st.session_state.messages
+    shown = st.session_state.setdefault('chat_shown', CHAT_PAGE)
+    first = max(0, len(messages) - shown)
 
-        return response
+    # Fixed-height scrolling container for chat messages
+    chat_placeholder = st.container(height=550)
 
-    
-    # CASA Analysis
-    elif any(word in q for word in ['casa', 'deposit', 'current', 'savings']):
-        low_casa = df.nsmallest(5, 'CASA_Percent')
-        high_casa = df.nlargest(3, 'CASA_Percent')
+    # Render the most recent messages
+    with chat_placeholder:
+        if first > 0 and st.button(f"⬆️ Load older ({first} hidden)", key="chat_load_older"):
+            st.session_state.chat_shown += CHAT_PAGE
+            st.rerun(scope="fragment")
         
-        response = f"""**💰 CASA (Current & Savings Account) Analysis**
-
-**Why CASA Matters?** CASA deposits are low-cost funds that improve profitability.
+        with perf.span('chat.history', messages=len(messages), rendered=len(messages) - first):
+            for idx in range(first, len(messages)):
+                msg = messages[idx]
+                with st.chat_message(msg["role"]):
+                    st.markdown(msg["content"])
+                    if msg.get("usage"):
+                        st.caption(usage_caption(msg["usage"]))
+                    spec = msg.get("chart")
+                    if spec and spec["data"] == st.session_state.df_key:
+                        with perf.span('chat.chart', kind=spec["kind"]):
+                            fig = cached_figure('chat', spec["data"],
+                                                lambda: build_chat_chart(spec["kind"], df, spec["data"]), kind=spec["kind"])
+                        st.plotly_chart(
+                            fig,
+                            width="stretch",
+                            key=f"chat_{idx}"
+                        )
 
-**Organization Overview:**
-- **Average CASA:** {df['CASA_Percent'].mean():.2f}%
-- **Target:** >40.0%
-- **Below target:** {len(df[df['CASA_Percent'] < 40])} branches
+    mem = st.session_state.chat_memory.stats()
+    if mem['recent_turns']:
+        st.caption(f"🧠 Memory: last {mem['recent_turns']} turn(s) verbatim, {mem['summarized_turns']} summarized "
+                   f"· ~{mem['tokens']:,} / {mem['budget']:,} tokens")
 
-**🎯 Growth Opportunities:**
+    # FIXED QUICK ACTIONS (NOT SCROLLING)
+    st.markdown("### ⚡ Quick Insights")
+    col1, col2, col3 = st.columns(3)
 
-"""
-        for i, (_, row) in enumerate(low_casa.iterrows(), 1):
-            gap = 40 - row['CASA_Percent']
-            response += f"{i}. **{row['Branch_Name']}**: {row['CASA_Percent']:.2f}%\n"
-            response += f"   - Growth potential: {gap:.1f}% | Deposits: ₹{row['Total_Deposits']:.1f}Cr\n"
-        
-        response += f"\n**🏆 Top Performers:**\n"
-        for _, row in high_casa.iterrows():
-            response += f"• **{row['Branch_Name']}**: {row['CASA_Percent']:.2f}%\n"
-        
-        response += f"\n**💡 Action Plan:**\n"
-        response += f"1. Launch CASA campaigns in low-performing branches\n"
-        response += f"2. Offer competitive interest rates and benefits\n"
-        response += f"3. Promote zero-balance and digital accounts\n"
-        response += f"4. Cross-sell to existing term deposit customers\n"
-        response += f"5. Target: Achieve >40% CASA across all branches\n"
-        
-        return response
-    
-    # Performance Analysis
-    elif any(word in q for word in ['top', 'best', 'performer', 'leader']):
-        top_deposits = df.nlargest(5, 'Total_Deposits')
-        
-        response = f"""**🏆 Top Performing Branches**
+    if col1.button("🔴 Bad Loans", key="quick_npa"):
+        ask("Which branches have higher NPA?", df)
+        st.rerun(scope="fragment")
 
-"""
-        for i, (_, row) in enumerate(top_deposits.iterrows(), 1):
-            achievement = (row['Total_Deposits'] / row['Deposit_Target'] * 100)
-            grade = "🌟 Excellent" if achievement > 100 else "✅ Good"
-            
-            response += f"**{i}. {row['Branch_Name']}** - ₹{row['Total_Deposits']:.1f}Cr {grade}\n"
-            response += f"   - Achievement: {achievement:.1f}%\n"
-            response += f"   - NPA: {row['NPA_Percent']:.1f}% | CASA: {row['CASA_Percent']:.1f}%\n"
-            response += f"   - Zone: {row['Zone']} | Staff: {row['Staff_Count']}\n\n"
-        
-        return response
-    
-    # Branch-specific
-    elif any(branch.lower() in q for branch in df['Branch_Name'].str.lower()):
-        for branch in df['Branch_Name']:
-            if branch.lower() in q:
-                row = df[df['Branch_Name'] == branch].iloc[0]
-                achievement = (row['Total_Deposits'] / row['Deposit_Target'] * 100)
-                
-                response = f"""**📍 {branch} Branch Analysis**
+    if col2.button("💰 CASA Opportunities", key="quick_casa"):
+        ask("Where can CASA be improved?", df)
+        st.rerun(scope="fragment")
 
-**Financial Performance:**
-- **Deposits:** ₹{row['Total_Deposits']:.2f}Cr (Target: ₹{row['Deposit_Target']:.2f}Cr)
-- **Achievement:** {achievement:.1f}% {'🌟' if achievement > 100 else '⚠️'}
-- **Advances:** ₹{row['Advances']:.2f}Cr
+    if col3.button("🏆 Top Performers", key="quick_top"):
+        ask("Show top performing branches", df)
+        st.rerun(scope="fragment")
 
-**Key Metrics:**
-- **NPA:** {row['NPA_Percent']:.2f}% {'✅' if row['NPA_Percent'] < 3 else '🟡' if row['NPA_Percent'] < 6 else '🔴'}
-- **CASA:** {row['CASA_Percent']:.2f}% {'✅' if row['CASA_Percent'] > 40 else '🟡'}
-- **CD Ratio:** {row['CD_Ratio']:.2f}%
+    # FIXED CHAT INPUT AT BOTTOM
+    user_input = st.chat_input("Ask about NPA, CASA, branch performance...")
 
-**Staff:**
-- Count: {row['Staff_Count']}
-- Business/Staff: ₹{row['Business_Per_Staff']:.2f}Cr
-- Profit/Staff: ₹{row['Profit_Per_Staff']:.2f}Cr
+    if user_input:
+        ask(user_input, df, chart=should_show_chart(user_input))
+        st.rerun(scope="fragment")
 
-**Location:** {row['Zone']}
-"""
-                return response
-    
-    # Default overview
-    else:
-        response = f"""**📊 BankVista Overview**
-
-**Organization:**
-- **Branches:** {len(df)}
-- **Total Deposits:** ₹{df['Total_Deposits'].sum():.2f}Cr
-- **Total Advances:** ₹{df['Advances'].sum():.2f}Cr
-- **Total Staff:** {df['Staff_Count'].sum()}
-
-**Key Metrics:**
-- **Avg NPA:** {df['NPA_Percent'].mean():.2f}% (Target: <3%)
-- **Avg CASA:** {df['CASA_Percent'].mean():.2f}% (Target: >40%)
-- **Avg CD Ratio:** {df['CD_Ratio'].mean():.2f}%
-
-**Quick Insights:**
-- Highest NPA: {df.loc[df['NPA_Percent'].idxmax(), 'Branch_Name']} ({df['NPA_Percent'].max():.2f}%)
-- Lowest CASA: {df.loc[df['CASA_Percent'].idxmin(), 'Branch_Name']} ({df['CASA_Percent'].min():.2f}%)
-- Top Performer: {df.loc[df['Total_Deposits'].idxmax(), 'Branch_Name']} (₹{df['Total_Deposits'].max():.2f}Cr)
-
-**💡 Ask me:**
-- "Which branches have bad loans?"
-- "Where can we grow CASA?"
-- "Show me top performers"
-"""
-        return response
-
-
-def should_show_chart(query):
-    """Check if chart needed"""
-    q = query.lower()
-    chart_keywords = ['npa', 'casa', 'advance', 'top', 'best', 'worst', 'compare', 'chart', 'show']
-    return any(keyword in q for keyword in chart_keywords)
 
+# ═══════════════════════════════════════════════════════════════
+# TAB 2: PREDICTIONS
+# ═══════════════════════════════════════════════════════════════
 
-def create_chat_chart(query, df):
-    """Create chart for chat"""
-    q = query.lower()
+@tab_fragment('predictions')
+def render_predictions_tab(df):
+    st.markdown('<div class="section-header">📈 Predictive Analytics</div>', unsafe_allow_html=True)
     
-    if 'npa' in q or 'bad' in q:
-        top = df.nlargest(10, 'NPA_Percent')
-        colors = ['#ef4444' if x > 6 else '#f59e0b' if x > 3 else '#10b981' for x in top['NPA_Percent']]
-        
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=top['Branch_Name'],
-            y=top['NPA_Percent'],
-            marker=dict(color=colors),
-            text=top['NPA_Percent'].round(2),
-            textposition='outside',
-            texttemplate='%{text}%'
-        ))
-        
-        fig.add_hline(y=3, line_dash="dash", line_color="#10b981", annotation_text="Target: 3%")
-        fig.add_hline(y=6, line_dash="dash", line_color="#f59e0b", annotation_text="Warning: 6%")
-        
-        fig.update_layout(
-            title="Top 10 Branches by NPA",
-            xaxis_title="Branch",
-            yaxis_title="NPA %",
-            height=350,
-            showlegend=False,
-            xaxis_tickangle=-45,
-            margin=dict(l=20, r=20, t=50, b=80)
-        )
-        return fig
+    col1, col2 = st.columns([1, 2])
     
-    elif 'casa' in q:
-        low = df.nsmallest(5, 'CASA_Percent')
-        high = df.nlargest(5, 'CASA_Percent')
-        combined = pd.concat([low, high]).drop_duplicates()
-        colors = ['#ef4444' if x < 30 else '#fbbf24' if x < 40 else '#10b981' for x in combined['CASA_Percent']]
-        
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=combined['Branch_Name'],
-            y=combined['CASA_Percent'],
-            marker=dict(color=colors),
-            text=combined['CASA_Percent'].round(2),
-            textposition='outside',
-            texttemplate='%{text}%'
-        ))
-        
-        fig.add_hline(y=40, line_dash="dash", line_color="#3b82f6", annotation_text="Target: 40%")
-        
-        fig.update_layout(
-            title="CASA % Analysis",
-            xaxis_title="Branch",
-            yaxis_title="CASA %",
-            height=350,
-            showlegend=False,
-            xaxis_tickangle=-45,
-            margin=dict(l=20, r=20, t=50, b=80)
+    with col1:
+        st.markdown("### Select Branch")
+        selected_branch = st.selectbox(
+            "Choose a branch:",
+            df['Branch_Name'].tolist(),
+            label_visibility="collapsed",
+            key="pred_branch"
         )
-        return fig
     
-    elif 'top' in q or 'best' in q or 'performer' in q:
-        top = df.nlargest(10, 'Total_Deposits')
+    with col2:
+        with perf.span('predictions.forecast'):
+            prediction = PredictiveAnalytics(df).predict_npa_trend(selected_branch)
         
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=top['Branch_Name'],
-            y=top['Total_Deposits'],
-            marker=dict(color=top['Total_Deposits'], colorscale='Blues', showscale=False),
-            text=top['Total_Deposits'].round(2),
-            textposition='outside',
-            texttemplate='₹%{text}Cr'
-        ))
+        # Metrics
+        mcol1, mcol2, mcol3 = st.columns(3)
+        mcol1.metric("Current NPA", f"{prediction['current_npa']:.2f}%")
+        mcol2.metric("6-Month Forecast", f"{prediction['final_npa']:.2f}%")
+        mcol3.metric("Risk Level", f"{prediction['risk_color']} {prediction['risk_level']}")
         
-        fig.update_layout(
-            title="Top 10 Performers by Deposits",
-            xaxis_title="Branch",
-            yaxis_title="Deposits (Crores)",
-            height=350,
-            showlegend=False,
-            xaxis_tickangle=-45,
-            margin=dict(l=20, r=20, t=50, b=80)
-        )
-        return fig
-    
-    return None
+        # Chart
+        fig = create_prediction_chart(prediction)
+        
+        st.plotly_chart(fig, width="stretch", key="pred_chart")
 
 
 # ═══════════════════════════════════════════════════════════════
-# PREDICTIVE ANALYTICS
+# TAB 3: DASHBOARD
 # ═══════════════════════════════════════════════════════════════
 
-class PredictiveAnalytics:
-    def __init__(self, df):
-        self.df = df
+HEATMAP_BRANCH_VIEW = 60      # default to one column per branch up to this many
+
+
+@tab_fragment('dashboard')
+def render_dashboard_tab(df):
+    st.markdown('<div class="section-header">📊 Analytics Dashboard</div>', unsafe_allow_html=True)
+    data_key = st.session_state.df_key
     
-    def predict_npa_trend(self, branch_name, months=6):
-        branch = self.df[self.df['Branch_Name'] == branch_name].iloc[0]
-        current_npa = branch['NPA_Percent']
-        
-        predictions = []
-        npa = current_npa
-        
-        for month in range(1, months + 1):
-            seasonal_factor = 1.0 + (0.15 if month % 3 == 0 else 0.05)
-            trend_factor = 1.02 if current_npa > 5 else 0.98
-            noise = np.random.normal(0, 0.2)
-            npa = max(0, npa * seasonal_factor * trend_factor + noise)
-            
-            predictions.append({
-                'month': month,
-                'predicted_npa': round(npa, 2)
-            })
-        
-        final_npa = predictions[-1]['predicted_npa']
-        if final_npa > 6:
-            risk_level = 'HIGH RISK'
-            risk_color = '🔴'
-        elif final_npa > 3:
-            risk_level = 'MEDIUM RISK'
-            risk_color = '🟡'
-        else:
-            risk_level = 'LOW RISK'
-            risk_color = '🟢'
-        
-        return {
-            'branch': branch_name,
-            'current_npa': current_npa,
-            'predictions': predictions,
-            'final_npa': final_npa,
-            'risk_level': risk_level,
-            'risk_color': risk_color
-        }
-
-
-class AnomalyDetector:
-    def __init__(self, df):
-        self.df = df
+    # Data table
+    with perf.span('dashboard.table', rows=len(df)):
+        display_df = df.copy()
+        display_df['Dep_%'] = (display_df['Total_Deposits'] / display_df['Deposit_Target'] * 100).round(1)
     
-    def detect_anomalies(self):
-        anomalies = []
-        metrics = ['NPA_Percent', 'CASA_Percent', 'CD_Ratio', 'Profit_Per_Staff', 'Business_Per_Staff']
-        
-        for metric in metrics:
-            if metric not in self.df.columns:
-                continue
-            
-            mean = self.df[metric].mean()
-            std = self.df[metric].std()
-            
-            if std == 0:
-                continue
-            
-            for _, row in self.df.iterrows():
-                value = row[metric]
-                z_score = (value - mean) / std
-                
-                if abs(z_score) > 2:
-                    anomalies.append({
-                        'branch': row['Branch_Name'],
-                        'metric': metric,
-                        'value': round(value, 2),
-                        'org_mean': round(mean, 2),
-                        'z_score': round(z_score, 2),
-                        'direction': 'HIGH ⬆️' if z_score > 0 else 'LOW ⬇️',
-                        'severity': 'Critical' if abs(z_score) > 3 else 'Warning'
-                    })
-        
-        return sorted(anomalies, key=lambda x: abs(x['z_score']), reverse=True)
+        st.dataframe(
+            display_df[[
+                'Branch_Name', 'Zone', 'Total_Deposits', 'Dep_%',
+                'NPA_Percent', 'CASA_Percent', 'Staff_Count', 'Business_Per_Staff'
+            ]],
+            width="stretch",
+            hide_index=True
+        )
+    
+    # Charts
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        with perf.span('dashboard.top10_npa'):
+            fig1 = cached_figure('top10', data_key,
+                                 lambda: create_top10_chart(data_backend(df).top_n('NPA_Percent'), 'NPA_Percent', 'NPA %', 'Reds'),
+                                 metric='NPA_Percent')
+            st.plotly_chart(fig1, width="stretch", key="dash_npa")
+    
+    with col2:
+        with perf.span('dashboard.top10_casa'):
+            fig2 = cached_figure('top10', data_key,
+                                 lambda: create_top10_chart(data_backend(df).top_n('CASA_Percent'), 'CASA_Percent', 'CASA %', 'Greens'),
+                                 metric='CASA_Percent')
+            st.plotly_chart(fig2, width="stretch", key="dash_casa")
+    
+    # Heatmap (aggregated for large datasets, with drill-down into one group)
+    st.markdown("### 🔥 Performance Heatmap")
+    views = {"By Zone": 'Zone', "By Score Band": 'score', "All Branches": None}
+    hcol1, hcol2 = st.columns(2)
+    view = hcol1.radio(
+        "View", list(views), horizontal=True, key="heatmap_view",
+        index=2 if len(df) <= HEATMAP_BRANCH_VIEW else 0
+    )
+    group_by = views[view]
+    
+    subset, drill = df, "All"
+    if group_by:
+        groups = heatmap_groups(df, group_by)
+        drill = hcol2.selectbox("Drill down", ["All"] + sorted(groups.unique()), key=f"heatmap_drill_{group_by}")
+        if drill != "All":
+            subset, group_by = df[groups == drill], None
+    
+    with perf.span('dashboard.heatmap', view=view, rows=len(subset)) as rec:
+        build = lambda: create_performance_heatmap(subset, group_by=group_by)
+        payload = figure_json('heatmap', data_key, build, view=view, drill=drill)
+        heatmap_fig = load_figure(payload, 'heatmap')
+        payload_kb = len(payload) / 1024
+        if rec is not None:
+            rec['payload_kb'] = round(payload_kb, 1)
+        st.plotly_chart(heatmap_fig, width="stretch", key="heatmap")
+    cells = len(heatmap_fig.data[0].x) * len(heatmap_fig.data[0].y)
+    st.caption(f"{cells:,} cells · {payload_kb:,.0f} KB payload")
 
 
 # ═══════════════════════════════════════════════════════════════
-# VISUALIZATION FUNCTIONS
+# TAB 4: ZONE ANALYTICS
 # ═══════════════════════════════════════════════════════════════
 
-def create_performance_heatmap(df):
-    metrics = ['NPA_Percent', 'CASA_Percent', 'CD_Ratio', 'Profit_Per_Staff', 'Business_Per_Staff']
-    heatmap_data = df[metrics].copy()
+@tab_fragment('zones')
+def render_zone_tab(df):
+    st.markdown('<div class="section-header">🗺️ Zone Analytics</div>', unsafe_allow_html=True)
     
-    for col in metrics:
-        heatmap_data[col] = (heatmap_data[col] - heatmap_data[col].min()) / (heatmap_data[col].max() - heatmap_data[col].min())
+    with perf.span('zones.groupby'):
+        zone_stats = data_backend(df).zone_summary()
     
-    fig = go.Figure(data=go.Heatmap(
-        z=heatmap_data.T.values,
-        x=df['Branch_Name'],
-        y=[m.replace('_', ' ') for m in metrics],
-        colorscale='RdYlGn',
-        text=df[metrics].T.round(2).values,
-        texttemplate='%{text}',
-        textfont={"size": 10},
-        colorbar=dict(title="Normalized<br>Score")
-    ))
-    
-    fig.update_layout(
-        title="Branch Performance Heatmap",
-        height=400,
-        xaxis_tickangle=-45
-    )
+    # Zone comparison
+    with perf.span('zones.chart'):
+        zone_fig = cached_figure('zone', st.session_state.df_key, lambda: create_zone_comparison(df, zone_stats))
+        st.plotly_chart(zone_fig, width="stretch", key="zone_chart")
     
-    return fig
+    # Detailed zone stats
+    st.markdown("### Zone Performance Details")
+    st.dataframe(zone_stats, width="stretch")
+
+    render_zone_drilldown(df)
+
+    # Peer benchmarking
+    st.markdown("### Peer Benchmarking")
+    col1, col2 = st.columns([1, 2])
+    methods = {"Zone + size band": 'zone_size'}
+    if len(df) <= KNN_MAX_ROWS:
+        methods["50 nearest branches"] = 'knn'
+    method = methods[col1.radio("Peers", list(methods), key="peer_method")]
+    # Select by row position: branch names need not be unique
+    names, ids = df['Branch_Name'].astype(str).tolist(), df['Branch_ID'].astype(str).tolist()
+    pos = col2.selectbox("Branch", range(len(df)), format_func=lambda i: f"{names[i]} ({ids[i]})",
+                         key="peer_branch")
+    with perf.span('zones.peers', method=method):
+        bench = peer_benchmarks(df, st.session_state.df_key, method)
+    row = bench.iloc[pos]
+    st.caption(f"Peer group: {row['peer_group']} · {int(row['peers'])} peers")
+    st.dataframe(peer_table(row), width="stretch", hide_index=True)
+
+
+DRILL_BRANCH_ROWS = 1000     # branch rows shown at the bottom of a drill-down
+
+
+def render_zone_drilldown(df):
+    """Zone → region → branch navigation over the rollup cube, with a grade / risk band breakdown"""
+    st.markdown("### Drill Down")
+    cube = rollup_cube(df, st.session_state.df_key)
+    col1, col2, col3 = st.columns(3)
+
+    where = {}
+    zone = col1.selectbox("Zone", ["All"] + cube.rollup(['Zone']).index.tolist(), key="drill_zone")
+    if zone != "All":
+        where['Zone'] = zone
+        if 'Region' in cube.dimensions:
+            region = col2.selectbox("Region", ["All"] + cube.rollup(['Region'], **where).index.tolist(),
+                                    key=f"drill_region_{zone}")
+            if region != "All":
+                where['Region'] = region
+    # The next level of the hierarchy comes first, then the cross-cutting bands
+    below = [d for d in ('Zone', 'Region') if d in cube.dimensions and d not in where]
+    options = below[:1] + ["Branch"] + [d for d in cube.dimensions if d not in ('Zone', 'Region')]
+    by = col3.selectbox("Break down by", options, key=f"drill_by_{'/'.join(where.values())}")
+
+    with perf.span('zones.drill', level=by, depth=len(where)):
+        total = cube.total(**where)
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Branches", f"{int(total['branches']):,}")
+        m2.metric("Deposits", f"₹{total['Total_Deposits_sum']:,.0f}Cr")
+        m3.metric("Deposit Achievement", f"{total.get('deposit_ach', float('nan')):.1f}%")
+        m4.metric("NPA (deposit-weighted)", f"{total['NPA_Percent_wmean']:.2f}%")
+
+        if by == "Branch":
+            branches = cube.branches(**where)
+            st.dataframe(
+                branches.nlargest(DRILL_BRANCH_ROWS, 'Total_Deposits')[[
+                    'Branch_ID', 'Branch_Name', 'Zone', 'Total_Deposits', 'NPA_Percent', 'CASA_Percent', 'CD_Ratio'
+                ]],
+                width="stretch", hide_index=True
+            )
+            if len(branches) > DRILL_BRANCH_ROWS:
+                st.caption(f"Largest {DRILL_BRANCH_ROWS:,} of {len(branches):,} branches by deposits")
+        else:
+            st.dataframe(cube.summary([by], **where), width="stretch")
 
 
-def create_zone_comparison(df):
-    zone_stats = df.groupby('Zone').agg({
-        'Total_Deposits': 'sum',
-        'NPA_Percent': 'mean',
-        'CASA_Percent': 'mean',
-        'Branch_Name': 'count'
-    }).round(2)
-    
-    fig = make_subplots(
-        rows=2, cols=2,
-        subplot_titles=('Total Deposits', 'Average NPA', 'Average CASA', 'Branch Count'),
-        specs=[[{'type': 'bar'}, {'type': 'bar'}],
-               [{'type': 'bar'}, {'type': 'bar'}]]
-    )
-    
-    zones = zone_stats.index.tolist()
-    
-    fig.add_trace(go.Bar(x=zones, y=zone_stats['Total_Deposits'], name='Deposits',
-                         marker_color='#06b6d4'), row=1, col=1)
-    fig.add_trace(go.Bar(x=zones, y=zone_stats['NPA_Percent'], name='NPA',
-                         marker_color='#ef4444'), row=1, col=2)
-    fig.add_trace(go.Bar(x=zones, y=zone_stats['CASA_Percent'], name='CASA',
-                         marker_color='#10b981'), row=2, col=1)
-    fig.add_trace(go.Bar(x=zones, y=zone_stats['Branch_Name'], name='Branches',
-                         marker_color='#8b5cf6'), row=2, col=2)
-    
-    fig.update_layout(height=600, showlegend=False, title_text="Zone-wise Analysis")
-    
-    return fig
+# ═══════════════════════════════════════════════════════════════
+# TAB 5: WHAT-IF
+# ═══════════════════════════════════════════════════════════════
+# Sliders feed bankvista.scenario, which only recomputes the derived arrays
+# that depend on the levers moved since the previous run. The baseline model
+# is shared per dataset; each session keeps its own scenario state.
+
+@tab_fragment('scenario')
+def render_scenario_tab(df):
+    st.markdown('<div class="section-header">🧪 What-If Scenarios</div>', unsafe_allow_html=True)
+
+    col1, col2, col3 = st.columns(3)
+    scenario = {
+        'deposit_target_pct': col1.slider("Deposit target change (%)", -20.0, 20.0, 0.0, 0.5, key="wi_dep_t"),
+        'advance_target_pct': col1.slider("Advance target change (%)", -20.0, 20.0, 0.0, 0.5, key="wi_adv_t"),
+        'deposits_pct': col2.slider("Deposits change (%)", -20.0, 20.0, 0.0, 0.5, key="wi_dep"),
+        'advances_pct': col2.slider("Advances change (%)", -20.0, 20.0, 0.0, 0.5, key="wi_adv"),
+        'npa_delta': col3.slider("NPA change (points)", -3.0, 3.0, 0.0, 0.1, key="wi_npa"),
+        'pps_pct': col3.slider("Profit per staff change (%)", -30.0, 30.0, 0.0, 1.0, key="wi_pps"),
+    }
+    scope1, scope2 = st.columns(2)
+    scenario['zones'] = scope1.multiselect("Apply to zones (all when empty)", sorted(df['Zone'].unique()), key="wi_zones")
+    ids = scope2.text_input("…and/or these Branch_IDs (comma separated)", key="wi_branches")
+    scenario['branches'] = [b.strip() for b in ids.split(',') if b.strip()]
+
+    with perf.span('scenario.run') as rec:
+        model = scenario_model(df, st.session_state.df_key)
+        key, state = st.session_state.get('scenario_state', (None, None))
+        if key != st.session_state.df_key:
+            state = model.new_state()
+            st.session_state.scenario_state = (st.session_state.df_key, state)
+        result = model.run(scenario, state)
+        if rec is not None:
+            rec['recomputed'] = len(result['recomputed'])
+
+    (score_b, score_s), (risk_b, risk_s), (ach_b, ach_s) = result['avg_score'], result['high_risk'], result['deposit_ach']
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Grade changes", f"{result['changed']:,}", f"{result['upgrades']:,} up", delta_color="off")
+    m2.metric("Avg score", f"{score_s:.1f}", f"{score_s - score_b:+.1f}")
+    m3.metric("High-risk branches", f"{risk_s:,}", f"{risk_s - risk_b:+,}", delta_color="inverse")
+    m4.metric("Deposit achievement", f"{ach_s:.1f}%", f"{ach_s - ach_b:+.1f} pts")
+    st.caption(f"Recomputed {', '.join(result['recomputed']) or 'nothing'} in {result['ms']} ms")
+
+    left, right = st.columns([1, 3])
+    with left:
+        st.markdown("### Grades")
+        st.dataframe(result['grades'], width="stretch")
+    with right:
+        st.markdown("### Zones: baseline vs scenario")
+        st.dataframe(result['zones'].round(2), width="stretch")
+
+    if result['changed']:
+        st.markdown("### Branches changing grade")
+        st.dataframe(model.branch_table(result, result['moved'][:500]), width="stretch", hide_index=True)
 
 
 # ═══════════════════════════════════════════════════════════════
-# EXCEL EXPORT
+# TAB 6: ANOMALIES
 # ═══════════════════════════════════════════════════════════════
 
-def create_excel_dashboard(df):
-    output = io.BytesIO()
-    wb = Workbook()
-    wb.remove(wb.active)
-    
-    ws_data = wb.create_sheet("_Data")
-    ws_data.sheet_state = 'hidden'
+@tab_fragment('anomalies')
+def render_anomalies_tab(df):
+    st.markdown('<div class="section-header">🔍 Anomaly Detection</div>', unsafe_allow_html=True)
     
-    for col_idx, header in enumerate(df.columns, 1):
-        ws_data.cell(1, col_idx, header).font = Font(bold=True)
+    with perf.span('anomalies.detect'):
+        anomalies = data_backend(df).anomalies()
     
-    for row_idx, row_data in enumerate(df.itertuples(index=False), 2):
-        for col_idx, value in enumerate(row_data, 1):
-            ws_data.cell(row_idx, col_idx, value)
-    
-    ws = wb.create_sheet("Dashboard", 0)
-    ws.merge_cells('A1:F1')
-    ws['A1'].value = "BANKVISTA AI - DYNAMIC DASHBOARD"
-    ws['A1'].font = Font(bold=True, size=14, color="FFFFFF")
-    ws['A1'].fill = PatternFill("solid", fgColor="5B4B8A")
-    ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
-    ws.row_dimensions[1].height = 30
-    
-    ws['A3'] = "Select Branch:"
-    ws['B3'] = df.iloc[0]['Branch_Name']
+    if len(anomalies) == 0:
+        st.success("✅ No significant anomalies detected!")
+    else:
+        st.warning(f"⚠️ Detected {len(anomalies)} anomalies")
+        
+        # Filters
+        col1, col2 = st.columns(2)
+        with col1:
+            severity_filter = st.multiselect(
+                "Severity:",
+                ['Critical', 'Warning'],
+                default=['Critical', 'Warning'],
+                key="sev_filter"
+            )
+        with col2:
+            metric_filter = st.multiselect(
+                "Metric:",
+                list(set([a['metric'] for a in anomalies])),
+                default=list(set([a['metric'] for a in anomalies])),
+                key="metric_filter"
+            )
+        
+        filtered_anomalies = [
+            a for a in anomalies
+            if a['severity'] in severity_filter and a['metric'] in metric_filter
+        ]
+        
+        if filtered_anomalies:
+            anomaly_df = pd.DataFrame(filtered_anomalies)
+            st.dataframe(anomaly_df, width="stretch", hide_index=True)
+
+    # Multivariate: unusual combinations of metrics, for the branch's size
+    st.markdown("### 🧭 Multivariate Anomalies")
+    col1, col2 = st.columns(2)
+    methods = {"Mahalanobis (shrinkage covariance)": 'mahalanobis', "Isolation forest": 'isolation'}
+    method = methods[col1.radio("Method:", list(methods), horizontal=True, key="mv_method")]
+    limit = col2.slider("Branches shown:", 10, 200, 25, 5, key="mv_limit")
+
+    with perf.span('anomalies.multivariate', method=method, rows=len(df)):
+        table = multivariate_anomalies(df, st.session_state.df_key, method, limit)
+    if method == 'mahalanobis':
+        table = table[table['severity'] != 'Normal']
+    table = table.assign(z_flagged=table['branch'].isin({a['branch'] for a in anomalies}))
+
+    if len(table) == 0:
+        st.success("✅ No unusual metric combinations detected!")
+    else:
+        st.dataframe(table, width="stretch", hide_index=True)
+        st.caption(f"{(~table['z_flagged']).sum():,} of these are not in the single-metric z-score list · "
+                   "drivers: each metric's share of the branch's distance")
+
+
+# ═══════════════════════════════════════════════════════════════
+# TAB 7: EXPORT
+# ═══════════════════════════════════════════════════════════════
+
+NARRATIVE_CACHE = "generated/narratives.jsonl"
+
+
+@tab_fragment('export')
+def render_export_tab(df):
+    st.markdown('<div class="section-header">📥 Export Data</div>', unsafe_allow_html=True)
     
-    dv = DataValidation(type="list", formula1=f"=_Data!$B$2:$B${len(df)+1}")
-    dv.add('B3')
-    ws.add_data_validation(dv)
+    st.info("📊 Generate Excel dashboard with interactive formulas")
     
-    ws_all = wb.create_sheet("All Branches")
-    for col_idx, header in enumerate(df.columns, 1):
-        ws_all.cell(1, col_idx, header).font = Font(bold=True)
-        ws_all.cell(1, col_idx).fill = PatternFill("solid", fgColor="4472C4")
+    col1, col2 = st.columns(2)
     
-    for row_idx, row_data in enumerate(df.itertuples(index=False), 2):
-        for col_idx, value in enumerate(row_data, 1):
-            ws_all.cell(row_idx, col_idx, value)
+    with col1:
+        st.markdown("### Excel Features")
+        st.markdown("""
+        ✅ **Interactive Dashboard** - Branch selector dropdown  
+        ✅ **Dynamic Formulas** - Auto-updating metrics  
+        ✅ **Professional Design** - Color-coded sections  
+        ✅ **All Branches Sheet** - Complete data  
+        ✅ **Offline Ready** - Share freely  
+        """)
     
-    wb.save(output)
-    output.seek(0)
-    return output
-
-
-def generate_sample_data():
-    return pd.DataFrame({
-        'Branch_ID': ['B1001','B1002','B1003','B1004','B1005','B2001','B2002','B2003','B3001','B3002',
-                      'B3003','B3004','B3005','B3006','B3007','B3008','B3009','B3010','B4001','B4002'],
-        'Branch_Name': ['Mansoorabad','Adilabad','Hyderabad Main','Secunderabad','Warangal',
-                       'Vijayawada','Visakhapatnam','Guntur','Nellore','Tirupati',
-                       'Kadapa','Chittoor','Anantapur','Kurnool','Rajahmundry','Kakinada',
-                       'Eluru','Ongole','Nizamabad','Karimnagar'],
-        'Zone': ['Telangana']*10 + ['Andhra Pradesh']*10,
-        'Total_Deposits': [110.97,85.45,245.80,189.23,67.89,198.76,223.45,145.67,156.34,189.45,
-                          134.56,167.89,145.23,178.90,201.34,187.56,156.78,134.90,123.45,145.67],
-        'Deposit_Target': [105.46,95.00,250.00,195.00,75.00,205.00,220.00,150.00,160.00,185.00,
-                          140.00,165.00,150.00,175.00,200.00,185.00,155.00,140.00,125.00,150.00],
-        'Advances': [232.29,156.78,412.50,289.45,98.76,356.89,389.23,245.78,267.89,345.67,
-                    245.34,298.76,256.78,312.45,378.90,334.56,278.90,245.67,234.56,267.89],
-        'Advance_Target': [218.16,175.00,425.00,295.00,110.00,365.00,395.00,255.00,270.00,340.00,
-                          250.00,295.00,260.00,310.00,375.00,330.00,275.00,250.00,235.00,270.00],
-        'NPA_Percent': [2.8,5.4,1.9,3.2,8.5,2.3,1.8,4.1,3.5,2.7,4.3,3.8,4.6,3.1,2.4,2.9,3.7,4.2,5.1,3.9],
-        'Profit_Per_Staff': [5.44,3.1,6.8,4.5,1.8,5.8,6.5,3.8,4.2,5.1,3.9,4.7,3.6,4.9,5.9,5.3,4.4,3.7,3.3,4.1],
-        'CASA_Percent': [42.3,28.5,51.2,38.7,25.4,44.7,49.3,34.9,36.8,40.2,33.5,38.1,35.7,39.4,45.6,41.8,37.2,34.3,31.9,36.5],
-        'CD_Ratio': [72.5,78.2,65.8,70.1,82.3,66.8,64.5,73.4,71.2,68.9,74.3,70.7,72.8,69.5,67.3,68.7,71.6,73.9,76.4,72.1],
-        'Business_Per_Staff': [85.2,58.3,95.7,78.9,45.6,86.7,91.2,67.8,71.4,83.5,69.2,77.6,70.3,79.8,88.4,82.1,72.9,68.5,64.7,73.2],
-        'Staff_Count': [25,18,42,35,15,38,40,27,29,34,26,31,28,32,37,36,30,27,24,29]
-    })
-
+    with col2:
+        if st.button("📊 Generate Excel Dashboard", type="primary", key="gen_excel"):
+            with st.spinner("Creating Excel file..."):
+                with perf.span('export.excel', rows=len(df)):
+                    excel_file = create_excel_dashboard(df)
+                
+                st.download_button(
+                    label="⬇️ Download Excel File",
+                    data=excel_file,
+                    file_name=f"BankVista_Dashboard_{date.today().strftime('%Y%m%d')}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    key="download_excel"
+                )
+                
+                st.success("✅ Excel file generated successfully!")
+                st.balloons()
+
+    st.markdown("---")
+    st.markdown("### 📦 Branch Profiles (ZIP)")
+    
+    pcol1, pcol2 = st.columns(2)
+    with pcol1:
+        zones = sorted(df['Zone'].unique().tolist())
+        selected_zones = st.multiselect("Zones:", zones, default=zones, key="zip_zones")
+    zone_df = df[df['Zone'].isin(selected_zones)]
+    with pcol2:
+        selected_branches = st.multiselect(
+            "Branches (leave empty for all in the selected zones):",
+            zone_df['Branch_Name'].tolist(),
+            key="zip_branches"
+        )
+    if selected_branches:
+        zone_df = zone_df[zone_df['Branch_Name'].isin(selected_branches)]
+    
+    use_llm = st.checkbox("✍️ AI-written takeaways & summaries (cached per branch, template text on timeout)",
+                          key="zip_narratives")
+    
+    if st.button(f"📦 Generate {len(zone_df)} Branch Profiles", key="gen_zip", disabled=zone_df.empty):
+        bar = st.progress(0.0, text="Rendering branch profiles...")
+        narratives = None
+        if use_llm:
+            with perf.span('export.narratives', branches=len(zone_df)) as rec:
+                narratives, stats = narrate(
+                    profile_frame(zone_df), NARRATIVE_CACHE,
+                    progress=lambda done, total: bar.progress(done / total, text=f"Wrote {done}/{total} summaries")
+                )
+                if rec is not None:
+                    rec.update(llm=stats['llm'], cached=stats['cached'], fallback=stats['fallback'])
+            st.caption(f"Summaries: {stats['llm']} new, {stats['cached']} cached, "
+                       f"{stats['fallback']} template fallbacks · {stats['seconds']}s")
+        with perf.span('export.profiles_zip', branches=len(zone_df)):
+            bundle = create_profiles_zip(
+                zone_df,
+                progress=lambda done, total: bar.progress(done / total, text=f"Rendered {done}/{total} profiles"),
+                narratives=narratives,
+                peers=peer_benchmarks(df, st.session_state.df_key)
+            )
+        st.download_button(
+            label="⬇️ Download Profiles ZIP",
+            data=bundle,
+            file_name=f"BankVista_Branch_Profiles_{date.today().strftime('%Y%m%d')}.zip",
+            mime="application/zip",
+            key="download_zip"
+        )
+        st.success(f"✅ {len(zone_df)} branch profiles ready!")
 
 # ═══════════════════════════════════════════════════════════════
 # MAIN APPLICATION
@@ -939,8 +874,11 @@ def generate_sample_data():
 def main():
     if 'messages' not in st.session_state:
         st.session_state.messages = []
+        st.session_state.chat_memory = ChatMemory()
     if 'df' not in st.session_state:
         st.session_state.df = None
+        st.session_state.df_key = None
+        st.session_state.backend = None
 
     # Hero dynamic sizing
     if st.session_state.df is None:
@@ -966,13 +904,43 @@ def main():
     with st.sidebar:
         st.markdown("### 📤 Data Upload")
         
-        uploaded_file = st.file_uploader("CSV or Excel", type=['csv', 'xlsx', 'xls'], label_visibility="collapsed")
+        uploaded_files = st.file_uploader(
+            "CSV, Excel, Parquet or ZIP", type=['csv', 'xlsx', 'xls', 'parquet', 'zip'],
+            accept_multiple_files=True, label_visibility="collapsed"
+        )
         
         if st.button("📊 Try Sample Data"):
             st.session_state.df = generate_sample_data()
+            st.session_state.df_key = dataset_key(st.session_state.df)
+            st.session_state.backend = None
             st.session_state.messages = []
+            st.session_state.chat_memory.clear()
+            st.session_state.chat_shown = CHAT_PAGE
             st.rerun()
         
+        if duckdb_available():
+            with st.expander("🦆 Parquet Warehouse (DuckDB)"):
+                source = st.text_input("Parquet file, folder or glob", placeholder="data/history/*.parquet",
+                                       key="parquet_source")
+                if st.button("Connect", key="connect_duckdb") and source:
+                    try:
+                        with perf.span('warehouse.connect'):
+                            backend = DuckDBBackend(source)
+                            df, sampled = backend.latest_frame(WAREHOUSE_MAX_ROWS)
+                        st.session_state.backend = backend
+                        st.session_state.df = df
+                        st.session_state.df_key = backend.key
+                        st.session_state.df_sampled = sampled
+                        st.session_state.messages = []
+                        st.session_state.chat_memory.clear()
+                        st.session_state.chat_shown = CHAT_PAGE
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Error: {e}")
+                backend = st.session_state.get('backend')
+                if backend is not None:
+                    st.caption(f"Connected: {backend.files} file(s), {backend.history_rows():,} rows")
+        
         st.markdown("---")
         st.markdown("### 💡 Quick Tips")
         st.markdown("""
@@ -982,14 +950,38 @@ def main():
         - "Analyze [Branch]"
         """)
 
-    if uploaded_file:
+    # Parse only when the set of uploaded files changes, not on every rerun
+    upload_sig = tuple(sorted((f.name, f.size) for f in uploaded_files or []))
+    if upload_sig and upload_sig != st.session_state.get('upload_sig'):
         try:
-            df = pd.read_csv(uploaded_file) if uploaded_file.name.endswith('.csv') else pd.read_excel(uploaded_file)
-            st.session_state.df = df
-            st.session_state.messages = []
-            st.success(f"✅ Loaded {len(df)} branches!")
+            with perf.span('upload.parse', files=len(uploaded_files)) as rec:
+                df, report = load_files([(f.name, f.getvalue()) for f in uploaded_files])
+                if rec is not None:
+                    rec.update(rows=report['rows'], executor=report['executor'], rows_per_s=report['rows_per_s'])
+            st.session_state.upload_sig = upload_sig
+            st.session_state.ingest_report = report
+            if df is None:
+                st.error("❌ Error: none of the uploaded files could be read")
+            else:
+                st.session_state.df = df
+                st.session_state.df_key = dataset_key(df)
+                st.session_state.backend = None
+                st.session_state.messages = []
+                st.session_state.chat_memory.clear()
+                st.session_state.chat_shown = CHAT_PAGE
+                st.success(f"✅ Loaded {len(df):,} branches from {len(report['files'])} file(s)!")
         except Exception as e:
             st.error(f"❌ Error: {e}")
+    
+    report = st.session_state.get('ingest_report')
+    if uploaded_files and report:
+        with st.sidebar.expander("📥 Ingestion Report"):
+            st.caption(
+                f"{report['rows']:,} rows in {report['wall_s']:.2f}s · {report['rows_per_s'] or 0:,} rows/s · "
+                f"{report['executor']} x{report['workers']} · {report['speedup']}x vs serial · "
+                f"{report['duplicates_dropped']:,} duplicates dropped"
+            )
+            st.dataframe(pd.DataFrame(report['files']), hide_index=True, width="stretch")
 
     if st.session_state.df is None:
         st.markdown("""
@@ -1003,346 +995,134 @@ def main():
         return
 
     df = st.session_state.df
-    predictive = PredictiveAnalytics(df)
-    detector = AnomalyDetector(df)
 
-    # Status Bar
-    total_deposits = df['Total_Deposits'].sum()
-    total_staff = df['Staff_Count'].sum()
-    deposit_achievement = (df['Total_Deposits'].sum() / df['Deposit_Target'].sum() * 100)
+    with perf.span('kpi_cards'):
+        # Status Bar
+        kpi = data_backend(df).kpis()
+        total_deposits = kpi['total_deposits']
+        total_staff = kpi['total_staff']
+        deposit_achievement = kpi['deposit_achievement']
     
-    st.markdown(f"""
+        st.markdown(f"""
     <div class="status-bar">
         <p style="text-align:center;font-size:1.05rem;margin:0;color:#065f46;font-weight:600;">
-            ✅ <strong>{len(df)} Branches</strong> &nbsp;|&nbsp; 
+            ✅ <strong>{kpi['branches']} Branches</strong> &nbsp;|&nbsp; 
             🤖 <strong>AI Active</strong> &nbsp;|&nbsp;
             💰 <strong>₹{total_deposits:.1f}Cr</strong> &nbsp;|&nbsp;
             👥 <strong>{total_staff} Staff</strong> &nbsp;|&nbsp;
             📊 <strong>{deposit_achievement:.1f}% Achievement</strong>
         </p>
     </div>
-    """, unsafe_allow_html=True)
+        """, unsafe_allow_html=True)
 
-    # KPI Cards
-    col1, col2, col3, col4 = st.columns(4)
+        # KPI Cards
+        col1, col2, col3, col4 = st.columns(4)
     
-    kpis = [
-        (col1, f"{deposit_achievement:.1f}%", "Deposit Achievement"),
-        (col2, f"{df['NPA_Percent'].mean():.2f}%", "Average NPA"),
-        (col3, f"{df['CASA_Percent'].mean():.1f}%", "Average CASA"),
-        (col4, f"₹{df['Business_Per_Staff'].mean():.1f}Cr", "Avg Business/Staff")
-    ]
+        kpis = [
+            (col1, f"{deposit_achievement:.1f}%", "Deposit Achievement"),
+            (col2, f"{kpi['avg_npa']:.2f}%", "Average NPA"),
+            (col3, f"{kpi['avg_casa']:.1f}%", "Average CASA"),
+            (col4, f"₹{kpi['avg_bps']:.1f}Cr", "Avg Business/Staff")
+        ]
     
-    for col, value, label in kpis:
-        with col:
-            st.markdown(f"""
+        for col, value, label in kpis:
+            with col:
+                st.markdown(f"""
             <div class="stat-card">
                 <div class="stat-value">{value}</div>
                 <div class="stat-label">{label}</div>
             </div>
-            """, unsafe_allow_html=True)
-
-    # Main Tabs
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-        "💬 AI Chat",
-        "📈 Predictions",
-        "📊 Dashboard",
-        "🗺️ Zone Analytics",
-        "🔍 Anomalies",
-        "📥 Export"
-    ])
-
-    # ═══════════════════════════════════════════════════════════
-# TAB 1: AI CHAT (PROPER FIXED INPUT + SCROLLING MESSAGES)
-# ═══════════════════════════════════════════════════════════
-    with tab1:
-
-        st.markdown('<div class="section-header">💬 AI Chat</div>', unsafe_allow_html=True)
-
-        # Create a container for chat messages
-        chat_placeholder = st.container()
-
-        # FIXED HEIGHT SCROLL VIA STYLING BLOCK-CONTAINER INSIDE THIS TAB
-        st.markdown("""
-            <style>
-            section[data-testid="stTabs"] div[data-testid="stVerticalBlock"]:has(div.stChatMessage) {
-                max-height: 550px;
-                overflow-y: auto;
-                padding-right: 10px;
-            }
-            </style>
-        """, unsafe_allow_html=True)
-
-        # Render messages
-        with chat_placeholder:
-            for idx, msg in enumerate(st.session_state.messages):
-                with st.chat_message(msg["role"]):
-                    st.markdown(msg["content"])
-                    if "chart" in msg and msg["chart"]:
-                        st.plotly_chart(
-                            msg["chart"],
-                            width="stretch",
-                            key=f"chat_{idx}"
-                        )
-
-        # FIXED QUICK ACTIONS (NOT SCROLLING)
-        st.markdown("### ⚡ Quick Insights")
-        col1, col2, col3 = st.columns(3)
-
-        if col1.button("🔴 Bad Loans", key="quick_npa"):
-            prompt = "Which branches have higher NPA?"
-            st.session_state.messages.append({"role": "user", "content": prompt})
-            response = call_ai(prompt, df)
-            chart = create_chat_chart(prompt, df)
-            st.session_state.messages.append(
-                {"role": "assistant", "content": response, "chart": chart}
-            )
-            st.rerun()
-
-        if col2.button("💰 CASA Opportunities", key="quick_casa"):
-            prompt = "Where can CASA be improved?"
-            st.session_state.messages.append({"role": "user", "content": prompt})
-            response = call_ai(prompt, df)
-            chart = create_chat_chart(prompt, df)
-            st.session_state.messages.append(
-                {"role": "assistant", "content": response, "chart": chart}
-            )
-            st.rerun()
-
-        if col3.button("🏆 Top Performers", key="quick_top"):
-            prompt = "Show top performing branches"
-            st.session_state.messages.append({"role": "user", "content": prompt})
-            response = call_ai(prompt, df)
-            chart = create_chat_chart(prompt, df)
-            st.session_state.messages.append(
-                {"role": "assistant", "content": response, "chart": chart}
-            )
-            st.rerun()
+                """, unsafe_allow_html=True)
 
-        # FIXED CHAT INPUT AT BOTTOM
-        user_input = st.chat_input("Ask about NPA, CASA, branch performance...")
+    if st.session_state.get('backend') is not None and st.session_state.get('df_sampled'):
+        st.caption(f"KPIs, zones, top-N, anomalies and chat queries use the full warehouse; "
+                   f"row-level views use a {len(df):,}-branch sample.")
 
-        if user_input:
-            st.session_state.messages.append({"role": "user", "content": user_input})
-            response = call_ai(user_input, df)
-            chart = create_chat_chart(user_input, df) if should_show_chart(user_input) else None
-            st.session_state.messages.append(
-                {"role": "assistant", "content": response, "chart": chart}
-            )
-            st.rerun()
+    # Main Tabs (only the selected one is rendered)
+    tab_names = list(TABS)
+    active_tab = st.segmented_control(
+        "Section",
+        tab_names,
+        default=tab_names[0],
+        key="active_tab",
+        label_visibility="collapsed"
+    ) or tab_names[0]
+    
+    TABS[active_tab](df)
 
 
+TABS = {
+    "💬 AI Chat": render_chat_tab,
+    "📈 Predictions": render_predictions_tab,
+    "📊 Dashboard": render_dashboard_tab,
+    "🗺️ Zone Analytics": render_zone_tab,
+    "🧪 What-If": render_scenario_tab,
+    "🔍 Anomalies": render_anomalies_tab,
+    "📥 Export": render_export_tab,
+}
 
-    # ═══════════════════════════════════════════════════════════
-    # TAB 2: PREDICTIONS
-    # ═══════════════════════════════════════════════════════════
-    with tab2:
-        st.markdown('<div class="section-header">📈 Predictive Analytics</div>', unsafe_allow_html=True)
-        
-        col1, col2 = st.columns([1, 2])
-        
-        with col1:
-            st.markdown("### Select Branch")
-            selected_branch = st.selectbox(
-                "Choose a branch:",
-                df['Branch_Name'].tolist(),
-                label_visibility="collapsed",
-                key="pred_branch"
-            )
-        
-        with col2:
-            prediction = predictive.predict_npa_trend(selected_branch)
-            
-            # Metrics
-            mcol1, mcol2, mcol3 = st.columns(3)
-            mcol1.metric("Current NPA", f"{prediction['current_npa']:.2f}%")
-            mcol2.metric("6-Month Forecast", f"{prediction['final_npa']:.2f}%")
-            mcol3.metric("Risk Level", f"{prediction['risk_color']} {prediction['risk_level']}")
-            
-            # Chart
-            months = [f"Month {p['month']}" for p in prediction['predictions']]
-            npas = [p['predicted_npa'] for p in prediction['predictions']]
-            
-            fig = go.Figure()
-            
-            fig.add_trace(go.Scatter(
-                x=months, y=npas,
-                mode='lines+markers',
-                name='Predicted NPA',
-                line=dict(color='#06b6d4', width=3),
-                marker=dict(size=10, symbol='circle')
-            ))
-            
-            fig.add_hline(y=3, line_dash="dash", line_color="#10b981",
-                        annotation_text="Target: 3%", annotation_position="right")
-            fig.add_hline(y=6, line_dash="dash", line_color="#f59e0b",
-                        annotation_text="Warning: 6%", annotation_position="right")
-            
-            fig.update_layout(
-                title=f"NPA Forecast - {selected_branch}",
-                xaxis_title="Month",
-                yaxis_title="NPA %",
-                height=400,
-                hovermode='x unified'
-            )
-            
-            st.plotly_chart(fig, width="stretch", key="pred_chart")
-
-    # ═══════════════════════════════════════════════════════════
-    # TAB 3: DASHBOARD
-    # ═══════════════════════════════════════════════════════════
-    with tab3:
-        st.markdown('<div class="section-header">📊 Analytics Dashboard</div>', unsafe_allow_html=True)
-        
-        # Data table
-        display_df = df.copy()
-        display_df['Dep_%'] = (display_df['Total_Deposits'] / display_df['Deposit_Target'] * 100).round(1)
-        
-        st.dataframe(
-            display_df[[
-                'Branch_Name', 'Zone', 'Total_Deposits', 'Dep_%',
-                'NPA_Percent', 'CASA_Percent', 'Staff_Count', 'Business_Per_Staff'
-            ]],
-            width="stretch",
-            hide_index=True
-        )
-        
-        # Charts
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig1 = px.bar(
-                df.nlargest(10, 'NPA_Percent'),
-                x='Branch_Name',
-                y='NPA_Percent',
-                title='Top 10 Branches by NPA',
-                color='NPA_Percent',
-                color_continuous_scale='Reds',
-                labels={'NPA_Percent': 'NPA %', 'Branch_Name': 'Branch'}
-            )
-            fig1.update_layout(showlegend=False, xaxis_tickangle=-45)
-            st.plotly_chart(fig1, width="stretch", key="dash_npa")
-        
-        with col2:
-            fig2 = px.bar(
-                df.nlargest(10, 'CASA_Percent'),
-                x='Branch_Name',
-                y='CASA_Percent',
-                title='Top 10 Branches by CASA',
-                color='CASA_Percent',
-                color_continuous_scale='Greens',
-                labels={'CASA_Percent': 'CASA %', 'Branch_Name': 'Branch'}
-            )
-            fig2.update_layout(showlegend=False, xaxis_tickangle=-45)
-            st.plotly_chart(fig2, width="stretch", key="dash_casa")
-        
-        # Heatmap
-        st.markdown("### 🔥 Performance Heatmap")
-        heatmap_fig = create_performance_heatmap(df)
-        st.plotly_chart(heatmap_fig, width="stretch", key="heatmap")
 
-    # ═══════════════════════════════════════════════════════════
-    # TAB 4: ZONE ANALYTICS
-    # ═══════════════════════════════════════════════════════════
-    with tab4:
-        st.markdown('<div class="section-header">🗺️ Zone Analytics</div>', unsafe_allow_html=True)
-        
-        # Zone comparison
-        zone_fig = create_zone_comparison(df)
-        st.plotly_chart(zone_fig, width="stretch", key="zone_chart")
-        
-        # Detailed zone stats
-        st.markdown("### Zone Performance Details")
-        
-        zone_stats = df.groupby('Zone').agg({
-            'Total_Deposits': ['sum', 'mean'],
-            'Advances': ['sum', 'mean'],
-            'NPA_Percent': 'mean',
-            'CASA_Percent': 'mean',
-            'Branch_Name': 'count',
-            'Staff_Count': 'sum'
-        }).round(2)
-        
-        zone_stats.columns = ['Total Deposits', 'Avg Deposits', 'Total Advances', 'Avg Advances',
-                             'Avg NPA', 'Avg CASA', 'Branches', 'Total Staff']
-        
-        st.dataframe(zone_stats, width="stretch")
+# ═══════════════════════════════════════════════════════════════
+# PERFORMANCE PANEL
+# ═══════════════════════════════════════════════════════════════
 
-    # ═══════════════════════════════════════════════════════════
-    # TAB 5: ANOMALIES
-    # ═══════════════════════════════════════════════════════════
-    with tab5:
-        st.markdown('<div class="section-header">🔍 Anomaly Detection</div>', unsafe_allow_html=True)
-        
-        anomalies = detector.detect_anomalies()
-        
-        if len(anomalies) == 0:
-            st.success("✅ No significant anomalies detected!")
-        else:
-            st.warning(f"⚠️ Detected {len(anomalies)} anomalies")
-            
-            # Filters
-            col1, col2 = st.columns(2)
-            with col1:
-                severity_filter = st.multiselect(
-                    "Severity:",
-                    ['Critical', 'Warning'],
-                    default=['Critical', 'Warning'],
-                    key="sev_filter"
-                )
-            with col2:
-                metric_filter = st.multiselect(
-                    "Metric:",
-                    list(set([a['metric'] for a in anomalies])),
-                    default=list(set([a['metric'] for a in anomalies])),
-                    key="metric_filter"
-                )
-            
-            filtered_anomalies = [
-                a for a in anomalies
-                if a['severity'] in severity_filter and a['metric'] in metric_filter
-            ]
-            
-            if filtered_anomalies:
-                anomaly_df = pd.DataFrame(filtered_anomalies)
-                st.dataframe(anomaly_df, width="stretch", hide_index=True)
-
-    # ═══════════════════════════════════════════════════════════
-    # TAB 6: EXPORT
-    # ═══════════════════════════════════════════════════════════
-    with tab6:
-        st.markdown('<div class="section-header">📥 Export Data</div>', unsafe_allow_html=True)
-        
-        st.info("📊 Generate Excel dashboard with interactive formulas")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown("### Excel Features")
-            st.markdown("""
-            ✅ **Interactive Dashboard** - Branch selector dropdown  
-            ✅ **Dynamic Formulas** - Auto-updating metrics  
-            ✅ **Professional Design** - Color-coded sections  
-            ✅ **All Branches Sheet** - Complete data  
-            ✅ **Offline Ready** - Share freely  
-            """)
-        
-        with col2:
-            if st.button("📊 Generate Excel Dashboard", type="primary", key="gen_excel"):
-                with st.spinner("Creating Excel file..."):
-                    excel_file = create_excel_dashboard(df)
-                    
-                    st.download_button(
-                        label="⬇️ Download Excel File",
-                        data=excel_file,
-                        file_name=f"BankVista_Dashboard_{date.today().strftime('%Y%m%d')}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        key="download_excel"
-                    )
-                    
-                    st.success("✅ Excel file generated successfully!")
-                    st.balloons()
+def render_perf_panel():
+    """Sidebar table of this rerun's timing spans (so far) and recent rerun totals"""
+    spans = perf.current_spans()
+    history = st.session_state.setdefault('perf_history', [])
+    
+    with st.sidebar:
+        with st.expander("⏱️ Performance", expanded=False):
+            if not spans:
+                st.caption("No spans recorded in this rerun.")
+                return
+            rows = [{
+                'Stage': ' ' * s['depth'] + s['name'],
+                'ms': s.get('ms'),
+                'Details': ', '.join(f"{k}={v}" for k, v in s.items() if k not in ('name', 'depth', 'ms'))
+            } for s in spans]
+            st.dataframe(pd.DataFrame(rows), hide_index=True, width="stretch")
+            if history:
+                st.caption("Recent reruns (ms): " + ", ".join(f"{t:.0f}" for t in history[-10:]))
+            llm = {name: m for name, m in GATEWAY.metrics().items() if m['requests'] or m['rejected']}
+            if llm:
+                st.dataframe(pd.DataFrame([{
+                    'Provider': name, 'In flight': m['in_flight'], 'Requests': m['requests'],
+                    'Errors': m['errors'], 'Retries': m['retries'], 'Rejected': m['rejected'],
+                    'Avg wait ms': m['avg_queue_wait_ms'], 'Max wait ms': round(m['max_queue_wait_ms']),
+                    'Avg ms': m['avg_latency_ms'],
+                    'Cached tokens': f"{m['cached_ratio']:.0%}" if m['cached_ratio'] is not None else None,
+                    'Hit / miss ms': f"{m['avg_hit_ms'] or '-'} / {m['avg_miss_ms'] or '-'}",
+                } for name, m in llm.items()]), hide_index=True, width="stretch")
+            ac = ANSWERS.stats()
+            if ac['lookups']:
+                st.caption(f"Answer reuse: {ac['calls_avoided']} LLM calls avoided of {ac['lookups']} "
+                           f"({ac['hit_rate']:.0%}), ~{ac['tokens_avoided']:,} tokens saved, "
+                           f"{ac['entries']} stored, threshold {ac['threshold']}")
+            fc = FIGURES.stats()
+            st.caption(f"Figure cache: {fc['hits']} hits / {fc['misses']} misses "
+                       f"({fc['hit_rate']:.0%}), {fc['entries']} entries, {fc['mb']} MB, "
+                       f"{fc['evictions']} evicted")
+
+
+def run():
+    if not perf.ENABLED:
+        main()
+        return
+    
+    if 'perf_session' not in st.session_state:
+        st.session_state.perf_session = perf.new_id()
+    perf.begin_run(session=st.session_state.perf_session)
+    try:
+        main()
+        render_perf_panel()
+    finally:
+        spans = perf.end_run()
+        if spans:
+            history = st.session_state.setdefault('perf_history', [])
+            history.append(spans[-1]['ms'])
+            del history[:-50]
 
 
 if __name__ == "__main__":
-    main()
+    run()
@@ -0,0 +1,66 @@
+"""
+BankVista analytics, usable without Streamlit.
+
+    from bankvista import AnomalyDetector, create_excel_dashboard
+
+Names are resolved lazily: `import bankvista` loads nothing heavy, and each
+attribute only imports the submodule (and its pandas / plotly / openpyxl
+dependencies) that defines it.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'PredictiveAnalytics': 'bankvista.analytics',
+    'AnomalyDetector': 'bankvista.analytics',
+    'MultivariateDetector': 'bankvista.analytics',
+    'init_ai_backends': 'bankvista.chat',
+    'build_enhanced_context': 'bankvista.chat',
+    'build_prompt_prefix': 'bankvista.chat',
+    'call_ai': 'bankvista.chat',
+    'get_enhanced_local_response': 'bankvista.chat',
+    'ChatMemory': 'bankvista.memory',
+    'parse_query': 'bankvista.query',
+    'execute_plan': 'bankvista.query',
+    'answer_query': 'bankvista.query',
+    'should_show_chart': 'bankvista.charts',
+    'chat_chart_kind': 'bankvista.charts',
+    'create_chat_chart': 'bankvista.charts',
+    'build_chat_chart': 'bankvista.charts',
+    'create_performance_heatmap': 'bankvista.charts',
+    'heatmap_groups': 'bankvista.charts',
+    'create_zone_comparison': 'bankvista.charts',
+    'cached_figure': 'bankvista.figcache',
+    'AnswerCache': 'bankvista.answercache',
+    'generate_sample_data': 'bankvista.data',
+    'load_files': 'bankvista.ingest',
+    'dataset_key': 'bankvista.data',
+    'create_excel_dashboard': 'bankvista.export',
+    'create_profiles_zip': 'bankvista.export',
+    'render_branch_profile': 'bankvista.profile',
+    'profile_frame': 'bankvista.profile',
+    'write_profiles_zip': 'bankvista.profile',
+    'narrative_table': 'bankvista.rules',
+    'rule_flags': 'bankvista.rules',
+    'ScenarioModel': 'bankvista.scenario',
+    'peer_benchmarks': 'bankvista.peers',
+    'rollup_cube': 'bankvista.rollup',
+    'metric_index': 'bankvista.ranks',
+    'calculate_branch_score': 'bankvista.scoring',
+    'grade_branch': 'bankvista.scoring',
+    'open_workbook': 'bankvista.xlsx_engine',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'bankvista' has no attribute '{name}'")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
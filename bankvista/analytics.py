@@ -0,0 +1,282 @@
+"""
+Predictive NPA trend, z-score anomaly detection and multivariate anomaly
+scoring over the branch table.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from bankvista.query import metric_label
+
+
+# ═══════════════════════════════════════════════════════════════
+# PREDICTIVE ANALYTICS
+# ═══════════════════════════════════════════════════════════════
+
+class PredictiveAnalytics:
+    def __init__(self, df):
+        self.df = df
+    
+    def predict_npa_trend(self, branch_name, months=6):
+        branch = self.df[self.df['Branch_Name'] == branch_name].iloc[0]
+        current_npa = branch['NPA_Percent']
+        
+        predictions = []
+        npa = current_npa
+        
+        for month in range(1, months + 1):
+            seasonal_factor = 1.0 + (0.15 if month % 3 == 0 else 0.05)
+            trend_factor = 1.02 if current_npa > 5 else 0.98
+            noise = np.random.normal(0, 0.2)
+            npa = max(0, npa * seasonal_factor * trend_factor + noise)
+            
+            predictions.append({
+                'month': month,
+                'predicted_npa': round(npa, 2)
+            })
+        
+        final_npa = predictions[-1]['predicted_npa']
+        if final_npa > 6:
+            risk_level = 'HIGH RISK'
+            risk_color = '🔴'
+        elif final_npa > 3:
+            risk_level = 'MEDIUM RISK'
+            risk_color = '🟡'
+        else:
+            risk_level = 'LOW RISK'
+            risk_color = '🟢'
+        
+        return {
+            'branch': branch_name,
+            'current_npa': current_npa,
+            'predictions': predictions,
+            'final_npa': final_npa,
+            'risk_level': risk_level,
+            'risk_color': risk_color
+        }
+
+
+class AnomalyDetector:
+    def __init__(self, df):
+        self.df = df
+    
+    def detect_anomalies(self):
+        anomalies = []
+        metrics = ['NPA_Percent', 'CASA_Percent', 'CD_Ratio', 'Profit_Per_Staff', 'Business_Per_Staff']
+        
+        for metric in metrics:
+            if metric not in self.df.columns:
+                continue
+            
+            mean = self.df[metric].mean()
+            std = self.df[metric].std()
+            
+            if std == 0:
+                continue
+            
+            for _, row in self.df.iterrows():
+                value = row[metric]
+                z_score = (value - mean) / std
+                
+                if abs(z_score) > 2:
+                    anomalies.append({
+                        'branch': row['Branch_Name'],
+                        'metric': metric,
+                        'value': round(value, 2),
+                        'org_mean': round(mean, 2),
+                        'z_score': round(z_score, 2),
+                        'direction': 'HIGH ⬆️' if z_score > 0 else 'LOW ⬇️',
+                        'severity': 'Critical' if abs(z_score) > 3 else 'Warning'
+                    })
+        
+        return sorted(anomalies, key=lambda x: abs(x['z_score']), reverse=True)
+
+
+# ═══════════════════════════════════════════════════════════════
+# MULTIVARIATE ANOMALIES
+# ═══════════════════════════════════════════════════════════════
+# AnomalyDetector looks at one metric at a time. MultivariateDetector scores
+# the combination: a branch with an ordinary NPA but a CD ratio and CASA
+# that are unusual together, for its size, has a large Mahalanobis distance
+# even when no single z-score passes 2.
+
+MULTIVARIATE_METRICS = ['NPA_Percent', 'CASA_Percent', 'CD_Ratio', 'Profit_Per_Staff',
+                        'Business_Per_Staff', 'Total_Deposits']
+LOG_METRICS = {'Total_Deposits', 'Advances'}        # size: compared on a log scale
+SEVERITY_Z = {'Critical': 3.090, 'Warning': 2.326}  # upper 0.1% / 1% of the normal
+
+
+def chi2_quantile(z, dof):
+    """Wilson–Hilferty approximation of the chi-square quantile at normal quantile z"""
+    k = 2 / (9 * dof)
+    return dof * (1 - k + z * np.sqrt(k)) ** 3
+
+
+def ledoit_wolf(x):
+    """Ledoit–Wolf shrinkage covariance of centred rows x: (covariance, shrinkage)"""
+    n, p = x.shape
+    s = x.T @ x / n
+    mu = np.trace(s) / p
+    d2 = ((s - mu * np.eye(p)) ** 2).sum()
+    b2 = ((x * x).sum(axis=1) ** 2).sum() / n ** 2 - (s ** 2).sum() / n
+    shrinkage = min(max(b2, 0.0), d2) / d2 if d2 > 0 else 1.0
+    return shrinkage * mu * np.eye(p) + (1 - shrinkage) * s, shrinkage
+
+
+def _average_path(n):
+    """Expected path length of an unsuccessful BST search over n points (isolation forest c(n))"""
+    n = np.asarray(n, dtype=float)
+    safe = np.maximum(n, 2)
+    return np.where(n > 1, 2 * (np.log(safe - 1) + np.euler_gamma) - 2 * (safe - 1) / safe, 0.0)
+
+
+def _isolation_tree(x, rng, max_depth):
+    """One isolation tree as flat arrays: feature, threshold, left, right, size (leaves: feature -1)"""
+    feature, threshold, left, right, size = [], [], [], [], []
+    stack = [(np.arange(len(x)), 0, None, None)]
+    while stack:
+        rows, depth, parent, side = stack.pop()
+        node = len(feature)
+        if parent is not None:
+            (left if side == 'l' else right)[parent] = node
+        feature.append(-1), threshold.append(0.0), left.append(-1), right.append(-1), size.append(len(rows))
+        if depth >= max_depth or len(rows) <= 1:
+            continue
+        sub = x[rows]
+        lo, hi = sub.min(axis=0), sub.max(axis=0)
+        spread = np.flatnonzero(hi > lo)
+        if not len(spread):
+            continue
+        f = rng.choice(spread)
+        t = rng.uniform(lo[f], hi[f])
+        feature[node], threshold[node] = f, t
+        go_left = sub[:, f] < t
+        stack.append((rows[~go_left], depth + 1, node, 'r'))
+        stack.append((rows[go_left], depth + 1, node, 'l'))
+    return tuple(np.array(a) for a in (feature, threshold, left, right, size))
+
+
+def isolation_scores(x, trees=100, sample=256, seed=0):
+    """Isolation forest anomaly scores in (0, 1] for the rows of x (higher is more isolated).
+    Every row walks each tree together, one level per step."""
+    rng = np.random.default_rng(seed)
+    n = len(x)
+    sample = min(sample, n)
+    max_depth = int(np.ceil(np.log2(max(sample, 2))))
+    rows = np.arange(n)
+    depth = np.zeros(n)
+    for _ in range(trees):
+        feature, threshold, left, right, size = _isolation_tree(x[rng.choice(n, sample, replace=False)], rng, max_depth)
+        node = np.zeros(n, dtype=np.int64)
+        for _ in range(max_depth + 1):
+            f = feature[node]
+            inner = f >= 0
+            if not inner.any():
+                break
+            go_left = x[rows, np.where(inner, f, 0)] < threshold[node]
+            node = np.where(inner, np.where(go_left, left[node], right[node]), node)
+        depth += _level(feature, left, right, node) + _average_path(size[node])
+    return 2 ** (-(depth / trees) / _average_path(sample))
+
+
+def _level(feature, left, right, node):
+    """Depth of each node id in a flat tree"""
+    levels = np.zeros(len(feature))
+    for parent in range(len(feature)):
+        if feature[parent] >= 0:
+            levels[left[parent]] = levels[right[parent]] = levels[parent] + 1
+    return levels[node]
+
+
+class MultivariateDetector:
+    def __init__(self, df, metrics=None):
+        self.df = df
+        self.metrics = [m for m in (metrics or MULTIVARIATE_METRICS) if m in df.columns]
+        x = df[self.metrics].to_numpy(dtype=float, copy=True)
+        for j, m in enumerate(self.metrics):
+            if m in LOG_METRICS:
+                x[:, j] = np.log1p(np.clip(x[:, j], 0, None))
+        x = np.where(np.isnan(x), np.nanmedian(x, axis=0), x)
+        std = x.std(axis=0)
+        self.z = (x - x.mean(axis=0)) / np.where(std > 0, std, 1)
+        self.covariance, self.shrinkage = ledoit_wolf(self.z)
+
+    def mahalanobis(self):
+        """(squared distance per branch, per-metric contributions summing to it)"""
+        contributions = self.z * (self.z @ np.linalg.inv(self.covariance))
+        return contributions.sum(axis=1), contributions
+
+    def rank(self, method='mahalanobis', **isolation):
+        """Every branch scored and ordered: dict of order, score, d2, contributions, severity.
+        method='isolation' ranks by isolation_scores instead of the squared distance."""
+        d2, contributions = self.mahalanobis()
+        p = len(self.metrics)
+        severity = np.select([d2 > chi2_quantile(SEVERITY_Z['Critical'], p),
+                              d2 > chi2_quantile(SEVERITY_Z['Warning'], p)], ['Critical', 'Warning'], 'Normal')
+        score = isolation_scores(self.z, **isolation) if method == 'isolation' else d2
+        return {'method': method, 'order': np.argsort(-score, kind='stable'), 'score': score, 'd2': d2,
+                'contributions': contributions, 'severity': severity}
+
+    def detect(self, method='mahalanobis', top_metrics=2, limit=None, **isolation):
+        """Branches ranked by multivariate score, with severity and the metrics driving each score.
+        method='isolation' ranks by isolation_scores instead; the drivers still come
+        from the Mahalanobis decomposition."""
+        return self.table(self.rank(method, **isolation), limit, top_metrics)
+
+    def table(self, ranking, limit=None, top_metrics=2):
+        """The first `limit` branches of a rank() result as the detect() table"""
+        import pandas as pd
+
+        order = ranking['order'] if limit is None else ranking['order'][:limit]
+        method, score, d2 = ranking['method'], ranking['score'], ranking['d2']
+        contributions, severity = ranking['contributions'], ranking['severity']
+        # Contributions can be negative (a metric that makes the mix more usual);
+        # drivers are ranked by their share of the positive part.
+        push = np.clip(contributions[order], 0, None)
+        share = push / np.where(push.sum(axis=1) > 0, push.sum(axis=1), 1)[:, None]
+        drivers = np.argsort(-share, axis=1, kind='stable')[:, :top_metrics]
+        names = np.array([metric_label(m) for m in self.metrics], dtype=object)
+        arrows = np.where(self.z[order[:, None], drivers] > 0, '⬆️', '⬇️')
+        labels = [", ".join(f"{names[j]} {a} ({s:.0%})" for j, a, s in zip(row, arr, sh[row]))
+                  for row, arr, sh in zip(drivers, arrows, share)]
+
+        out = pd.DataFrame({
+            'branch': self.df['Branch_Name'].to_numpy()[order],
+            'zone': self.df['Zone'].to_numpy()[order] if 'Zone' in self.df.columns else "",
+            'score': np.round(score[order], 3),
+            'distance': np.round(np.sqrt(d2[order]), 2),
+            'severity': severity[order],
+            'drivers': labels,
+        })
+        return out if method == 'isolation' else out.drop(columns='score')
+
+
+# ---------------- PER-DATASET RESULTS ----------------
+_DETECTED = OrderedDict()
+_MAX_DETECTED = 8
+_detected_lock = threading.Lock()
+
+
+def multivariate_anomalies(df, key=None, method='mahalanobis', limit=100):
+    """MultivariateDetector(df).detect(method, limit=limit). The full ranking is
+    cached per (dataset key, method); only the first `limit` rows are tabulated,
+    so changing the limit doesn't rerun detection."""
+    if key is None:
+        from bankvista.data import dataset_key
+        key = dataset_key(df)
+    cache_key = (key, method)
+    with _detected_lock:
+        hit = _DETECTED.get(cache_key)
+        if hit is not None:
+            _DETECTED.move_to_end(cache_key)
+    if hit is None:
+        detector = MultivariateDetector(df)
+        hit = detector, detector.rank(method)
+        with _detected_lock:
+            _DETECTED[cache_key] = hit
+            while len(_DETECTED) > _MAX_DETECTED:
+                _DETECTED.popitem(last=False)
+    detector, ranking = hit
+    return detector.table(ranking, limit)
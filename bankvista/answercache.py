@@ -0,0 +1,196 @@
+"""
+Offline reuse of LLM answers for paraphrased chat questions.
+
+    from bankvista.answercache import ANSWERS
+
+    hit = ANSWERS.lookup(dataset_key, "worst npa branches?", names)
+    if hit:
+        answer, similarity = hit['answer'], hit['similarity']
+    ANSWERS.store(dataset_key, "which branches have high NPA", answer, tokens=1800)
+    ANSWERS.stats()        # lookups, hits (= provider calls avoided), tokens_avoided, ...
+
+Questions are normalized (lower case, domain synonyms such as "bad loans"
+-> "npa" or "worst npa" -> "high npa", filler words dropped) and indexed per dataset as character 3-5
+gram TF-IDF vectors. Terms that name a problem ("bad loans", "defaults",
+"stressed assets") imply its high end when the question states no
+direction of its own, so "bad loans?" reads as "high npa" while "lowest
+bad loans" stays low. A new question reuses a stored answer when its cosine
+similarity reaches `threshold` (BANKVISTA_ANSWER_SIMILARITY, default 0.8)
+and both questions agree on
+- the numbers they mention ("top 5" is not "top 10"),
+- the zones / branches they mention (`names`, from the dataset),
+- direction ("highest" vs "lowest", "above" vs "below").
+Similarity alone cannot tell those apart.
+
+Only provider answers are stored, and only for questions that stand on
+their own (see FOLLOW_UP), since an answer to "and its CASA?" depends on
+the conversation. The index is process-wide, so sessions looking at the
+same dataset share it. Each dataset keeps its `max_entries` most recent
+questions; the `max_datasets` most recently used datasets are kept.
+"""
+
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+
+IMPLIED_HIGH = [
+    # applied first, and only to questions without a direction word
+    (r"\bbad loans?\b|\bdefaults?\b|\bstressed assets?\b", "high npa"),
+]
+SYNONYMS = [
+    (r"\bbad loans?\b|\bnon[- ]performing( assets?| loans?)?\b|\bdefaults?\b|\bstressed assets?\b", "npa"),
+    (r"\bcurrent (and|&) savings( accounts?)?\b|\blow[- ]cost deposits?\b", "casa"),
+    (r"\bbest performers?\b|\btop performers?\b|\bbest performing\b|\btop performing\b", "top performers"),
+    (r"\bzonal\b|\bzones\b", "zone"),
+    (r"\b(worst|poorest)\b(?=.*\bnpa\b)", "high"),
+    (r"\bhigher\b|\bhighest\b", "high"),
+    (r"\blower\b|\blowest\b", "low"),
+]
+STOPWORDS = {
+    'a', 'an', 'the', 'which', 'what', 'who', 'where', 'how', 'is', 'are', 'was', 'do', 'does', 'have', 'has',
+    'show', 'me', 'list', 'give', 'tell', 'please', 'can', 'could', 'you', 'i', 'we', 'our', 'of', 'in',
+    'for', 'to', 'with', 'on', 'branches', 'branch', 'ones', 'any', 'all', 'there', 'about',
+}
+UP = {'high', 'top', 'best', 'most', 'above', 'over', 'greater', 'more', 'max', 'maximum', 'largest'}
+DOWN = {'low', 'bottom', 'worst', 'least', 'below', 'under', 'less', 'min', 'minimum', 'smallest'}
+DIRECTION = re.compile(r"\b(%s)\b" % "|".join(sorted(UP | DOWN | {'higher', 'highest', 'lower', 'lowest', 'poorest'})))
+FOLLOW_UP = re.compile(r"\b(it|its|they|them|their|those|these|that one|same|also|else)\b|^\s*(and|what about|how about)\b", re.I)
+
+DEFAULT_THRESHOLD = float(os.getenv('BANKVISTA_ANSWER_SIMILARITY', 0.8))
+
+
+def normalize(query):
+    q = query.lower()
+    if not DIRECTION.search(q):
+        for pattern, term in IMPLIED_HIGH:
+            q = re.sub(pattern, term, q)
+    for pattern, term in SYNONYMS:
+        q = re.sub(pattern, term, q)
+    words = re.findall(r"[a-z0-9.]+", q)
+    return " ".join(w for w in words if w not in STOPWORDS)
+
+
+def char_ngrams(text, sizes=(3, 4, 5)):
+    padded = f" {text} "
+    return Counter(padded[i:i + n] for n in sizes for i in range(len(padded) - n + 1))
+
+
+def _signature(text, names):
+    """What two questions must share to reuse an answer: numbers, names, direction"""
+    words = set(text.split())
+    numbers = frozenset(re.findall(r"\d+(?:\.\d+)?", text))
+    mentioned = frozenset(n for n in names if n in text) if names else frozenset()
+    direction = (bool(words & UP), bool(words & DOWN))
+    return numbers, mentioned, direction
+
+
+class _Index:
+    """TF-IDF index over one dataset's stored questions"""
+
+    def __init__(self, names, max_entries):
+        self.names = names
+        self.max_entries = max_entries
+        self.entries = OrderedDict()        # normalized question -> entry
+        self.doc_freq = Counter()
+
+    def _idf(self, gram):
+        return math.log((len(self.entries) + 1) / (self.doc_freq.get(gram, 0) + 1)) + 1
+
+    def _weights(self, grams):
+        return {g: tf * self._idf(g) for g, tf in grams.items()}
+
+    def add(self, text, entry):
+        if text in self.entries:
+            self.doc_freq.subtract(self.entries.pop(text)['grams'].keys())
+        self.entries[text] = entry
+        self.doc_freq.update(entry['grams'].keys())
+        while len(self.entries) > self.max_entries:
+            _, old = self.entries.popitem(last=False)
+            self.doc_freq.subtract(old['grams'].keys())
+
+    def best(self, text, signature):
+        if text in self.entries and self.entries[text]['signature'] == signature:
+            self.entries.move_to_end(text)
+            return self.entries[text], 1.0
+        query = self._weights(char_ngrams(text))
+        q_norm = math.sqrt(sum(w * w for w in query.values())) or 1.0
+        best, best_sim = None, 0.0
+        for entry in self.entries.values():
+            if entry['signature'] != signature:
+                continue
+            weights = self._weights(entry['grams'])
+            dot = sum(w * weights[g] for g, w in query.items() if g in weights)
+            if not dot:
+                continue
+            sim = dot / (q_norm * (math.sqrt(sum(w * w for w in weights.values())) or 1.0))
+            if sim > best_sim:
+                best, best_sim = entry, sim
+        return best, best_sim
+
+
+class AnswerCache:
+    def __init__(self, threshold=DEFAULT_THRESHOLD, max_entries=500, max_datasets=8):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_datasets = max_datasets
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+        self.counts = {'lookups': 0, 'hits': 0, 'stored': 0, 'tokens_avoided': 0}
+
+    def _index(self, key, names):
+        index = self._indexes.get(key)
+        if index is None:
+            names = frozenset(filter(None, (normalize(str(n)) for n in (names() if callable(names) else names or ()))))
+            index = self._indexes[key] = _Index(names, self.max_entries)
+            while len(self._indexes) > self.max_datasets:
+                self._indexes.popitem(last=False)
+        self._indexes.move_to_end(key)
+        return index
+
+    def lookup(self, key, query, names=None, threshold=None):
+        """{'answer', 'query', 'similarity'} of the closest stored question, or None.
+        `names` (an iterable, or a callable returning one) lists the dataset's
+        zones and branches; it is read once per dataset."""
+        threshold = self.threshold if threshold is None else threshold
+        text = normalize(query)
+        with self._lock:
+            self.counts['lookups'] += 1
+            index = self._index(key, names)
+            entry, sim = index.best(text, _signature(text, index.names))
+            if entry is None or sim < threshold:
+                return None
+            self.counts['hits'] += 1
+            self.counts['tokens_avoided'] += entry['tokens']
+            return {'answer': entry['answer'], 'query': entry['query'], 'similarity': round(sim, 3)}
+
+    def store(self, key, query, answer, names=None, tokens=0):
+        text = normalize(query)
+        if not text:
+            return
+        with self._lock:
+            index = self._index(key, names)
+            index.add(text, {
+                'query': query, 'answer': answer, 'tokens': tokens,
+                'grams': char_ngrams(text), 'signature': _signature(text, index.names),
+            })
+            self.counts['stored'] += 1
+
+    def stats(self):
+        with self._lock:
+            out = dict(self.counts)
+            out['calls_avoided'] = out['hits']
+            out['hit_rate'] = out['hits'] / out['lookups'] if out['lookups'] else 0.0
+            out['entries'] = sum(len(i.entries) for i in self._indexes.values())
+            out['threshold'] = self.threshold
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+            for k in self.counts:
+                self.counts[k] = 0
+
+
+ANSWERS = AnswerCache()
@@ -0,0 +1,321 @@
+"""
+Plotly figure builders for the chat, dashboard and zone views.
+
+plotly is imported inside each builder; it is only paid for when a chart
+is actually drawn.
+"""
+
+
+# ═══════════════════════════════════════════════════════════════
+# CHAT CHARTS
+# ═══════════════════════════════════════════════════════════════
+
+def should_show_chart(query):
+    """Check if chart needed"""
+    q = query.lower()
+    chart_keywords = ['npa', 'casa', 'advance', 'top', 'best', 'worst', 'compare', 'chart', 'show']
+    return any(keyword in q for keyword in chart_keywords)
+
+
+def chat_chart_kind(query):
+    """Which chat chart a query maps to ('npa', 'casa', 'top'), or None"""
+    q = query.lower()
+    if 'npa' in q or 'bad' in q:
+        return 'npa'
+    elif 'casa' in q:
+        return 'casa'
+    elif 'top' in q or 'best' in q or 'performer' in q:
+        return 'top'
+    return None
+
+
+def create_chat_chart(query, df, key=None):
+    """Create chart for chat"""
+    return build_chat_chart(chat_chart_kind(query), df, key)
+
+
+def build_chat_chart(kind, df, key=None):
+    """Build the chat chart of the given kind (see chat_chart_kind); the
+    branches come from the bankvista.ranks index of dataset `key`"""
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    from bankvista.ranks import metric_index
+
+    if kind is None:
+        return None
+    idx = metric_index(df, key)
+    if kind == 'npa':
+        top = idx.top('NPA_Percent', 10)
+        colors = ['#ef4444' if x > 6 else '#f59e0b' if x > 3 else '#10b981' for x in top['NPA_Percent']]
+        
+        fig = go.Figure()
+        fig.add_trace(go.Bar(
+            x=top['Branch_Name'],
+            y=top['NPA_Percent'],
+            marker=dict(color=colors),
+            text=top['NPA_Percent'].round(2),
+            textposition='outside',
+            texttemplate='%{text}%'
+        ))
+        
+        fig.add_hline(y=3, line_dash="dash", line_color="#10b981", annotation_text="Target: 3%")
+        fig.add_hline(y=6, line_dash="dash", line_color="#f59e0b", annotation_text="Warning: 6%")
+        
+        fig.update_layout(
+            title="Top 10 Branches by NPA",
+            xaxis_title="Branch",
+            yaxis_title="NPA %",
+            height=350,
+            showlegend=False,
+            xaxis_tickangle=-45,
+            margin=dict(l=20, r=20, t=50, b=80)
+        )
+        return fig
+    
+    elif kind == 'casa':
+        low = idx.bottom('CASA_Percent', 5)
+        high = idx.top('CASA_Percent', 5)
+        combined = pd.concat([low, high]).drop_duplicates()
+        colors = ['#ef4444' if x < 30 else '#fbbf24' if x < 40 else '#10b981' for x in combined['CASA_Percent']]
+        
+        fig = go.Figure()
+        fig.add_trace(go.Bar(
+            x=combined['Branch_Name'],
+            y=combined['CASA_Percent'],
+            marker=dict(color=colors),
+            text=combined['CASA_Percent'].round(2),
+            textposition='outside',
+            texttemplate='%{text}%'
+        ))
+        
+        fig.add_hline(y=40, line_dash="dash", line_color="#3b82f6", annotation_text="Target: 40%")
+        
+        fig.update_layout(
+            title="CASA % Analysis",
+            xaxis_title="Branch",
+            yaxis_title="CASA %",
+            height=350,
+            showlegend=False,
+            xaxis_tickangle=-45,
+            margin=dict(l=20, r=20, t=50, b=80)
+        )
+        return fig
+    
+    elif kind == 'top':
+        top = idx.top('Total_Deposits', 10)
+        
+        fig = go.Figure()
+        fig.add_trace(go.Bar(
+            x=top['Branch_Name'],
+            y=top['Total_Deposits'],
+            marker=dict(color=top['Total_Deposits'], colorscale='Blues', showscale=False),
+            text=top['Total_Deposits'].round(2),
+            textposition='outside',
+            texttemplate='₹%{text}Cr'
+        ))
+        
+        fig.update_layout(
+            title="Top 10 Performers by Deposits",
+            xaxis_title="Branch",
+            yaxis_title="Deposits (Crores)",
+            height=350,
+            showlegend=False,
+            xaxis_tickangle=-45,
+            margin=dict(l=20, r=20, t=50, b=80)
+        )
+        return fig
+    
+    return None
+
+
+# ═══════════════════════════════════════════════════════════════
+# VISUALIZATION FUNCTIONS
+# ═══════════════════════════════════════════════════════════════
+
+HEATMAP_METRICS = ['NPA_Percent', 'CASA_Percent', 'CD_Ratio', 'Profit_Per_Staff', 'Business_Per_Staff']
+HEATMAP_MAX_CELLS = 2500      # above this, columns are averaged down server-side
+HEATMAP_LABEL_CELLS = 250     # cell labels only up to this many cells
+
+
+def _normalize(frame):
+    """Min-max scale each column to 0-1; constant columns map to 0.5"""
+    low = frame.min()
+    span = frame.max() - low
+    return ((frame - low) / span.where(span > 0)).fillna(0.5)
+
+
+def _cluster_order(values):
+    """Order rows by their projection on the first principal component,
+    so branches with similar metric profiles sit next to each other"""
+    import numpy as np
+
+    if len(values) < 3:
+        return np.arange(len(values))
+    centered = values - values.mean(axis=0)
+    u, s, _ = np.linalg.svd(centered, full_matrices=False)
+    return np.argsort(u[:, 0] * s[0], kind='stable')
+
+
+def heatmap_groups(df, by):
+    """Heatmap group label per branch: its Zone, or its composite-score decile for by='score'"""
+    import pandas as pd
+
+    if by == 'Zone':
+        return df['Zone'].astype(str)
+    norm = _normalize(df[HEATMAP_METRICS])
+    norm['NPA_Percent'] = 1 - norm['NPA_Percent']          # lower NPA is better
+    score = norm.mean(axis=1).rank(method='first')
+    q = min(10, len(df))
+    return pd.qcut(score, q=q, labels=[f"Score band {i}" for i in range(1, q + 1)]).astype(str)
+
+
+def create_performance_heatmap(df, group_by=None, max_cells=HEATMAP_MAX_CELLS, label_cells=HEATMAP_LABEL_CELLS):
+    """
+    Metric x branch heatmap of min-max normalized scores.
+
+    group_by='Zone' or 'score' draws one column per zone / score band instead
+    of per branch. Columns are ordered so similar profiles cluster together;
+    beyond max_cells, neighbouring columns are averaged into one, and cell
+    labels are drawn only up to label_cells.
+    """
+    import numpy as np
+    import plotly.graph_objects as go
+
+    metrics = HEATMAP_METRICS
+    raw = df[metrics].astype(float)
+    norm = _normalize(raw)
+    
+    if group_by:
+        groups = heatmap_groups(df, group_by).to_numpy()
+        raw = raw.groupby(groups).mean()
+        norm = norm.groupby(groups).mean()
+        names = raw.index.to_numpy()
+        counts = df.groupby(groups).size().reindex(raw.index).to_numpy()
+    else:
+        names = df['Branch_Name'].astype(str).to_numpy()
+        counts = np.ones(len(df), dtype=int)
+    
+    order = _cluster_order(norm.to_numpy())
+    raw, norm = raw.to_numpy()[order], norm.to_numpy()[order]
+    names, counts = names[order], counts[order]
+    
+    # Server-side downsampling: average runs of neighbouring (similar) columns
+    max_cols = max(1, max_cells // len(metrics))
+    if len(names) > max_cols:
+        bins = np.arange(len(names)) * max_cols // len(names)
+        sizes = np.bincount(bins)
+        raw = np.stack([np.bincount(bins, weights=raw[:, j]) / sizes for j in range(len(metrics))], axis=1)
+        norm = np.stack([np.bincount(bins, weights=norm[:, j]) / sizes for j in range(len(metrics))], axis=1)
+        starts = np.r_[0, np.cumsum(sizes)[:-1]]
+        counts = np.bincount(bins, weights=counts).astype(int)
+        names = [f"{names[i]} (+{n - 1})" if n > 1 else names[i] for i, n in zip(starts, sizes)]
+    
+    cells = norm.size
+    show_text = cells <= label_cells
+    
+    fig = go.Figure(data=go.Heatmap(
+        z=norm.T,
+        x=list(names),
+        y=[m.replace('_', ' ') for m in metrics],
+        colorscale='RdYlGn',
+        text=raw.T.round(2) if show_text else None,
+        texttemplate='%{text}' if show_text else None,
+        textfont={"size": 10},
+        customdata=np.broadcast_to(counts, norm.T.shape),
+        hovertemplate='%{x}<br>%{y}: %{z:.2f}<br>Branches: %{customdata}<extra></extra>',
+        colorbar=dict(title="Normalized<br>Score")
+    ))
+    
+    title = {None: "Branch Performance Heatmap", 'Zone': "Zone Performance Heatmap",
+             'score': "Performance Heatmap by Score Band"}.get(group_by, "Performance Heatmap")
+    fig.update_layout(
+        title=title,
+        height=400,
+        xaxis_tickangle=-45,
+        xaxis_type='category',
+        xaxis_showticklabels=len(names) <= 80
+    )
+    
+    return fig
+
+
+def create_zone_comparison(df, zone_stats=None):
+    """Zone subplots; zone_stats may be a precomputed per-zone frame with
+    'Total Deposits', 'Avg NPA', 'Avg CASA' and 'Branches' columns"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    if zone_stats is None:
+        from bankvista.rollup import rollup_cube
+        zone_stats = rollup_cube(df).zone_summary()
+    
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=('Total Deposits', 'Average NPA', 'Average CASA', 'Branch Count'),
+        specs=[[{'type': 'bar'}, {'type': 'bar'}],
+               [{'type': 'bar'}, {'type': 'bar'}]]
+    )
+    
+    zones = zone_stats.index.tolist()
+    
+    fig.add_trace(go.Bar(x=zones, y=zone_stats['Total Deposits'], name='Deposits',
+                         marker_color='#06b6d4'), row=1, col=1)
+    fig.add_trace(go.Bar(x=zones, y=zone_stats['Avg NPA'], name='NPA',
+                         marker_color='#ef4444'), row=1, col=2)
+    fig.add_trace(go.Bar(x=zones, y=zone_stats['Avg CASA'], name='CASA',
+                         marker_color='#10b981'), row=2, col=1)
+    fig.add_trace(go.Bar(x=zones, y=zone_stats['Branches'], name='Branches',
+                         marker_color='#8b5cf6'), row=2, col=2)
+    
+    fig.update_layout(height=600, showlegend=False, title_text="Zone-wise Analysis")
+    
+    return fig
+
+
+def create_top10_chart(df, metric, label, colorscale):
+    import plotly.express as px
+
+    fig = px.bar(
+        df.nlargest(10, metric),
+        x='Branch_Name',
+        y=metric,
+        title=f"Top 10 Branches by {label.replace(' %', '')}",
+        color=metric,
+        color_continuous_scale=colorscale,
+        labels={metric: label, 'Branch_Name': 'Branch'}
+    )
+    fig.update_layout(showlegend=False, xaxis_tickangle=-45)
+    return fig
+
+
+def create_prediction_chart(prediction):
+    import plotly.graph_objects as go
+
+    months = [f"Month {p['month']}" for p in prediction['predictions']]
+    npas = [p['predicted_npa'] for p in prediction['predictions']]
+    
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scatter(
+        x=months, y=npas,
+        mode='lines+markers',
+        name='Predicted NPA',
+        line=dict(color='#06b6d4', width=3),
+        marker=dict(size=10, symbol='circle')
+    ))
+    
+    fig.add_hline(y=3, line_dash="dash", line_color="#10b981",
+                annotation_text="Target: 3%", annotation_position="right")
+    fig.add_hline(y=6, line_dash="dash", line_color="#f59e0b",
+                annotation_text="Warning: 6%", annotation_position="right")
+    
+    fig.update_layout(
+        title=f"NPA Forecast - {prediction['branch']}",
+        xaxis_title="Month",
+        yaxis_title="NPA %",
+        height=400,
+        hovermode='x unified'
+    )
+    
+    return fig
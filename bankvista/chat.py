@@ -0,0 +1,537 @@
+"""
+AI chat: provider backends, prompt context and the offline keyword responder.
+
+Structured questions ("NPA above 4 in Telangana", "top 5 by deposits") are
+answered by bankvista.query before any provider is tried, and paraphrases of
+questions already answered by a provider come from bankvista.answercache. Provider requests
+go through bankvista.gateway (concurrency and rate limits, retries). The
+prompt is laid out for provider prefix caching: see PROMPT LAYOUT below.
+
+Provider SDKs (openai, groq, google-genai, requests) are imported inside
+`init_ai_backends` / `call_ai`, so importing this module stays cheap.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from bankvista import perf
+from bankvista.answercache import ANSWERS, FOLLOW_UP
+from bankvista.gateway import GATEWAY, http_session
+from bankvista.memory import estimate_tokens, transcript
+from bankvista.query import answer_query
+from bankvista.ranks import metric_index
+from bankvista.rollup import rollup_cube
+from bankvista.warehouse import FrameBackend
+
+
+# ═══════════════════════════════════════════════════════════════
+# AI BACKENDS - ALL INCLUDED
+# ═══════════════════════════════════════════════════════════════
+
+@lru_cache(maxsize=None)
+def init_ai_backends():
+    """Initialize all AI backends"""
+    backends = {}
+    
+    # OpenAI (SDKs are only imported when their key is configured)
+    key = os.getenv('OPENAI_API_KEY')
+    try:
+        if key and len(key.strip()) > 20:
+            from openai import OpenAI
+            client = OpenAI(api_key=key.strip(), max_retries=0, timeout=60)
+            try:
+                test = GATEWAY.call('openai', lambda: client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[{"role": "user", "content": "test"}],
+                    max_tokens=5
+                ))
+                backends['openai'] = client
+            except: pass
+    except: pass
+    
+    # Groq
+    key = os.getenv('GROQ_API_KEY')
+    try:
+        if key and len(key.strip()) > 20:
+            from groq import Groq
+            client = Groq(api_key=key.strip(), max_retries=0, timeout=60)
+            try:
+                test = GATEWAY.call('groq', lambda: client.chat.completions.create(
+                    model="llama-3.3-70b-versatile",
+                    messages=[{"role": "user", "content": "test"}],
+                    max_tokens=5
+                ))
+                backends['groq'] = client
+            except: pass
+    except: pass
+    
+    # Gemini
+    key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
+    if key:
+        try:
+            import google.genai as genai
+            client = genai.Client(api_key=key)
+            backends['gemini'] = {'client': client, 'type': 'new'}
+        except:
+            try:
+                import google.generativeai as genai_old
+                genai_old.configure(api_key=key)
+                model = genai_old.GenerativeModel('gemini-1.5-flash')
+                backends['gemini'] = {'client': model, 'type': 'old'}
+            except: pass
+    
+    # Ollama
+    try:
+        r = http_session().get('http://localhost:11434/api/tags', timeout=2)
+        if r.status_code == 200:
+            backends['ollama'] = True
+    except: pass
+    
+    return backends
+
+
+# ═══════════════════════════════════════════════════════════════
+# PROMPT LAYOUT
+# ═══════════════════════════════════════════════════════════════
+# Everything that only depends on the dataset (persona, guidelines, data
+# overview) forms one stable prefix, sent as the system message; the query
+# follows as the user message. Providers that cache prompt prefixes (OpenAI
+# and Groq automatically past ~1k tokens, Gemini implicitly on the system
+# instruction) then reuse it across questions. Ollama gets the prefix as its
+# `system` field on every question; its runner reuses the KV cache of the
+# longest matching prompt prefix, and keep_alive keeps the model (and that
+# cache) loaded, so only the question itself is evaluated.
+
+PERSONA = ("You are BankVista AI, an expert banking analyst. You are BankVista AI, "
+           "a banking analytics assistant. Provide calm, data-backed insights.")
+
+RESPONSE_GUIDELINES = """RESPONSE GUIDELINES:
+- Max 6–8 short bullet points
+- Be concise and calm
+- Avoid commanding language
+- Use suggestive tone (e.g., "may consider", "could explore")
+- Do not create urgency or pressure
+- No long explanations
+- Focus on insights, not instructions
+- Avoid using words like "must", "urgent", "immediately"
+- Use balanced analytical language
+- Present observations before suggestions"""
+
+MAX_PREFIX_ZONES = 40
+OLLAMA_MODEL = "llama3.2"
+OLLAMA_NUM_CTX = 8192
+OLLAMA_KEEP_ALIVE = os.getenv('BANKVISTA_OLLAMA_KEEP_ALIVE', '30m')
+
+_PREFIXES = OrderedDict()
+_PREFIX_SLOTS = 8
+_prefix_lock = threading.Lock()
+
+
+def _remember(store, key, value):
+    with _prefix_lock:
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > _PREFIX_SLOTS:
+            store.popitem(last=False)
+    return value
+
+
+def build_prompt_prefix(df, key=None, data=None):
+    """Stable system prompt for a dataset: persona, guidelines, data overview.
+    The figures come from `data` (a bankvista.warehouse backend) when given, so
+    a DuckDB-backed dataset is described in full rather than by its sample.
+    Cached per dataset key (bankvista.data.dataset_key when not given)."""
+    if key is None:
+        from bankvista.data import dataset_key
+        key = dataset_key(df)
+    cached = _PREFIXES.get(key)
+    if cached is not None:
+        return cached
+
+    data = data or FrameBackend(df, key)
+    high_npa = data.top_n('NPA_Percent', 3)[['Branch_Name', 'NPA_Percent']].to_dict('records')
+    low_casa = data.top_n('CASA_Percent', 3, ascending=True)[['Branch_Name', 'CASA_Percent']].to_dict('records')
+    top_performers = data.top_n('Total_Deposits', 3)[['Branch_Name', 'Total_Deposits']].to_dict('records')
+    org = data.overview(MAX_PREFIX_ZONES)
+    zones = org['zones']
+
+    prefix = f"""{PERSONA}
+
+{RESPONSE_GUIDELINES}
+
+BANKING DATA OVERVIEW:
+- Total Branches: {int(org['branches'])}
+- Total Deposits: ₹{org['deposits']:.2f} Crores
+- Total Advances: ₹{org['advances']:.2f} Crores
+- Average NPA: {org['npa']:.2f}%
+- Average CASA: {org['casa']:.2f}%
+
+ZONE OVERVIEW (branches | deposits | avg NPA | avg CASA):
+{chr(10).join([f"• {z}: {int(r.branches)} | ₹{r.deposits:.1f}Cr | {r.npa:.2f}% | {r.casa:.2f}%" for z, r in zones.iterrows()])}
+
+HIGH NPA BRANCHES (Needs Attention):
+{chr(10).join([f"• {b['Branch_Name']}: {b['NPA_Percent']:.2f}%" for b in high_npa])}
+
+LOW CASA BRANCHES (Growth Opportunity):
+{chr(10).join([f"• {b['Branch_Name']}: {b['CASA_Percent']:.2f}%" for b in low_casa])}
+
+TOP PERFORMERS (By Deposits):
+{chr(10).join([f"• {b['Branch_Name']}: ₹{b['Total_Deposits']:.2f}Cr" for b in top_performers])}
+
+Answer the user's question from this data."""
+    return _remember(_PREFIXES, key, prefix)
+
+
+def build_enhanced_context(query, df, key=None, history=None, data=None):
+    """Build comprehensive AI context as one string: the dataset prefix, the
+    conversation history (bankvista.memory), then the query"""
+    past = transcript(history)
+    past = f"\n\n{past}" if past else ""
+    return f"{build_prompt_prefix(df, key, data)}{past}\n\nUSER QUERY: {query}\n\nRespond now:"
+
+
+def _gemini_contents(history, query):
+    roles = {"system": "user", "user": "user", "assistant": "model"}
+    turns = [{"role": roles[m["role"]], "parts": [{"text": m["content"]}]} for m in history or []]
+    return turns + [{"role": "user", "parts": [{"text": query}]}]
+
+
+# ---------------- TOKEN USAGE ----------------
+# Readers for GATEWAY.call(usage=...): (prompt, cached, completion) tokens
+
+def _openai_usage(response):
+    u = response.usage
+    details = getattr(u, 'prompt_tokens_details', None)
+    return u.prompt_tokens, getattr(details, 'cached_tokens', 0), u.completion_tokens
+
+
+def _gemini_usage(response):
+    u = response.usage_metadata
+    return u.prompt_token_count, getattr(u, 'cached_content_token_count', 0), u.candidates_token_count
+
+
+def _tracked(reader, usage, backend):
+    """Usage reader that also records the counts into the caller's `usage` dict"""
+    def read(response):
+        if usage is not None:
+            usage['backend'] = backend
+        counts = reader(response)
+        if usage is not None:
+            usage.update(prompt_tokens=counts[0], cached_tokens=counts[1] or 0,
+                         completion_tokens=counts[2], estimated=False)
+        return counts
+    return read
+
+
+def _ollama_usage(prefix, query):
+    def read(r):
+        data = r.json()
+        evaluated = data.get('prompt_eval_count', 0)
+        # Ollama only reports the tokens it evaluated; the prompt length is
+        # estimated at ~4 characters per token of prefix and query.
+        prompt = max(evaluated, estimate_tokens(prefix) + estimate_tokens(query))
+        return prompt, prompt - evaluated, data.get('eval_count', 0)
+    return read
+
+
+def _ollama(payload):
+    def generate():
+        r = http_session().post('http://localhost:11434/api/generate', json={
+            "model": OLLAMA_MODEL, "stream": False, "keep_alive": OLLAMA_KEEP_ALIVE,
+            "options": {"num_ctx": OLLAMA_NUM_CTX}, **payload
+        }, timeout=30)
+        r.raise_for_status()
+        return r
+    return generate
+
+
+def call_ai(query, df, data=None, key=None, history=None, usage=None):
+    """Call AI with all backends; `data` is an optional bankvista.warehouse backend
+    that structured questions are pushed down to instead of df. `key` is the
+    dataset key the prompt prefix is cached under. `history` is the earlier
+    conversation (bankvista.memory.ChatMemory.messages()). When a dict is
+    passed as `usage` it receives the backend ('query', 'cache', a provider
+    or 'local') and the turn's token counts."""
+    usage = {} if usage is None else usage
+    usage.update(backend='query', prompt_tokens=0, cached_tokens=0, completion_tokens=0,
+                 history_tokens=0, estimated=False)
+    if key is None:
+        from bankvista.data import dataset_key
+        key = dataset_key(df)
+    # Structured questions (filters, top-N, aggregates) are answered locally;
+    # a plan the backend can't run (e.g. a column it lacks) goes to the LLM
+    with perf.span('call_ai', backend='query') as rec:
+        try:
+            answer = data.answer(query) if data is not None else \
+                answer_query(query, df, rollup_cube(df, key), metric_index(df, key))
+        except ValueError:
+            answer = None
+        if rec is not None:
+            rec['parsed'] = answer is not None
+    if answer is not None:
+        return answer
+
+    # Paraphrases of an earlier question reuse its answer, unless the
+    # question leans on the conversation ("and its CASA?")
+    standalone = not (history and FOLLOW_UP.search(query))
+    names = lambda: _dataset_names(df)  # noqa: E731
+    if standalone:
+        with perf.span('call_ai', backend='cache') as rec:
+            hit = ANSWERS.lookup(key, query, names)
+            if rec is not None:
+                rec['similarity'] = hit and hit['similarity']
+        if hit:
+            usage.update(backend='cache', similarity=hit['similarity'], matched=hit['query'])
+            return hit['answer']
+
+    answer = _ask_llm(query, df, key, history or [], usage, data)
+    if standalone and usage['backend'] != 'local':
+        ANSWERS.store(key, query, answer, names, tokens=usage['prompt_tokens'] + usage['completion_tokens'])
+    return answer
+
+
+def _dataset_names(df):
+    """Zone, region and branch names a cached answer must agree on"""
+    cols = [c for c in ('Zone', 'Region', 'Branch_Name') if c in df.columns]
+    return {str(v) for c in cols for v in df[c].unique()}
+
+
+def _ask_llm(query, df, key, history, usage, data=None):
+    """Provider chain for one question: OpenAI, Groq, Gemini, Ollama, then the local responder"""
+    with perf.span('ai.init_backends'):
+        backends = init_ai_backends()
+    with perf.span('ai.build_context'):
+        prefix = build_prompt_prefix(df, key, data)
+    messages = [{"role": "system", "content": prefix}, *history, {"role": "user", "content": query}]
+    # Estimates, replaced by the provider's counts when it reports them
+    usage['history_tokens'] = sum(estimate_tokens(m["content"]) for m in history)
+    usage.update(prompt_tokens=sum(estimate_tokens(m["content"]) for m in messages), estimated=True)
+    
+    # Try OpenAI
+    if 'openai' in backends:
+        try:
+            with perf.span('call_ai', backend='openai'):
+                response = GATEWAY.call('openai', lambda: backends['openai'].chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=messages,
+                    max_tokens=1000,
+                    temperature=0.7,
+                    extra_body={"prompt_cache_key": f"bankvista-{key}"}
+                ), usage=_tracked(_openai_usage, usage, 'openai'))
+                return response.choices[0].message.content
+        except: pass
+    
+    # Try Groq
+    if 'groq' in backends:
+        try:
+            with perf.span('call_ai', backend='groq'):
+                response = GATEWAY.call('groq', lambda: backends['groq'].chat.completions.create(
+                    model="llama-3.3-70b-versatile",
+                    messages=messages,
+                    max_tokens=1000,
+                    temperature=0.7
+                ), usage=_tracked(_openai_usage, usage, 'groq'))
+                return response.choices[0].message.content
+        except: pass
+    
+    # Try Gemini
+    if 'gemini' in backends:
+        try:
+            with perf.span('call_ai', backend='gemini'):
+                client_info = backends['gemini']
+                if client_info['type'] == 'new':
+                    response = GATEWAY.call('gemini', lambda: client_info['client'].models.generate_content(
+                        model='gemini-2.0-flash-exp',
+                        contents=_gemini_contents(history, query),
+                        config={'system_instruction': prefix}
+                    ), usage=_tracked(_gemini_usage, usage, 'gemini'))
+                    return response.text
+                else:
+                    response = GATEWAY.call('gemini', lambda: client_info['client'].generate_content(
+                        build_enhanced_context(query, df, key, history, data)
+                    ), usage=_tracked(_gemini_usage, usage, 'gemini'))
+                    return response.text
+        except: pass
+    
+    # Try Ollama
+    if 'ollama' in backends:
+        try:
+            with perf.span('call_ai', backend='ollama'):
+                past = transcript(history)
+                prompt = f"{past}\n\nUSER QUERY: {query}" if past else query
+                response = GATEWAY.call('ollama', _ollama({"system": prefix, "prompt": prompt}),
+                                        usage=_tracked(_ollama_usage(prefix, prompt), usage, 'ollama'))
+                return response.json()['response']
+        except: pass
+    
+    # Local fallback
+    usage.update(backend='local', prompt_tokens=0, cached_tokens=0, completion_tokens=0,
+                 history_tokens=0, estimated=False)
+    with perf.span('call_ai', backend='local'):
+        return get_enhanced_local_response(query, df, key)
+
+
+def get_enhanced_local_response(query, df, key=None):
+    """Enhanced local responses; top / bottom lists and ranks come from the
+    dataset's bankvista.ranks index (cached under `key`)"""
+    q = query.lower()
+    idx = metric_index(df, key)
+    
+    # NPA Analysis
+# NPA Analysis
+    if any(word in q for word in ['npa', 'bad', 'loan', 'default']):
+
+        high_npa = idx.top('NPA_Percent', 5)
+
+        response = f"""
+    🔴 **NPA Overview**
+
+    (Org Avg: {df['NPA_Percent'].mean():.2f}%)
+
+    **Top Risk Branches:**
+    """
+
+        for _, row in high_npa.iterrows():
+            response += f"- {row['Branch_Name']} → {row['NPA_Percent']:.2f}%\n"
+
+        response += """
+    Observations & Possible Considerations:
+    • Some branches show elevated stress
+    • Recovery follow-ups may be explored gradually
+    • Monitoring trends over time could help assess trajectory
+
+
+    """
+
+        return response
+
+    
+    # CASA Analysis
+    elif any(word in q for word in ['casa', 'deposit', 'current', 'savings']):
+        low_casa = idx.bottom('CASA_Percent', 5)
+        high_casa = idx.top('CASA_Percent', 3)
+        
+        response = f"""**💰 CASA (Current & Savings Account) Analysis**
+
+**Why CASA Matters?** CASA deposits are low-cost funds that improve profitability.
+
+**Organization Overview:**
+- **Average CASA:** {df['CASA_Percent'].mean():.2f}%
+- **Target:** >40.0%
+- **Below target:** {len(df[df['CASA_Percent'] < 40])} branches
+
+**🎯 Growth Opportunities:**
+
+"""
+        for i, (_, row) in enumerate(low_casa.iterrows(), 1):
+            gap = 40 - row['CASA_Percent']
+            response += f"{i}. **{row['Branch_Name']}**: {row['CASA_Percent']:.2f}%\n"
+            response += f"   - Growth potential: {gap:.1f}% | Deposits: ₹{row['Total_Deposits']:.1f}Cr\n"
+        
+        response += f"\n**🏆 Top Performers:**\n"
+        for _, row in high_casa.iterrows():
+            response += f"• **{row['Branch_Name']}**: {row['CASA_Percent']:.2f}%\n"
+        
+        response += f"\n**💡 Action Plan:**\n"
+        response += f"1. Launch CASA campaigns in low-performing branches\n"
+        response += f"2. Offer competitive interest rates and benefits\n"
+        response += f"3. Promote zero-balance and digital accounts\n"
+        response += f"4. Cross-sell to existing term deposit customers\n"
+        response += f"5. Target: Achieve >40% CASA across all branches\n"
+        
+        return response
+    
+    # Performance Analysis
+    elif any(word in q for word in ['top', 'best', 'performer', 'leader']):
+        top_deposits = idx.top('Total_Deposits', 5)
+        
+        response = f"""**🏆 Top Performing Branches**
+
+"""
+        for i, (_, row) in enumerate(top_deposits.iterrows(), 1):
+            achievement = (row['Total_Deposits'] / row['Deposit_Target'] * 100)
+            grade = "🌟 Excellent" if achievement > 100 else "✅ Good"
+            
+            response += f"**{i}. {row['Branch_Name']}** - ₹{row['Total_Deposits']:.1f}Cr {grade}\n"
+            response += f"   - Achievement: {achievement:.1f}%\n"
+            response += f"   - NPA: {row['NPA_Percent']:.1f}% | CASA: {row['CASA_Percent']:.1f}%\n"
+            response += f"   - Zone: {row['Zone']} | Staff: {row['Staff_Count']}\n\n"
+        
+        return response
+    
+    # Branch-specific
+    elif any(branch.lower() in q for branch in df['Branch_Name'].str.lower()):
+        for branch in df['Branch_Name']:
+            if branch.lower() in q:
+                row = df[df['Branch_Name'] == branch].iloc[0]
+                achievement = (row['Total_Deposits'] / row['Deposit_Target'] * 100)
+                
+                response = f"""**📍 {branch} Branch Analysis**
+
+**Financial Performance:**
+- **Deposits:** ₹{row['Total_Deposits']:.2f}Cr (Target: ₹{row['Deposit_Target']:.2f}Cr)
+- **Achievement:** {achievement:.1f}% {'🌟' if achievement > 100 else '⚠️'}
+- **Advances:** ₹{row['Advances']:.2f}Cr
+
+**Key Metrics:**
+- **NPA:** {row['NPA_Percent']:.2f}% {'✅' if row['NPA_Percent'] < 3 else '🟡' if row['NPA_Percent'] < 6 else '🔴'}
+- **CASA:** {row['CASA_Percent']:.2f}% {'✅' if row['CASA_Percent'] > 40 else '🟡'}
+- **CD Ratio:** {row['CD_Ratio']:.2f}%
+
+**Staff:**
+- Count: {row['Staff_Count']}
+- Business/Staff: ₹{row['Business_Per_Staff']:.2f}Cr
+- Profit/Staff: ₹{row['Profit_Per_Staff']:.2f}Cr
+
+**Location:** {row['Zone']}
+"""
+                from bankvista.peers import peer_benchmarks, peer_phrase
+                from bankvista.profile import profile_frame
+                from bankvista.rules import narrative_table
+
+                rules = narrative_table(profile_frame(df[df['Branch_Name'] == branch].head(1))).iloc[0]
+                peers = peer_benchmarks(df, key).loc[row.name]
+                pos = df.index.get_loc(row.name)
+                response += "\n**Organisation Rank:**\n"
+                for metric, name in [('Total_Deposits', 'Deposits'), ('NPA_Percent', 'NPA (1 = highest)'),
+                                     ('CASA_Percent', 'CASA')]:
+                    response += f"- {name}: #{idx.rank(metric, pos):,} of {idx.count(metric):,}\n"
+                response += f"\n**Peer Standing** ({peers['peer_group']}):\n"
+                for metric, name in [('Total_Deposits', 'Deposits'), ('NPA_Percent', 'NPA'), ('CASA_Percent', 'CASA')]:
+                    response += f"- {name}: {peer_phrase(peers, metric)}\n"
+                response += f"\n**Branch Review:** Score {rules['score']}/100 | Grade {rules['grade']} – {rules['grade_remark']}\n"
+                response += "\n**Key Risk Drivers:**\n" + "".join(f"- {r}\n" for r in rules['risks'])
+                response += "\n**Priority Focus Areas:**\n" + "".join(f"- {a}\n" for a in rules['focus'])
+                return response
+    
+    # Default overview
+    else:
+        highest_npa = idx.top('NPA_Percent', 1).iloc[0]
+        lowest_casa = idx.bottom('CASA_Percent', 1).iloc[0]
+        top_branch = idx.top('Total_Deposits', 1).iloc[0]
+        response = f"""**📊 BankVista Overview**
+
+**Organization:**
+- **Branches:** {len(df)}
+- **Total Deposits:** ₹{df['Total_Deposits'].sum():.2f}Cr
+- **Total Advances:** ₹{df['Advances'].sum():.2f}Cr
+- **Total Staff:** {df['Staff_Count'].sum()}
+
+**Key Metrics:**
+- **Avg NPA:** {df['NPA_Percent'].mean():.2f}% (Target: <3%)
+- **Avg CASA:** {df['CASA_Percent'].mean():.2f}% (Target: >40%)
+- **Avg CD Ratio:** {df['CD_Ratio'].mean():.2f}%
+
+**Quick Insights:**
+- Highest NPA: {highest_npa['Branch_Name']} ({highest_npa['NPA_Percent']:.2f}%)
+- Lowest CASA: {lowest_casa['Branch_Name']} ({lowest_casa['CASA_Percent']:.2f}%)
+- Top Performer: {top_branch['Branch_Name']} (₹{top_branch['Total_Deposits']:.2f}Cr)
+
+**💡 Ask me:**
+- "Which branches have bad loans?"
+- "Where can we grow CASA?"
+- "Show me top performers"
+"""
+        return response
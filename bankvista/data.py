@@ -0,0 +1,41 @@
+"""
+Built-in demo dataset, and the content key used to cache per-dataset results.
+"""
+
+import hashlib
+
+import pandas as pd
+
+
+def dataset_key(df):
+    """Short content hash of a DataFrame (columns, dtypes and values)"""
+    h = hashlib.blake2b(digest_size=8)
+    h.update(repr([(c, str(t)) for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def generate_sample_data():
+    return pd.DataFrame({
+        'Branch_ID': ['B1001','B1002','B1003','B1004','B1005','B2001','B2002','B2003','B3001','B3002',
+                      'B3003','B3004','B3005','B3006','B3007','B3008','B3009','B3010','B4001','B4002'],
+        'Branch_Name': ['Mansoorabad','Adilabad','Hyderabad Main','Secunderabad','Warangal',
+                       'Vijayawada','Visakhapatnam','Guntur','Nellore','Tirupati',
+                       'Kadapa','Chittoor','Anantapur','Kurnool','Rajahmundry','Kakinada',
+                       'Eluru','Ongole','Nizamabad','Karimnagar'],
+        'Zone': ['Telangana']*10 + ['Andhra Pradesh']*10,
+        'Total_Deposits': [110.97,85.45,245.80,189.23,67.89,198.76,223.45,145.67,156.34,189.45,
+                          134.56,167.89,145.23,178.90,201.34,187.56,156.78,134.90,123.45,145.67],
+        'Deposit_Target': [105.46,95.00,250.00,195.00,75.00,205.00,220.00,150.00,160.00,185.00,
+                          140.00,165.00,150.00,175.00,200.00,185.00,155.00,140.00,125.00,150.00],
+        'Advances': [232.29,156.78,412.50,289.45,98.76,356.89,389.23,245.78,267.89,345.67,
+                    245.34,298.76,256.78,312.45,378.90,334.56,278.90,245.67,234.56,267.89],
+        'Advance_Target': [218.16,175.00,425.00,295.00,110.00,365.00,395.00,255.00,270.00,340.00,
+                          250.00,295.00,260.00,310.00,375.00,330.00,275.00,250.00,235.00,270.00],
+        'NPA_Percent': [2.8,5.4,1.9,3.2,8.5,2.3,1.8,4.1,3.5,2.7,4.3,3.8,4.6,3.1,2.4,2.9,3.7,4.2,5.1,3.9],
+        'Profit_Per_Staff': [5.44,3.1,6.8,4.5,1.8,5.8,6.5,3.8,4.2,5.1,3.9,4.7,3.6,4.9,5.9,5.3,4.4,3.7,3.3,4.1],
+        'CASA_Percent': [42.3,28.5,51.2,38.7,25.4,44.7,49.3,34.9,36.8,40.2,33.5,38.1,35.7,39.4,45.6,41.8,37.2,34.3,31.9,36.5],
+        'CD_Ratio': [72.5,78.2,65.8,70.1,82.3,66.8,64.5,73.4,71.2,68.9,74.3,70.7,72.8,69.5,67.3,68.7,71.6,73.9,76.4,72.1],
+        'Business_Per_Staff': [85.2,58.3,95.7,78.9,45.6,86.7,91.2,67.8,71.4,83.5,69.2,77.6,70.3,79.8,88.4,82.1,72.9,68.5,64.7,73.2],
+        'Staff_Count': [25,18,42,35,15,38,40,27,29,34,26,31,28,32,37,36,30,27,24,29]
+    })
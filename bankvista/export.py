@@ -0,0 +1,97 @@
+"""
+Excel exports: the all-branches dashboard workbook and the ZIP of branch profiles.
+"""
+
+import io
+import os
+import tempfile
+
+from bankvista.xlsx_engine import open_workbook
+from bankvista.peers import peer_benchmarks
+from bankvista.profile import profile_frame, write_profiles_zip
+from bankvista.rollup import rollup_cube
+from bankvista.rules import narrative_table
+
+
+# ═══════════════════════════════════════════════════════════════
+# EXCEL EXPORT
+# ═══════════════════════════════════════════════════════════════
+
+def zone_rollup_rows(cube):
+    """(Zone, Region, *measures) rows: each zone's total, then its regions when the data has them"""
+    zones = cube.summary(['Zone'])
+    regions = cube.summary(['Zone', 'Region']) if 'Region' in cube.dimensions else None
+    for zone, *total in zones.itertuples():
+        yield (zone, "All", *total)
+        if regions is not None:
+            for region, *row in regions.loc[zone].itertuples():
+                yield (zone, region, *row)
+
+
+def create_excel_dashboard(df, engine=None):
+    output = io.BytesIO()
+    xl = open_workbook(output, engine)
+    
+    ws = xl.add_sheet("Dashboard")
+    ws_data = xl.add_sheet("_Data", hidden=True)
+    ws_all = xl.add_sheet("All Branches")
+    ws_review = xl.add_sheet("Branch Review")
+    ws_zones = xl.add_sheet("Zone Rollup")
+    
+    xl.append_rows(ws_data, df.itertuples(index=False),
+                   header=df.columns, header_style={'bold': True})
+    
+    xl.merge(ws, 1, 1, 1, 6, "BANKVISTA AI - DYNAMIC DASHBOARD", {
+        'bold': True, 'font_size': 14, 'font_color': "FFFFFF",
+        'bg_color': "5B4B8A", 'align': 'center', 'valign': 'vcenter'
+    })
+    xl.set_row_height(ws, 1, 30)
+    
+    xl.write(ws, 3, 1, "Select Branch:")
+    xl.write(ws, 3, 2, df.iloc[0]['Branch_Name'])
+    
+    xl.add_list_validation(ws, 'B3', f"=_Data!$B$2:$B${len(df)+1}")
+    
+    xl.append_rows(ws_all, df.itertuples(index=False),
+                   header=df.columns, header_style={'bold': True, 'bg_color': "4472C4"})
+    
+    review = narrative_table(profile_frame(df))
+    peers = peer_benchmarks(df)
+    xl.append_rows(ws_review, zip(df['Branch_ID'], df['Branch_Name'], df['Zone'], review['score'], review['grade'],
+                                  peers['peer_group'], peers['Total_Deposits_pctile'], peers['NPA_Percent_pctile'],
+                                  peers['CASA_Percent_pctile'],
+                                  review['risks'].str.join(" "), review['focus'].str.join(" "), review['remarks']),
+                   header=["Branch_ID", "Branch_Name", "Zone", "Score", "Grade", "Peer Group",
+                           "Deposits Peer Pctile", "NPA Peer Pctile", "CASA Peer Pctile",
+                           "Key Risk Drivers", "Priority Focus Areas", "Officer Remarks"],
+                   header_style={'bold': True, 'bg_color': "4472C4"})
+
+    cube = rollup_cube(df)
+    xl.append_rows(ws_zones, zone_rollup_rows(cube),
+                   header=["Zone", "Region", *cube.summary().columns],
+                   header_style={'bold': True, 'bg_color': "4472C4"})
+    
+    xl.close()
+    output.seek(0)
+    return output
+
+
+def create_profiles_zip(df, progress=None, engine=None, narratives=None, peers=None):
+    """Branch profiles for every row of df, bundled in a ZIP built in a temporary file.
+    `narratives` maps branch_id to LLM text from bankvista.narratives.narrate.
+    `peers` is bankvista.peers.peer_benchmarks output covering df's index; pass
+    the full dataset's benchmarks when df is a subset, so peers are not limited
+    to the subset.
+
+    Returns the ZIP as bytes. The archive is written to a temporary file so
+    that only the finished payload is held in memory (Streamlit keeps the
+    whole download in memory anyway); the file is removed before returning."""
+    bundle = tempfile.NamedTemporaryFile(suffix=".zip", delete=False)
+    try:
+        with bundle:
+            peers = peer_benchmarks(df) if peers is None else peers.loc[df.index]
+            write_profiles_zip(profile_frame(df), bundle, engine, progress, narratives, peers)
+        with open(bundle.name, 'rb') as reader:
+            return reader.read()
+    finally:
+        os.unlink(bundle.name)
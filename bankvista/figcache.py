@@ -0,0 +1,105 @@
+"""
+Process-wide cache of serialized plotly figures, shared by every session.
+
+    from bankvista.figcache import cached_figure
+
+    fig = cached_figure('zone', data_key, lambda: create_zone_comparison(df))
+    fig = cached_figure('heatmap', data_key, build, view='Zone', drill='All')
+
+    payload = figure_json('heatmap', data_key, build, view='Zone')   # when the size matters too
+    fig = load_figure(payload, 'heatmap')
+
+Entries are keyed on (chart kind, dataset key, parameters) and hold the
+figure's JSON, not the Figure object: JSON is immutable, so sessions can't
+change each other's charts, and its length is the size used for eviction.
+Each hit returns a fresh Figure built from that JSON.
+
+The least recently used entries are evicted once the total passes
+BANKVISTA_FIGCACHE_MB (default 64). `FIGURES.stats()` reports hits, misses,
+evictions, entries and megabytes held.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from bankvista import perf
+
+
+class FigureCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get_json(self, key, build):
+        """Serialized figure for key, calling build() for the Figure on a miss."""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+            self.misses += 1
+
+        # Build outside the lock; two sessions missing together both build once.
+        with perf.span('figcache.build', kind=key[0]):
+            payload = build().to_json()
+        self._put(key, payload)
+        return payload
+
+    def _put(self, key, payload):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = payload
+            self._bytes += len(payload)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'mb': round(self._bytes / 1e6, 2),
+            }
+
+
+FIGURES = FigureCache(int(float(os.getenv('BANKVISTA_FIGCACHE_MB', '64')) * 1e6))
+
+
+def _key(kind, data_key, params):
+    return (kind, data_key, tuple(sorted(params.items())))
+
+
+def figure_json(kind, data_key, build, **params):
+    """Cached JSON of the figure build() returns for (kind, data_key, params)"""
+    return FIGURES.get_json(_key(kind, data_key, params), build)
+
+
+def load_figure(payload, kind=None):
+    """Fresh plotly Figure from a figure_json payload"""
+    import plotly.io as pio
+
+    with perf.span('figcache.load', kind=kind):
+        return pio.from_json(payload)
+
+
+def cached_figure(kind, data_key, build, **params):
+    """Fresh plotly Figure from the cached JSON for (kind, data_key, params)"""
+    return load_figure(figure_json(kind, data_key, build, **params), kind)
@@ -0,0 +1,245 @@
+"""
+Shared gateway for LLM provider calls: concurrency limits, rate limits, retries.
+
+    from bankvista.gateway import GATEWAY
+
+    text = GATEWAY.call('groq', lambda: client.chat.completions.create(...))
+    GATEWAY.call('groq', fn, usage=lambda r: (prompt_tokens, cached_tokens, completion_tokens))
+    GATEWAY.metrics()      # per provider: in_flight, queue_wait_ms, errors, retries, ...
+
+Every provider gets
+- a semaphore that caps in-flight requests across all Streamlit sessions,
+- a token bucket that limits the request rate (requests/sec, with a burst),
+- retries on 429 / 5xx / connection errors with full-jitter exponential
+  backoff, honouring Retry-After when the provider sends it.
+
+A request that can't get a slot within `max_wait` seconds raises
+GatewayBusy instead of queueing forever, so call_ai can move on to the next
+provider. Ollama's HTTP calls go through `http_session()`, a keep-alive
+requests.Session with a connection pool. The OpenAI and Groq SDK clients
+already pool connections; they are created with max_retries=0 so only the
+gateway retries.
+
+When `usage` is given it reads token counts off each successful response.
+metrics() then reports the share of prompt tokens served from the
+provider's prompt cache (cached_ratio), and the average latency of calls
+that hit the cache against those that missed (latency_saving_pct).
+
+Limits can be overridden per provider from the environment, e.g.
+BANKVISTA_GROQ_CONCURRENCY=2, BANKVISTA_GROQ_RPS=0.5, BANKVISTA_GROQ_BURST=2.
+"""
+
+import os
+import random
+import threading
+import time
+from functools import lru_cache
+
+from bankvista import perf
+
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+# provider -> (max concurrent requests, requests/sec (0 = unlimited), burst)
+DEFAULT_LIMITS = {
+    'openai': (8, 5.0, 10),
+    'groq': (4, 0.5, 4),
+    'gemini': (4, 0.25, 2),
+    'ollama': (2, 0.0, 0),
+    'custom': (16, 0.0, 0),     # any other OpenAI-compatible endpoint (BANKVISTA_NARRATIVE_URL)
+}
+
+
+class GatewayBusy(RuntimeError):
+    """No request slot became free within the provider's max_wait."""
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline):
+        """Take one token, sleeping until one refills; False if deadline passes first."""
+        if self.rate <= 0:
+            return True
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+def status_of(exc):
+    """HTTP status behind an SDK / requests exception, if any"""
+    for obj in (exc, getattr(exc, 'response', None)):
+        code = getattr(obj, 'status_code', None) or getattr(obj, 'code', None)
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def _retry_after(exc):
+    headers = getattr(getattr(exc, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after') or headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc):
+    status = status_of(exc)
+    if status is not None:
+        return status in RETRY_STATUS
+    name = type(exc).__name__
+    return any(word in name for word in ('Timeout', 'Connection', 'RateLimit', 'Unavailable'))
+
+
+class Provider:
+    def __init__(self, name, concurrency, rps, burst, retries=3, base_delay=0.5, max_delay=8.0, max_wait=20.0):
+        self.name = name
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.bucket = TokenBucket(rps, burst)
+        self.concurrency = concurrency
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self.stats = {
+            'requests': 0, 'errors': 0, 'retries': 0, 'rejected': 0, 'in_flight': 0,
+            'max_in_flight': 0, 'queue_wait_ms': 0.0, 'max_queue_wait_ms': 0.0, 'latency_ms': 0.0,
+            'status': {}, 'metered': 0, 'prompt_tokens': 0, 'cached_tokens': 0, 'completion_tokens': 0,
+            'cache_hits': 0, 'hit_ms': 0.0, 'miss_ms': 0.0,
+        }
+
+    def _count(self, **changes):
+        with self._lock:
+            for k, v in changes.items():
+                self.stats[k] += v
+            self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.stats['in_flight'])
+
+    def backoff(self, attempt, exc):
+        hint = _retry_after(exc)
+        if hint is not None:
+            return min(hint, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class Gateway:
+    def __init__(self, limits=None):
+        self.providers = {}
+        for name, (concurrency, rps, burst) in (limits or DEFAULT_LIMITS).items():
+            env = f"BANKVISTA_{name.upper()}_"
+            self.providers[name] = Provider(
+                name,
+                int(os.getenv(env + 'CONCURRENCY', concurrency)),
+                float(os.getenv(env + 'RPS', rps)),
+                float(os.getenv(env + 'BURST', burst)),
+            )
+
+    def call(self, name, fn, usage=None, max_wait=None):
+        """Run fn() for provider `name` within its limits, retrying transient failures.
+
+        usage(result) -> (prompt_tokens, cached_tokens, completion_tokens) meters the call.
+        max_wait overrides the provider's wait for a slot and a rate-limit token."""
+        p = self.providers[name]
+        max_wait = p.max_wait if max_wait is None else max(0.0, max_wait)
+        with perf.span('llm.request', provider=name) as rec:
+            for attempt in range(p.retries + 1):
+                queued = time.monotonic()
+                deadline = queued + max_wait
+                if not p.slots.acquire(timeout=max_wait):
+                    p._count(rejected=1)
+                    raise GatewayBusy(f"{name}: no free slot within {max_wait:.0f}s")
+                try:
+                    if not p.bucket.acquire(deadline):
+                        p._count(rejected=1)
+                        raise GatewayBusy(f"{name}: rate limit queue longer than {max_wait:.0f}s")
+                    waited = (time.monotonic() - queued) * 1000
+                    p._count(requests=1, in_flight=1, queue_wait_ms=waited)
+                    with p._lock:
+                        p.stats['max_queue_wait_ms'] = max(p.stats['max_queue_wait_ms'], waited)
+                    if rec is not None:
+                        rec['queue_ms'] = round(rec.get('queue_ms', 0) + waited, 1)
+                        rec['attempts'] = attempt + 1
+                    started = time.monotonic()
+                    try:
+                        result = fn()
+                        if usage is not None:
+                            self._meter(p, usage, result, (time.monotonic() - started) * 1000, rec)
+                        return result
+                    except Exception as exc:
+                        status = status_of(exc)
+                        p._count(errors=1)
+                        with p._lock:
+                            key = str(status or type(exc).__name__)
+                            p.stats['status'][key] = p.stats['status'].get(key, 0) + 1
+                        if rec is not None:
+                            rec['status'] = status or type(exc).__name__
+                        if attempt == p.retries or not is_retryable(exc):
+                            raise
+                        delay = p.backoff(attempt, exc)
+                    finally:
+                        p._count(in_flight=-1, latency_ms=(time.monotonic() - started) * 1000)
+                finally:
+                    p.slots.release()
+                # Back off outside the slot, so other sessions can use it meanwhile.
+                p._count(retries=1)
+                time.sleep(delay)
+
+    @staticmethod
+    def _meter(p, usage, result, ms, rec):
+        try:
+            prompt, cached, completion = (int(v or 0) for v in usage(result))
+        except Exception:
+            return
+        hit = cached > 0
+        p._count(metered=1, prompt_tokens=prompt, cached_tokens=cached, completion_tokens=completion,
+                 cache_hits=int(hit), **{'hit_ms' if hit else 'miss_ms': ms})
+        if rec is not None:
+            rec['prompt_tokens'] = prompt
+            rec['cached_tokens'] = cached
+
+    def metrics(self):
+        out = {}
+        for name, p in self.providers.items():
+            with p._lock:
+                s = dict(p.stats, status=dict(p.stats['status']))
+            done = max(1, s['requests'])
+            s['avg_queue_wait_ms'] = round(s['queue_wait_ms'] / done, 1)
+            s['avg_latency_ms'] = round(s['latency_ms'] / done, 1)
+            s['concurrency'] = p.concurrency
+            misses = s['metered'] - s['cache_hits']
+            s['cached_ratio'] = round(s['cached_tokens'] / s['prompt_tokens'], 3) if s['prompt_tokens'] else None
+            s['avg_hit_ms'] = round(s['hit_ms'] / s['cache_hits'], 1) if s['cache_hits'] else None
+            s['avg_miss_ms'] = round(s['miss_ms'] / misses, 1) if misses else None
+            s['latency_saving_pct'] = (round((1 - s['avg_hit_ms'] / s['avg_miss_ms']) * 100, 1)
+                                       if s['avg_hit_ms'] and s['avg_miss_ms'] else None)
+            out[name] = s
+        return out
+
+
+GATEWAY = Gateway()
+
+
+@lru_cache(maxsize=None)
+def http_session(pool_size=16):
+    """Process-wide keep-alive requests.Session (used for Ollama)"""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
@@ -0,0 +1,117 @@
+"""
+Conversation memory for the AI chat, bounded by a token budget.
+
+    from bankvista.memory import ChatMemory
+
+    memory = ChatMemory(budget=1200, keep_turns=3)
+    call_ai(query, df, history=memory.messages())
+    memory.add(query, answer)
+    memory.tokens()        # estimated tokens the history adds to the next prompt
+
+The last `keep_turns` exchanges are sent verbatim (long answers clipped to
+their share of the budget). Older exchanges are rolled into a summary of
+one line per turn: the question and the first line of its answer. When the
+summary outgrows its share of the budget, its oldest lines are dropped. The
+history sent with a question therefore never exceeds `budget` tokens,
+however long the session runs.
+
+Tokens are estimated at ~4 characters each; providers report the real
+counts through bankvista.gateway.
+"""
+
+import os
+import re
+
+DEFAULT_BUDGET = int(os.getenv('BANKVISTA_CHAT_MEMORY_TOKENS', 1200))
+DEFAULT_KEEP_TURNS = int(os.getenv('BANKVISTA_CHAT_MEMORY_TURNS', 3))
+SUMMARY_SHARE = 0.35
+SUMMARY_HEADER = "Summary of earlier questions in this conversation:"
+
+
+def estimate_tokens(text):
+    return len(text or "") // 4 + 1
+
+
+def clip(text, tokens):
+    """text cut to about `tokens` tokens, on a word boundary"""
+    limit = tokens * 4
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(' ', 1)[0] + " …"
+
+
+def _gist(text, chars=160):
+    for line in (text or "").splitlines():
+        line = re.sub(r"[*_#`>|]+", "", line).strip(" -•\t")
+        if len(line) > 3:
+            return line[:chars]
+    return ""
+
+
+def summarize_turn(user, assistant):
+    """One summary line per exchange: the question and the gist of the answer"""
+    return f"- Q: {user.strip()[:120]} → {_gist(assistant)}"
+
+
+class ChatMemory:
+    def __init__(self, budget=None, keep_turns=None, summarizer=None):
+        self.budget = budget or DEFAULT_BUDGET
+        self.keep_turns = max(1, keep_turns or DEFAULT_KEEP_TURNS)
+        self.summarizer = summarizer or summarize_turn
+        self.turns = []             # recent (user, assistant) pairs, verbatim
+        self.summary = []           # one line per older turn
+        self.summarized = 0         # turns rolled into the summary
+        self.forgotten = 0          # summary lines dropped for the budget
+
+    @property
+    def summary_budget(self):
+        return int(self.budget * SUMMARY_SHARE)
+
+    @property
+    def turn_budget(self):
+        """Tokens each verbatim turn may use"""
+        return (self.budget - self.summary_budget) // self.keep_turns
+
+    def add(self, user, assistant):
+        self.turns.append((user, assistant))
+        while len(self.turns) > self.keep_turns:
+            self.summary.append(self.summarizer(*self.turns.pop(0)))
+            self.summarized += 1
+        while self.summary and estimate_tokens("\n".join([SUMMARY_HEADER, *self.summary])) > self.summary_budget:
+            self.summary.pop(0)
+            self.forgotten += 1
+
+    def clear(self):
+        self.__init__(self.budget, self.keep_turns, self.summarizer)
+
+    def messages(self):
+        """History as chat messages: the rolling summary, then the recent turns"""
+        out = []
+        if self.summary:
+            out.append({"role": "system", "content": "\n".join([SUMMARY_HEADER, *self.summary])})
+        per_turn = self.turn_budget
+        for user, assistant in self.turns:
+            user = clip(user, per_turn // 4)
+            out.append({"role": "user", "content": user})
+            out.append({"role": "assistant", "content": clip(assistant, per_turn - estimate_tokens(user))})
+        return out
+
+    def tokens(self):
+        return sum(estimate_tokens(m["content"]) for m in self.messages())
+
+    def stats(self):
+        return {
+            'recent_turns': len(self.turns),
+            'summarized_turns': self.summarized,
+            'forgotten_turns': self.forgotten,
+            'tokens': self.tokens(),
+            'budget': self.budget,
+        }
+
+
+def transcript(history):
+    """History messages as plain text, for single-prompt providers"""
+    if not history:
+        return ""
+    names = {"system": "", "user": "User: ", "assistant": "Assistant: "}
+    return "CONVERSATION SO FAR:\n" + "\n".join(names[m["role"]] + m["content"] for m in history)
@@ -0,0 +1,318 @@
+"""
+LLM-written key takeaways and executive summaries for batches of branch profiles.
+
+    from bankvista.narratives import Endpoint, narrate
+
+    narratives, stats = narrate(profile_frame(df), cache_path='generated/narratives.jsonl')
+    write_profiles_zip(profiles, target, narratives=narratives)
+
+    python -m bankvista.narratives --data branches.csv --cache generated/narratives.jsonl
+    python -m bankvista.narratives --stub --port 8765      # local OpenAI-compatible stub
+
+Requests go to any OpenAI-compatible /chat/completions endpoint (OpenAI,
+Groq, Ollama's /v1, or the stub) through bankvista.gateway, under the same
+provider limits as the chat: its semaphore sets how many branches are in
+flight, its token bucket the request rate, and it retries 429 / 5xx with
+jittered backoff (honouring Retry-After). Endpoints set through
+BANKVISTA_NARRATIVE_URL use the gateway's 'custom' provider. Each branch:
+- is looked up first in a JSON-lines cache keyed on a hash of its input row
+  (plus prompt version and model), so unchanged branches are never re-asked;
+- gets a per-branch `timeout` covering its queueing, request and retries;
+- falls back to the template text (bankvista.rules.narrative_table, built
+  once for the batch) when the call times out, fails or returns
+  something unusable.
+Every LLM answer is appended to the cache as it arrives, so the cache is
+also the checkpoint: an interrupted run resumes where it stopped. Template
+fallbacks are not cached, so the next run retries them.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import numbers
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bankvista.gateway import GATEWAY, GatewayBusy, http_session, status_of
+from bankvista.rules import narrative_table
+
+PROMPT_VERSION = 1
+INPUT_FIELDS = ['branch_id', 'branch_name', 'zone', 'city', 'npa_%', 'total_deposits_cr',
+                'deposit_target__cr_', 'advancescr', 'advance_target', 'profit_per_staff', 'staff_strength']
+
+SYSTEM_PROMPT = (
+    "You are a banking analyst writing the narrative section of a one-page branch profile. "
+    "Be factual, calm and specific to the numbers given. Reply with JSON only: "
+    '{"takeaways": [four short sentences], "summary": "one paragraph of 60-90 words"}.'
+)
+
+
+class Endpoint:
+    """An OpenAI-compatible chat completions endpoint"""
+
+    def __init__(self, base_url, model, api_key=None, provider='custom'):
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.api_key = api_key
+        self.provider = provider        # bankvista.gateway provider whose limits apply
+
+    @classmethod
+    def from_env(cls):
+        """BANKVISTA_NARRATIVE_URL / _MODEL / _KEY, else Groq, OpenAI or local Ollama by available keys"""
+        url = os.getenv('BANKVISTA_NARRATIVE_URL')
+        if url:
+            return cls(url, os.getenv('BANKVISTA_NARRATIVE_MODEL', 'stub'), os.getenv('BANKVISTA_NARRATIVE_KEY'))
+        if os.getenv('GROQ_API_KEY'):
+            return cls('https://api.groq.com/openai/v1', 'llama-3.3-70b-versatile', os.getenv('GROQ_API_KEY'), 'groq')
+        if os.getenv('OPENAI_API_KEY'):
+            return cls('https://api.openai.com/v1', 'gpt-4o-mini', os.getenv('OPENAI_API_KEY'), 'openai')
+        return cls('http://localhost:11434/v1', 'llama3.2', provider='ollama')
+
+
+# ═══════════════════════════════════════════════════════════════
+# CACHE / CHECKPOINT
+# ═══════════════════════════════════════════════════════════════
+
+def row_hash(b, model):
+    """Stable key of a branch's narrative inputs"""
+    values = {f: (round(float(b[f]), 4) if isinstance(b[f], numbers.Number) else str(b[f]))
+              for f in INPUT_FIELDS if f in b.index}
+    payload = json.dumps([PROMPT_VERSION, model, values], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=12).hexdigest()
+
+
+class NarrativeStore:
+    """Append-only JSON-lines cache of LLM narratives keyed on row hash"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                        self.entries[rec['key']] = rec
+                    except (ValueError, KeyError):
+                        continue            # torn last line from an interrupted run
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, rec):
+        self.entries[rec['key']] = rec
+        if not self.path:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + '\n')
+
+
+# ═══════════════════════════════════════════════════════════════
+# PROMPT / PARSING
+# ═══════════════════════════════════════════════════════════════
+
+def template_narrative(rules):
+    """Fallback narrative from a branch's narrative_table row"""
+    return {'takeaways': rules['takeaways'], 'summary': rules['summary'], 'source': 'template'}
+
+
+def build_prompt(b):
+    return (
+        f"Branch {b.branch_id} ({b.branch_name}), {b.city}, {b.zone} zone.\n"
+        f"Deposits: {b.total_deposits_cr:.2f} Cr vs target {b.deposit_target__cr_:.2f} Cr.\n"
+        f"Advances: {b.advancescr:.2f} Cr vs target {b.advance_target:.2f} Cr.\n"
+        f"NPA: {b['npa_%']:.2f}% (healthy below 3%, stressed above 6%).\n"
+        f"Profit per staff: {b.profit_per_staff:.2f} Cr (benchmark 5 Cr), staff: {b.staff_strength}.\n"
+        f"Write the key takeaways and executive summary."
+    )
+
+
+def parse_narrative(text):
+    """{'takeaways', 'summary'} from a model reply; ValueError if unusable"""
+    match = re.search(r"\{.*\}", text or "", re.S)
+    if not match:
+        raise ValueError("no JSON object in reply")
+    data = json.loads(match.group(0))
+    takeaways = [str(t).strip() for t in data.get('takeaways', []) if str(t).strip()][:4]
+    summary = str(data.get('summary', '')).strip()
+    if len(takeaways) < 2 or len(summary) < 40:
+        raise ValueError("reply is missing takeaways or summary")
+    return {'takeaways': takeaways, 'summary': summary}
+
+
+# ═══════════════════════════════════════════════════════════════
+# ASYNC STAGE
+# ═══════════════════════════════════════════════════════════════
+
+class BranchDeadline(Exception):
+    """The branch's time budget ran out before a request could start."""
+
+
+def _ask(endpoint, b, timeout, pool_size):
+    """One branch's narrative through the gateway, within `timeout` seconds in total"""
+    deadline = time.monotonic() + timeout
+    headers = {'Authorization': f"Bearer {endpoint.api_key}"} if endpoint.api_key else {}
+    body = {
+        'model': endpoint.model,
+        'messages': [{'role': 'system', 'content': SYSTEM_PROMPT}, {'role': 'user', 'content': build_prompt(b)}],
+        'temperature': 0.4,
+        'max_tokens': 400,
+    }
+
+    def post():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise BranchDeadline(f"{timeout:.0f}s budget spent")
+        r = http_session(pool_size).post(f"{endpoint.base_url}/chat/completions", json=body,
+                                         headers=headers, timeout=remaining)
+        r.raise_for_status()
+        return r
+
+    r = GATEWAY.call(endpoint.provider, post, max_wait=deadline - time.monotonic())
+    return parse_narrative(r.json()['choices'][0]['message']['content'])
+
+
+def _reason(exc):
+    if isinstance(exc, (BranchDeadline, GatewayBusy)) or 'Timeout' in type(exc).__name__:
+        return 'timeout'
+    return str(status_of(exc) or type(exc).__name__)
+
+
+async def generate_narratives(profiles, endpoint, store, timeout=30.0, progress=None):
+    """{branch_id: narrative} for every row of profiles, plus run stats. Branches
+    are handed to the gateway as fast as its provider concurrency allows."""
+    stats = {'cached': 0, 'llm': 0, 'fallback': 0, 'errors': {}}
+    results = {}
+    templates = narrative_table(profiles).to_dict('records')
+    total, done = len(profiles), 0
+    workers = GATEWAY.providers[endpoint.provider].concurrency
+    loop = asyncio.get_running_loop()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='narratives') as pool:
+        async def one(b, rules):
+            nonlocal done
+            key = row_hash(b, endpoint.model)
+            cached = store.get(key)
+            if cached:
+                stats['cached'] += 1
+                results[b.branch_id] = {**cached, 'source': 'cache'}
+            else:
+                try:
+                    narrative = await loop.run_in_executor(pool, _ask, endpoint, b, timeout, max(16, workers))
+                    rec = {'key': key, 'branch_id': str(b.branch_id), **narrative, 'source': 'llm'}
+                    store.put(rec)
+                    stats['llm'] += 1
+                    results[b.branch_id] = rec
+                except Exception as exc:
+                    reason = _reason(exc)
+                    stats['errors'][reason] = stats['errors'].get(reason, 0) + 1
+                    stats['fallback'] += 1
+                    results[b.branch_id] = template_narrative(rules)
+            done += 1
+            if progress:
+                progress(done, total)
+
+        await asyncio.gather(*(one(b, rules) for (_, b), rules in zip(profiles.iterrows(), templates)))
+    return results, stats
+
+
+def narrate(profiles, cache_path=None, endpoint=None, timeout=30.0, progress=None):
+    """Synchronous wrapper around generate_narratives; returns (narratives, stats)"""
+    endpoint = endpoint or Endpoint.from_env()
+    store = NarrativeStore(cache_path)
+    start = time.perf_counter()
+    results, stats = asyncio.run(generate_narratives(profiles, endpoint, store, timeout, progress))
+    stats['seconds'] = round(time.perf_counter() - start, 2)
+    stats['branches_per_s'] = round(len(profiles) / stats['seconds'], 1) if stats['seconds'] else None
+    return results, stats
+
+
+# ═══════════════════════════════════════════════════════════════
+# STUB SERVER (for tests and load runs without a provider)
+# ═══════════════════════════════════════════════════════════════
+
+def serve_stub(port=8765, latency=0.5, fail_rate=0.0, slow_rate=0.0, slow_s=60.0):
+    """
+    OpenAI-compatible /v1/chat/completions stub. Each request sleeps `latency`
+    seconds; `fail_rate` of them answer 429 and `slow_rate` hang for `slow_s`
+    (to exercise retries and timeouts).
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            roll = random.random()
+            if roll < fail_rate:
+                self.send_response(429)
+                self.send_header('Retry-After', '0.2')
+                self.end_headers()
+                return
+            time.sleep(slow_s if roll < fail_rate + slow_rate else latency)
+            prompt = body.get('messages', [{}])[-1].get('content', '')
+            branch = prompt.split(' ', 2)[1] if prompt.startswith('Branch ') else 'the branch'
+            content = json.dumps({
+                'takeaways': [f"{branch}: deposits tracked against target.", "Advances reviewed against plan.",
+                              "Asset quality assessed from the NPA ratio.", "Staff productivity benchmarked."],
+                'summary': f"Stub narrative for {branch}. " + "The branch metrics were reviewed in full. " * 3,
+            })
+            payload = json.dumps({'choices': [{'message': {'role': 'assistant', 'content': content}}]}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate LLM narratives for branch profiles.")
+    parser.add_argument('--data', help="branch file in the app's upload schema (csv / xlsx / parquet)")
+    parser.add_argument('--cache', default=os.path.join('generated', 'narratives.jsonl'))
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--stub', action='store_true', help="run the local stub server instead")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    if args.stub:
+        server = serve_stub(args.port, args.latency, args.fail_rate)
+        print(f"Stub listening on http://127.0.0.1:{args.port}/v1 (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    if not args.data:
+        parser.error("--data is required (or use --stub)")
+    from bankvista.ingest import read_table
+    from bankvista.profile import profile_frame
+
+    with open(args.data, 'rb') as f:
+        profiles = profile_frame(read_table(args.data, f.read()))
+    _, stats = narrate(profiles, args.cache, timeout=args.timeout,
+                       progress=lambda d, t: print(f"\r{d}/{t}", end='', flush=True))
+    print(f"\n✅ {len(profiles)} narratives: {stats['llm']} new, {stats['cached']} cached, "
+          f"{stats['fallback']} template fallbacks in {stats['seconds']}s ({stats['branches_per_s']}/s) → {args.cache}")
+    if stats['errors']:
+        print(f"   fallback reasons: {stats['errors']}")
+
+
+if __name__ == '__main__':
+    main()
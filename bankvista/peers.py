@@ -0,0 +1,178 @@
+"""
+Peer-group benchmarking: percentile ranks and gaps to the peer median.
+
+    from bankvista.peers import peer_benchmarks, peer_phrase
+
+    bench = peer_benchmarks(df, key)                    # cached per dataset
+    bench.loc[i, 'NPA_Percent_pctile']                  # 0-100, higher is better
+    peer_phrase(bench.loc[i], 'Total_Deposits')         # "82nd percentile among 140 peers"
+
+Two ways to pick peers:
+- 'zone_size' (default): same zone and deposit size band (Small / Mid /
+  Large by org-wide terciles). Groups with fewer than MIN_PEERS branches
+  fall back to the size band across all zones.
+- 'knn': the k nearest branches on standardized log deposits, staff count
+  and business per staff. This needs an n x k neighbour table and a chunked
+  distance scan (blocks of rows sized to KNN_CHUNK_BYTES), so it is limited
+  to KNN_MAX_ROWS branches.
+
+Percentiles are oriented so that higher is better for every metric (NPA is
+ranked low-to-high). Gaps are raw differences to the peer median, in the
+metric's own units. Everything is computed with grouped pandas / NumPy
+operations, once per dataset and method.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from bankvista.query import LOWER_IS_BETTER, format_metric, metric_label, metric_values
+
+PEER_METRICS = ['Total_Deposits', 'Advances', 'Deposit_Achievement', 'NPA_Percent', 'CASA_Percent',
+                'CD_Ratio', 'Profit_Per_Staff', 'Business_Per_Staff']
+SIZE_BANDS = ['Small', 'Mid', 'Large']
+MIN_PEERS = 5
+KNN_FEATURES = ['Total_Deposits', 'Staff_Count', 'Business_Per_Staff']
+KNN_MAX_ROWS = 20_000
+KNN_CHUNK_BYTES = 64 * 2**20      # memory for one block of the distance scan
+
+
+def ordinal(n):
+    n = int(n)
+    suffix = 'th' if 10 <= n % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+    return f"{n}{suffix}"
+
+
+# ═══════════════════════════════════════════════════════════════
+# PEER GROUPS
+# ═══════════════════════════════════════════════════════════════
+
+def zone_size_groups(df):
+    """Peer group label per branch: '<Zone> · <band>', or 'All zones · <band>' for small groups"""
+    ranks = df['Total_Deposits'].rank(method='first')
+    band = pd.qcut(ranks, len(SIZE_BANDS), labels=SIZE_BANDS).astype(str) if len(df) >= len(SIZE_BANDS) \
+        else pd.Series(SIZE_BANDS[1], index=df.index)
+    group = df['Zone'].astype(str) + ' · ' + band
+    small = group.map(group.value_counts()) < MIN_PEERS
+    return group.where(~small, 'All zones · ' + band)
+
+
+def knn_neighbours(df, k=50):
+    """(n, k) positions of each branch's k nearest peers (itself excluded)"""
+    n = len(df)
+    if n > KNN_MAX_ROWS:
+        raise ValueError(f"knn peers are limited to {KNN_MAX_ROWS:,} branches (got {n:,})")
+    k = max(1, min(k, n - 1))
+    x = df[KNN_FEATURES].to_numpy(dtype=float)
+    x[:, 0] = np.log1p(np.clip(x[:, 0], 0, None))
+    x = (x - np.nanmean(x, axis=0)) / (np.nanstd(x, axis=0) + 1e-9)
+    x = np.nan_to_num(x)
+    sq = (x * x).sum(axis=1)
+    out = np.empty((n, k), dtype=np.int64)
+    # a block holds its float64 distances and argpartition's int64 positions
+    rows = max(1, KNN_CHUNK_BYTES // (16 * n))
+    for start in range(0, n, rows):
+        block = x[start:start + rows]
+        dist = block @ x.T
+        dist *= -2
+        dist += sq[None, :]
+        dist += sq[start:start + len(block), None]
+        dist[np.arange(len(block)), np.arange(start, start + len(block))] = np.inf
+        out[start:start + len(block)] = np.argpartition(dist, k - 1, axis=1)[:, :k]
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════
+# BENCHMARKS
+# ═══════════════════════════════════════════════════════════════
+
+def compute_benchmarks(df, method='zone_size', k=50, metrics=None):
+    """
+    One row per branch (index matches df): peer_group, peers, and per metric
+    <m>_pctile (0-100, higher is better), <m>_peer_median and <m>_gap.
+    """
+    metrics = [m for m in (metrics or PEER_METRICS)
+               if m in df.columns or (m == 'Deposit_Achievement' and 'Deposit_Target' in df.columns)]
+    values = {m: metric_values(df, m) for m in metrics}
+    out = {}
+
+    if method == 'knn':
+        nbrs = knn_neighbours(df, k)
+        out['peer_group'] = np.full(len(df), f"{nbrs.shape[1]} nearest")
+        out['peers'] = np.full(len(df), nbrs.shape[1])
+        for m, v in values.items():
+            peer_v = v[nbrs]
+            # peers this branch beats: those above it where lower is better
+            beaten = (peer_v > v[:, None]) if m in LOWER_IS_BETTER else (peer_v < v[:, None])
+            ties = (peer_v == v[:, None]).sum(axis=1)
+            pct = (beaten.sum(axis=1) + 0.5 * ties) / nbrs.shape[1] * 100
+            out[f'{m}_pctile'] = np.round(pct, 1)
+            out[f'{m}_peer_median'] = np.nanmedian(peer_v, axis=1)
+            out[f'{m}_gap'] = v - out[f'{m}_peer_median']
+    elif method == 'zone_size':
+        group = zone_size_groups(df)
+        frame = pd.DataFrame(values, index=df.index)
+        grouped = frame.groupby(group.to_numpy())
+        out['peer_group'] = group.to_numpy()
+        out['peers'] = group.map(group.value_counts()).to_numpy() - 1
+        # rank lower-is-better metrics descending, so the best branch gets 100 either way
+        ranks = {m: grouped[m].rank(pct=True, ascending=m not in LOWER_IS_BETTER) for m in metrics}
+        medians = grouped.transform('median')
+        for m in metrics:
+            out[f'{m}_pctile'] = np.round(ranks[m].to_numpy() * 100, 1)
+            out[f'{m}_peer_median'] = medians[m].to_numpy()
+            out[f'{m}_gap'] = values[m] - out[f'{m}_peer_median']
+    else:
+        raise ValueError(f"Unknown peer method '{method}' (expected 'zone_size' or 'knn')")
+
+    return pd.DataFrame(out, index=df.index)
+
+
+_CACHE = OrderedDict()
+_MAX_CACHED = 8
+_lock = threading.Lock()
+
+
+def peer_benchmarks(df, key=None, method='zone_size', k=50):
+    """compute_benchmarks, cached per (dataset key, method, k)"""
+    if key is None:
+        from bankvista.data import dataset_key
+        key = dataset_key(df)
+    cache_key = (key, method, k if method == 'knn' else None)
+    with _lock:
+        bench = _CACHE.get(cache_key)
+        if bench is not None:
+            _CACHE.move_to_end(cache_key)
+            return bench
+    bench = compute_benchmarks(df, method, k)
+    with _lock:
+        _CACHE[cache_key] = bench
+        while len(_CACHE) > _MAX_CACHED:
+            _CACHE.popitem(last=False)
+    return bench
+
+
+# ═══════════════════════════════════════════════════════════════
+# PRESENTATION
+# ═══════════════════════════════════════════════════════════════
+
+def peer_phrase(row, metric):
+    """'82nd percentile among 140 peers' for one benchmarks row"""
+    pct = row[f'{metric}_pctile']
+    if pct != pct:
+        return "no peer data"
+    return f"{ordinal(max(1, round(pct)))} percentile among {int(row['peers'])} peers"
+
+
+def peer_table(row, metrics=None):
+    """Metric / value / peer median / gap / standing rows for one branch"""
+    metrics = [m for m in (metrics or PEER_METRICS) if f'{m}_pctile' in row.index]
+    return pd.DataFrame({
+        'Metric': [metric_label(m) for m in metrics],
+        'Value': [format_metric(m, row[f'{m}_peer_median'] + row[f'{m}_gap']) for m in metrics],
+        'Peer median': [format_metric(m, row[f'{m}_peer_median']) for m in metrics],
+        'Gap': [format_metric(m, row[f'{m}_gap']) for m in metrics],
+        'Standing': [peer_phrase(row, m) for m in metrics],
+    })
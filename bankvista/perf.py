@@ -0,0 +1,130 @@
+"""
+Lightweight timing spans for app reruns.
+
+    from bankvista import perf
+
+    perf.begin_run(session=session_id)
+    with perf.span('tab.dashboard'):
+        with perf.span('heatmap', rows=len(df)):
+            ...
+    spans = perf.end_run()         # also appended to the JSON-lines log
+
+Spans nest; each records its name, duration, depth and any keyword
+attributes, plus the exception type when one escapes. The current run is
+held in a ContextVar, so concurrent Streamlit sessions (one script thread
+each) never see each other's spans.
+
+Environment:
+- BANKVISTA_PERF=0      disables everything; `span` returns a shared no-op
+                        context manager, and begin/end_run return at once.
+- BANKVISTA_PERF_LOG    JSON-lines log path (default logs/perf.jsonl; empty
+                        string disables the file but keeps the panel).
+"""
+
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+ENABLED = os.getenv('BANKVISTA_PERF', '1').lower() not in ('0', 'false', 'off', 'no')
+LOG_PATH = os.getenv('BANKVISTA_PERF_LOG', os.path.join('logs', 'perf.jsonl'))
+
+_NOOP = contextlib.nullcontext()
+_run = contextvars.ContextVar('bankvista_perf_run', default=None)
+_log_lock = threading.Lock()
+
+
+def new_id():
+    return uuid.uuid4().hex[:12]
+
+
+class _Run:
+    def __init__(self, attrs):
+        self.id = new_id()
+        self.attrs = attrs
+        self.spans = []
+        self.depth = 0
+        self.start = time.perf_counter()
+
+
+class _Span:
+    __slots__ = ('name', 'attrs', 'run', 'start', 'record')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.run = _run.get()
+        self.record = {'name': self.name, 'depth': 0, **self.attrs}
+        if self.run is not None:
+            self.record['depth'] = self.run.depth
+            self.run.depth += 1
+            # Reserve the slot now so parents are listed before their children.
+            self.run.spans.append(self.record)
+        self.start = time.perf_counter()
+        return self.record
+
+    def __exit__(self, exc_type, exc, tb):
+        self.record['ms'] = round((time.perf_counter() - self.start) * 1000, 3)
+        if exc_type is not None:
+            self.record['error'] = exc_type.__name__
+        if self.run is not None:
+            self.run.depth -= 1
+        return False
+
+
+def span(name, **attrs):
+    """Time a block; yields the span record (or None when disabled) for extra attributes."""
+    if not ENABLED:
+        return _NOOP
+    return _Span(name, attrs)
+
+
+def begin_run(**attrs):
+    """Start collecting spans for one rerun in the current context."""
+    if ENABLED:
+        _run.set(_Run(attrs))
+
+
+def in_run():
+    return ENABLED and _run.get() is not None
+
+
+def current_spans():
+    run = _run.get() if ENABLED else None
+    return list(run.spans) if run else []
+
+
+def end_run():
+    """Finish the current run, append its spans to the log and return them."""
+    if not ENABLED:
+        return []
+    run = _run.get()
+    if run is None:
+        return []
+    _run.set(None)
+    total_ms = round((time.perf_counter() - run.start) * 1000, 3)
+    spans = run.spans + [{'name': 'run.total', 'depth': 0, 'ms': total_ms}]
+    if LOG_PATH:
+        _write_log(run, spans)
+    return spans
+
+
+def _write_log(run, spans):
+    ts = datetime.now().isoformat(timespec='milliseconds')
+    lines = ''.join(
+        json.dumps({'ts': ts, 'run': run.id, **run.attrs, **s}, default=str) + '\n'
+        for s in spans
+    )
+    try:
+        with _log_lock:
+            os.makedirs(os.path.dirname(LOG_PATH) or '.', exist_ok=True)
+            with open(LOG_PATH, 'a', encoding='utf-8') as f:
+                f.write(lines)
+    except OSError:
+        pass
@@ -0,0 +1,367 @@
+"""
+One-page branch profile workbook, rendered through `bankvista.xlsx_engine`.
+"""
+
+import zipfile
+from datetime import date
+
+import pandas as pd
+
+from bankvista.peers import peer_table
+from bankvista.rules import branch_rules, narrative_table
+from bankvista.xlsx_engine import open_workbook
+
+green = "C6EFCE"
+amber = "FFEB9C"
+orange = "F4B084"
+red = "FFC7CE"
+
+def colour_achievement(value):
+    if value >= 100:
+        return green
+    elif value >= 90:
+        return amber
+    else:
+        return red
+
+def colour_gap(value):
+    if value <= 0:          # surplus
+        return green
+    elif value <= 100:
+        return amber
+    else:
+        return red
+
+def colour_grade(grade):
+    return green if grade == "A" else amber if grade == "B" else orange if grade == "C" else red
+
+def kpi_status(actual, target, reverse=False):
+    if reverse:  # for NPA
+        if actual <= target:
+            return "Good", green
+        elif actual <= target * 2:
+            return "Moderate", amber
+        else:
+            return "High Risk", red
+    else:
+        if actual >= target:
+            return "Ahead", green
+        elif actual >= target * 0.9:
+            return "Slight Lag", amber
+        else:
+            return "Behind", red
+
+def flag(actual, target):
+    if actual >= target:
+        return "Ahead of Target", green
+    elif actual >= target * 0.9:
+        return "Slightly Behind", amber
+    else:
+        return "Needs Immediate Attention", red
+
+
+# ---------------- STYLES ----------------
+BORDER = {"border": 1}
+BOLD = {"bold": True, "border": 1}
+SECTION = {"bold": True, "font_size": 12, "align": "center", "bg_color": "D9E1F2", "border": 1}
+HEADER = {"bold": True, "align": "center", "bg_color": "BDD7EE", "border": 1}
+WRAP = {"text_wrap": True, "border": 1}
+
+
+def fill(colour, **style):
+    return {"border": 1, "bg_color": colour, **style}
+
+
+def render_branch_profile(b, target, engine=None, narrative=None, rules=None, peers=None):
+    """Render the one-page profile of branch row `b` into `target` (path or file object).
+
+    `narrative` ({'takeaways', 'summary'}, see bankvista.narratives) replaces the
+    template takeaways and executive summary when given. `rules` is b's row of
+    bankvista.rules.narrative_table; it is computed for b alone when omitted.
+    `peers` (b's row of bankvista.peers.peer_benchmarks) adds a peer benchmarks section."""
+    rules = rules or branch_rules(b)
+    xl = open_workbook(target, engine)
+    ws = xl.add_sheet("Branch Profile")
+
+    def section_title(row, text):
+        xl.merge(ws, row, 1, row, 8, text, SECTION)
+
+    def line(row, text, style=BORDER):
+        xl.merge(ws, row, 1, row, 8, text, style)
+
+    def label(row, col, text):
+        xl.write(ws, row, col, text, BOLD)
+
+    def value(row, col, val, style=BORDER):
+        xl.write(ws, row, col, val, style)
+
+    def table_header(row, headers):
+        for i, h in enumerate(headers):
+            xl.write(ws, row, 1 + i, h, HEADER)
+
+    # ---------------- HEADER ----------------
+    branch_score = rules["score"]
+    grade, grade_remark = rules["grade"], rules["grade_remark"]
+    grade_fill = colour_grade(grade)
+
+    xl.merge(ws, 1, 1, 1, 8, "BANK OF INDIA", {"font_size": 16, "bold": True, "align": "center"})
+    xl.merge(ws, 2, 1, 2, 8, f"BRANCH PROFILE AS ON : {date.today().strftime('%d-%b-%Y')}",
+             {"align": "center"})
+
+    # ---------------- STATUS STRIP ----------------
+    status_style = fill(grade_fill, bold=True, align="center", valign="vcenter")
+    value(3, 1, f"Branch Code: {b.branch_id}        Overall Grade: {grade}  |  Score: {branch_score}/100",
+          status_style)
+    value(3, 2, b.branch_id)
+    xl.merge(ws, 3, 4, 3, 8, f"Overall Grade: {grade}   |   Score: {branch_score}/100", status_style)
+
+    # ---------------- KEY TAKEAWAYS ----------------
+    section_title(5, "KEY TAKEAWAYS")
+
+    kt_row = 7
+    takeaways = narrative['takeaways'] if narrative else rules["takeaways"]
+    summary = narrative['summary'] if narrative else rules["summary"]
+    for point in takeaways:
+        line(kt_row, f"• {point}", WRAP)
+        kt_row += 1
+
+    # ---------------- EXECUTIVE SUMMARY ----------------
+    EXEC_SUMMARY_ROW = kt_row + 1
+
+    section_title(EXEC_SUMMARY_ROW, "EXECUTIVE SUMMARY")
+    xl.merge(ws, EXEC_SUMMARY_ROW + 2, 1, EXEC_SUMMARY_ROW + 5, 8, summary,
+             {"text_wrap": True, "valign": "top", "border": 1})
+
+    # ---------------- BRANCH DETAILS ----------------
+    BRANCH_START_ROW = EXEC_SUMMARY_ROW + 6
+
+    section_title(BRANCH_START_ROW, "BRANCH DETAILS")
+
+    label(BRANCH_START_ROW + 2, 1, "Branch ID")
+    value(BRANCH_START_ROW + 2, 2, b.branch_id)
+
+    label(BRANCH_START_ROW + 2, 3, "Branch Name")
+    value(BRANCH_START_ROW + 2, 4, b.branch_name)
+
+    label(BRANCH_START_ROW + 3, 1, "Zone")
+    value(BRANCH_START_ROW + 3, 2, b.zone)
+
+    label(BRANCH_START_ROW + 3, 3, "City")
+    value(BRANCH_START_ROW + 3, 4, b.city)
+
+    risk_fill = green if b.risk_flag == "Healthy" else amber if b.risk_flag == "Watch" else red
+    label(BRANCH_START_ROW + 4, 1, "Risk Category")
+    value(BRANCH_START_ROW + 4, 2, b.risk_flag, fill(risk_fill))
+
+    label(BRANCH_START_ROW + 4, 3, "NPA %")
+    value(BRANCH_START_ROW + 4, 4, round(b["npa_%"], 2))
+
+    # ---------------- KPI SCORECARD & RATING ----------------
+    KPI_ROW = BRANCH_START_ROW + 7
+
+    section_title(KPI_ROW, "BRANCH KPI SCORECARD & RATING")
+
+    scorecard_row = KPI_ROW + 2
+    table_header(scorecard_row, ["KPI", "Actual", "Target / Benchmark", "Status"])
+    scorecard_row += 1
+
+    kpis = [
+        ("Deposits (₹ Cr)", b.total_deposits_cr, b.deposit_target__cr_, False),
+        ("Advances (₹ Cr)", b.advancescr, b.advance_target, False),
+        ("NPA %", round(b["npa_%"], 2), 3, True),
+        ("Profit / Staff", round(b.profit_per_staff, 2), 5, False),
+    ]
+
+    for name, actual, target_value, reverse in kpis:
+        status, status_fill = kpi_status(actual, target_value, reverse)
+        value(scorecard_row, 1, name)
+        value(scorecard_row, 2, actual)
+        value(scorecard_row, 3, target_value)
+        value(scorecard_row, 4, status, fill(status_fill))
+        scorecard_row += 1
+
+    # ---- KPI RESULT ROW ----
+    xl.merge(ws, scorecard_row, 1, scorecard_row, 2, f"OVERALL KPI SCORE : {branch_score}/100",
+             fill(grade_fill, bold=True))
+    xl.merge(ws, scorecard_row, 3, scorecard_row, 4, f"GRADE : {grade} – {grade_remark}",
+             fill(grade_fill, text_wrap=True))
+
+    # ---------------- KEY RISK DRIVERS & FOCUS AREAS ----------------
+    risk_row = scorecard_row + 2
+
+    section_title(risk_row, "KEY RISK DRIVERS & PRIORITY FOCUS AREAS")
+
+    risks, focus_areas = rules["risks"], rules["focus"]
+
+    line(risk_row + 2, "🔴 KEY RISK DRIVERS", BOLD)
+
+    row_ptr = risk_row + 3
+    for risk in risks:
+        line(row_ptr, f"• {risk}")
+        row_ptr += 1
+
+    line(row_ptr + 1, "🟢 PRIORITY FOCUS AREAS (Next 90 Days)", BOLD)
+
+    row_ptr += 2
+    for area in focus_areas:
+        line(row_ptr, f"• {area}")
+        row_ptr += 1
+
+    # ---------------- DEPOSITS (TABULAR MOCK) ----------------
+    row = row_ptr + 1
+    section_title(row, "DEPOSITS POSITION (₹ Crores)")
+    row += 2
+
+    headers = ["Particulars", "Actual", "Target", "Achievement %", "GAP"]
+    table_header(row, headers)
+    row += 1
+
+    # --- LOGICAL BREAKUP (MOCK BUT CONSISTENT) ---
+    savings = round(b.total_deposits_cr * 0.35, 2)
+    current = round(b.total_deposits_cr * 0.15, 2)
+    casa = round(savings + current, 2)
+    td = round(b.total_deposits_cr - casa, 2)
+
+    deposit_rows = [
+        ("Savings Deposits", savings),
+        ("Current Deposits", current),
+        ("CASA Deposits (Savings + Current)", casa),
+        ("Term Deposits", td),
+        ("TOTAL DEPOSITS", b.total_deposits_cr),
+    ]
+
+    for name, actual in deposit_rows:
+        target_value = round(b.deposit_target__cr_, 2)
+        achievement = round((actual / target_value) * 100, 2)
+        gap = round(target_value - actual, 2)
+
+        value(row, 1, name)
+        value(row, 2, round(actual, 2))
+        value(row, 3, target_value)
+        value(row, 4, achievement, fill(colour_achievement(achievement)))
+        value(row, 5, gap, fill(colour_gap(gap)))
+        row += 1
+
+    # ---------------- ADVANCES (TABULAR) ----------------
+    section_title(row + 1, "ADVANCES POSITION (₹ Crores)")
+    row += 3
+
+    table_header(row, headers)
+
+    row += 1
+    ach = round(b.advance_ach_pct, 2)
+    adv_gap = round(b.advance_target - b.advancescr, 2)
+
+    value(row, 1, "TOTAL ADVANCES")
+    value(row, 2, round(b.advancescr, 2))
+    value(row, 3, round(b.advance_target, 2))
+    value(row, 4, ach, fill(colour_achievement(ach)))
+    value(row, 5, adv_gap, fill(colour_gap(adv_gap)))
+
+    # ---------------- STAFF & PROFIT ----------------
+    section_title(row + 3, "STAFF & PROFITABILITY")
+
+    label(row + 5, 1, "Staff Strength")
+    value(row + 5, 2, int(b.staff_strength))
+
+    label(row + 5, 3, "Total Profit (₹ Cr)")
+    value(row + 5, 4, round(b.profit_cr, 2))
+
+    label(row + 6, 1, "Profit per Staff")
+    value(row + 6, 2, round(b.profit_per_staff, 2))
+
+    # ---------------- ASSET QUALITY & PERFORMANCE ----------------
+    section_title(row + 8, "ASSET QUALITY & PERFORMANCE")
+
+    aq_row = row + 10
+
+    label(aq_row, 1, "NPA Level (%)")
+    value(aq_row, 2, round(b["npa_%"], 2))
+
+    label(aq_row, 3, "Risk Category")
+    value(aq_row, 4, b.risk_flag)
+
+    # ---- Interpretations ----
+    line(aq_row + 1, rules["npa_comment"], WRAP)
+
+    # ---------------- PERFORMANCE FLAGS ----------------
+    section_title(aq_row + 3, "PERFORMANCE FLAGS")
+
+    pf_row = aq_row + 5
+    flags = [
+        ("Deposits Performance", flag(b.total_deposits_cr, b.deposit_target__cr_)),
+        ("Advances Performance", flag(b.advancescr, b.advance_target)),
+        ("Profitability Status", flag(b.profit_per_staff, 5)),
+    ]
+    for i, (name, (text, flag_fill)) in enumerate(flags):
+        label(pf_row + i, 1, name)
+        value(pf_row + i, 2, text, fill(flag_fill))
+
+    # ---------------- OFFICER REMARKS ----------------
+    section_title(pf_row + 4, "OFFICER REMARKS")
+
+    xl.merge(ws, pf_row + 6, 1, pf_row + 8, 8, rules["remarks"], WRAP)
+
+    # ---------------- PEER BENCHMARKS ----------------
+    if peers is not None:
+        peer_row = pf_row + 10
+        section_title(peer_row, "PEER BENCHMARKS")
+        line(peer_row + 1, f"Peer group: {peers['peer_group']} ({int(peers['peers'])} peers)")
+        peer_row += 3
+        table_header(peer_row, ["Metric", "Branch", "Peer Median", "Gap", "Standing"])
+        for r in peer_table(peers).itertuples(index=False):
+            peer_row += 1
+            for col, text in enumerate(r, 1):
+                value(peer_row, col, text)
+
+    # ---------------- FORMAT ----------------
+    for col in range(1, 9):
+        xl.set_column_width(ws, col, 20)
+
+    xl.close()
+
+
+def profile_frame(df):
+    """Map the app's upload schema (Total_Deposits, NPA_Percent, ...) onto the profile columns."""
+    npa = df["NPA_Percent"]
+    return pd.DataFrame({
+        "branch_id": df["Branch_ID"],
+        "branch_name": df["Branch_Name"],
+        "zone": df["Zone"],
+        "city": df["City"] if "City" in df.columns else df["Branch_Name"],
+        "risk_flag": pd.cut(npa, [-float("inf"), 3, 6, float("inf")], right=False,
+                            labels=["Healthy", "Watch", "High Risk"]).astype(str),
+        "npa_%": npa,
+        "total_deposits_cr": df["Total_Deposits"],
+        "deposit_target__cr_": df["Deposit_Target"],
+        "advancescr": df["Advances"],
+        "advance_target": df["Advance_Target"],
+        "advance_ach_pct": df["Advances"] / df["Advance_Target"] * 100,
+        "profit_per_staff": df["Profit_Per_Staff"],
+        "profit_cr": df["Profit_Per_Staff"] * df["Staff_Count"],
+        "staff_strength": df["Staff_Count"],
+    })
+
+
+def write_profiles_zip(profiles, target, engine=None, progress=None, narratives=None, peers=None):
+    """
+    Render every row of `profiles` into its own entry of a ZIP written to `target`.
+
+    Each workbook is rendered straight into its ZIP entry, so only one profile
+    is held in memory at a time. Entries are stored, not deflated: xlsx files
+    are already compressed. `progress(done, total)` is called about 100 times.
+    `narratives` maps branch_id to an LLM narrative (bankvista.narratives.narrate).
+    Scores and template text come from one narrative_table pass over all rows.
+    `peers` is bankvista.peers.peer_benchmarks output, row-aligned with profiles.
+    """
+    narratives = narratives or {}
+    table = narrative_table(profiles).to_dict("records")
+    peer_rows = [None] * len(profiles) if peers is None else [row for _, row in peers.iterrows()]
+    total = len(profiles)
+    step = max(1, total // 100)
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_STORED) as zf:
+        for done, ((_, b), rules, peer) in enumerate(zip(profiles.iterrows(), table, peer_rows), 1):
+            with zf.open(f"Branch_Profile_{b.branch_id}.xlsx", "w") as entry:
+                render_branch_profile(b, entry, engine, narratives.get(b.branch_id), rules, peer)
+            if progress and (done % step == 0 or done == total):
+                progress(done, total)
@@ -0,0 +1,337 @@
+"""
+Structured questions over the branch table, answered locally.
+
+    from bankvista.query import parse_query, execute_plan, answer_query
+
+    plan = parse_query("branches in Telangana with NPA above 4 and CASA below 35", df)
+    # {'filters': [('NPA_Percent', '>', 4.0), ('CASA_Percent', '<', 35.0)],
+    #  'zones': {'Zone': ['Telangana']}, 'rank': None, 'aggregate': None, 'group_by': None}
+    answer_query("bottom 10 by profit per staff in Telangana", df)     # markdown, or None
+
+The parser recognises metric comparisons ("NPA above 4", "CASA between 30
+and 40", "deposits >= 150"), zone filters ("in Telangana"), rankings ("top 5
+by deposits", "worst 10 NPA") and aggregates ("average CASA by zone", "how
+many branches ..."; "how many staff ..." is a Staff_Count total). A plan runs as one vectorized mask plus an optional
+partial sort or groupby. When nothing structured is found, parse_query
+returns None and the caller falls back to the LLM.
+"""
+
+import re
+
+import numpy as np
+
+# Column -> phrases that name it (longest phrase wins when matching)
+METRICS = {
+    'NPA_Percent': ['npa', 'gross npa', 'bad loans', 'bad loan', 'non performing assets'],
+    'CASA_Percent': ['casa', 'casa ratio'],
+    'CD_Ratio': ['cd ratio', 'cd', 'credit deposit ratio', 'credit-deposit ratio'],
+    'Profit_Per_Staff': ['profit per staff', 'profit/staff', 'pps', 'profit', 'profitability'],
+    'Business_Per_Staff': ['business per staff', 'business/staff', 'bps', 'productivity'],
+    'Total_Deposits': ['deposits', 'deposit', 'total deposits'],
+    'Deposit_Target': ['deposit target'],
+    'Advances': ['advances', 'advance', 'loans', 'loan book', 'credit'],
+    'Advance_Target': ['advance target'],
+    'Staff_Count': ['staff', 'staff count', 'headcount', 'employees'],
+    'Deposit_Achievement': ['deposit achievement', 'achievement', 'target achievement'],
+}
+LOWER_IS_BETTER = {'NPA_Percent'}
+PERCENT = {'NPA_Percent', 'CASA_Percent', 'CD_Ratio', 'Deposit_Achievement'}
+CRORES = {'Total_Deposits', 'Deposit_Target', 'Advances', 'Advance_Target', 'Profit_Per_Staff', 'Business_Per_Staff'}
+
+DEFAULT_TOP_N = 10
+MAX_ROWS_SHOWN = 15
+
+_ALIASES = {alias: col for col, aliases in METRICS.items() for alias in aliases}
+_METRIC = '|'.join(re.escape(a) for a in sorted(_ALIASES, key=len, reverse=True))
+_NUMBER = r'-?\d+(?:\.\d+)?'
+
+_OPS = {
+    '>': '>', 'above': '>', 'over': '>', 'greater than': '>', 'more than': '>',
+    'higher than': '>', 'exceeding': '>', 'exceeds': '>',
+    '>=': '>=', 'at least': '>=',
+    '<': '<', 'below': '<', 'under': '<', 'less than': '<', 'lower than': '<',
+    '<=': '<=', 'at most': '<=',
+    '=': '==', 'equal to': '==',
+    'between': 'between',
+}
+_OP = '|'.join(re.escape(o) for o in sorted(_OPS, key=len, reverse=True))
+
+_COMPARE = re.compile(
+    rf"\b(?P<metric>{_METRIC})\b\s*(?:%|percent|ratio)?\s*(?:(?:is|are|of|was)\s+)?"
+    rf"(?P<op>{_OP})\s*(?:rs\.?|₹)?\s*(?P<a>{_NUMBER})\s*(?:%|cr)?"
+    rf"(?:\s*(?:and|to|-)\s*(?P<b>{_NUMBER}))?"
+)
+_RANK = re.compile(
+    rf"\b(?P<dir>top|bottom|highest|lowest|best|worst|largest|smallest)\b\s*(?P<n>\d+)?\s*"
+    rf"(?:branch(?:es)?\s*)?(?:(?:by|on|for|in terms of)\s+)?(?P<metric>{_METRIC})?\b"
+)
+_LEADING_N = re.compile(r"\b(\d+)\s+(?:branch(?:es)?|top|bottom|best|worst|highest|lowest)\b")
+_AGG = re.compile(
+    rf"\b(?P<func>average|avg|mean|median|total|sum|maximum|max|minimum|min)\b\s+(?:(?:of|the)\s+)*"
+    rf"(?P<metric>{_METRIC})\b"
+)
+_COUNT = re.compile(r"\b(how many|count of|number of)\b")
+_HEADCOUNT = re.compile(r"\b(?:how many|count of|number of)\s+(?:the\s+)?(?:total\s+)?"
+                        r"(?:staff|employees|people|headcount)\b")
+_GROUP = re.compile(r"\b(?:by|per|across|for each|each)\s+zones?\b|\bzone[- ]?wise\b")
+_LISTING = re.compile(r"\b(branch|branches|list|show|which)\b")
+
+_FUNCS = {'average': 'mean', 'avg': 'mean', 'mean': 'mean', 'median': 'median', 'total': 'sum',
+          'sum': 'sum', 'maximum': 'max', 'max': 'max', 'minimum': 'min', 'min': 'min'}
+
+
+# ═══════════════════════════════════════════════════════════════
+# PARSING
+# ═══════════════════════════════════════════════════════════════
+
+_PLACE = re.compile(r"\b(?:in|from|within)\s+(?:the\s+)?([a-z]+)")
+_NOT_PLACES = {'terms', 'each', 'all', 'which', 'total', 'zone', 'zones', 'branch', 'branches', 'percent'}
+
+
+def _zone_filters(q, df):
+    """{column: [values]} for the Zone / Region values named in q, or None if q
+    names a place ("in South") that matches none of them"""
+    zones, known = {}, set()
+    for col in ('Zone', 'Region'):
+        if col not in df.columns:
+            continue
+        values = [str(z) for z in df[col].dropna().unique()]
+        known.update(w for z in values for w in z.lower().split())
+        hits = [z for z in values if re.search(rf"\b{re.escape(z.lower())}\b", q)]
+        if hits:
+            zones[col] = hits
+    for m in _PLACE.finditer(q):
+        word = m.group(1)
+        if word not in known and word not in _NOT_PLACES and word not in _ALIASES:
+            return None
+    return zones
+
+
+def parse_query(query, df):
+    """Structured plan for a question, or None when it has no filter, ranking or
+    aggregate, or names a place that isn't a known zone"""
+    q = ' '.join(query.lower().split())
+    zones = _zone_filters(q, df)
+    if zones is None:
+        return None
+    plan = {'filters': [], 'zones': zones, 'rank': None, 'aggregate': None, 'group_by': None}
+
+    used = []
+    for m in _COMPARE.finditer(q):
+        col, op = _ALIASES[m.group('metric')], _OPS[m.group('op')]
+        if op == 'between':
+            if m.group('b') is None:
+                continue
+            lo, hi = sorted((float(m.group('a')), float(m.group('b'))))
+            plan['filters'].append((col, 'between', (lo, hi)))
+        else:
+            plan['filters'].append((col, op, float(m.group('a'))))
+        used.append(m.span())
+
+    # Count phrases win over sum phrases ("how many branches have total
+    # deposits above 500" is a count), and "total deposits" inside a filter
+    # is the filter's metric, not an aggregate
+    agg = next((m for m in _AGG.finditer(q) if not any(a <= m.start('metric') < b for a, b in used)), None)
+    if _HEADCOUNT.search(q):
+        plan['aggregate'] = {'func': 'sum', 'metric': 'Staff_Count'}
+    elif _COUNT.search(q):
+        plan['aggregate'] = {'func': 'count', 'metric': None}
+    elif agg:
+        plan['aggregate'] = {'func': _FUNCS[agg.group('func')], 'metric': _ALIASES[agg.group('metric')]}
+
+    rank = _RANK.search(q)
+    if rank and not plan['aggregate']:
+        metric = rank.group('metric')
+        if metric is None:
+            # "highest ... npa": take the first metric named outside the filters
+            free = [m for m in re.finditer(rf"\b(?:{_METRIC})\b", q)
+                    if not any(a <= m.start() < b for a, b in used)]
+            metric = free[0].group(0) if free else None
+        if metric is not None:
+            col = _ALIASES[metric]
+            word = rank.group('dir')
+            descending = word in ('top', 'highest', 'largest')
+            if word in ('best', 'worst'):
+                descending = (word == 'best') != (col in LOWER_IS_BETTER)
+            lead = _LEADING_N.search(q)
+            n = rank.group('n') or (lead.group(1) if lead else None)
+            plan['rank'] = {'metric': col, 'ascending': not descending, 'n': int(n) if n else DEFAULT_TOP_N}
+
+    if _GROUP.search(q) and plan['aggregate']:
+        plan['group_by'] = 'Zone'
+
+    structured = plan['filters'] or plan['rank'] or plan['aggregate']
+    if not structured and not (plan['zones'] and _LISTING.search(q)):
+        return None
+    return plan
+
+
+# ═══════════════════════════════════════════════════════════════
+# EXECUTION
+# ═══════════════════════════════════════════════════════════════
+
+def metric_values(df, col):
+    """Column values as a float array, deriving Deposit_Achievement when asked"""
+    if col == 'Deposit_Achievement':
+        return (df['Total_Deposits'] / df['Deposit_Target'] * 100).to_numpy(dtype=float)
+    return df[col].to_numpy(dtype=float)
+
+
+def plan_mask(plan, df):
+    """Boolean mask of the rows that pass every filter and zone in the plan"""
+    mask = np.ones(len(df), dtype=bool)
+    for col, values in plan['zones'].items():
+        mask &= df[col].astype(str).isin(values).to_numpy()
+    for col, op, value in plan['filters']:
+        v = metric_values(df, col)
+        if op == 'between':
+            mask &= (v >= value[0]) & (v <= value[1])
+        elif op == '>':
+            mask &= v > value
+        elif op == '>=':
+            mask &= v >= value
+        elif op == '<':
+            mask &= v < value
+        elif op == '<=':
+            mask &= v <= value
+        else:
+            mask &= v == value
+    return mask
+
+
+def execute_plan(plan, df, cube=None, index=None):
+    """Run a plan: the matching rows (ranked and cut to n), or the aggregate (a scalar or per-zone Series).
+    Without metric filters, aggregates are looked up in `cube` (bankvista.rollup) and
+    rankings in `index` (bankvista.ranks) when given."""
+    agg = plan['aggregate']
+    if agg and cube is not None and not plan['filters'] and agg['func'] in CUBE_FUNCS:
+        hit = _cube_aggregate(plan, cube)
+        if hit is not None:
+            return hit
+    rank = plan['rank']
+    if rank and index is not None and not plan['filters'] and set(plan['zones']) <= {'Zone'}:
+        zones = plan['zones'].get('Zone', [None])
+        if len(zones) == 1:
+            return df.iloc[index.positions(rank['metric'], rank['n'], rank['ascending'], zones[0])]
+
+    matched = df[plan_mask(plan, df)]
+    if agg:
+        if agg['func'] == 'count':
+            return matched.groupby(plan['group_by']).size() if plan['group_by'] else len(matched)
+        values = matched.assign(_v=metric_values(matched, agg['metric']))['_v']
+        if plan['group_by']:
+            return values.groupby(matched[plan['group_by']]).agg(agg['func'])
+        return values.agg(agg['func']) if len(values) else float('nan')
+
+    if rank:
+        v = metric_values(matched, rank['metric'])
+        n = min(rank['n'], len(v))
+        if n == 0:
+            return matched
+        key = v if rank['ascending'] else -v
+        top = np.argpartition(key, n - 1)[:n] if n < len(v) else np.arange(len(v))
+        top = top[np.argsort(key[top], kind='stable')]
+        return matched.iloc[top]
+    return matched
+
+
+CUBE_FUNCS = {'mean', 'sum', 'min', 'max', 'count'}
+
+
+def _cube_aggregate(plan, cube):
+    """A zone-level aggregate read from the rollup cube, or None when the cube can't answer it"""
+    agg, zones = plan['aggregate'], plan['zones']
+    metric = agg['metric']
+    if metric is not None and metric not in cube.metrics:
+        return None
+    if len(zones) > 1 or any(len(v) > 1 or c not in cube.dimensions for c, v in zones.items()):
+        return None
+    where = {c: v[0] for c, v in zones.items()}
+    levels = [plan['group_by']] if plan['group_by'] else []
+    value = cube.value(metric, agg['func'], levels, **where)
+    if levels:
+        value = value.rename(None)
+        return value.astype(int) if agg['func'] == 'count' else value
+    return int(value) if agg['func'] == 'count' else (float('nan') if value is None else value)
+
+
+# ═══════════════════════════════════════════════════════════════
+# ANSWERS
+# ═══════════════════════════════════════════════════════════════
+
+def metric_label(col):
+    return {'NPA_Percent': 'NPA', 'CASA_Percent': 'CASA', 'CD_Ratio': 'CD Ratio',
+            'Deposit_Achievement': 'Deposit Achievement'}.get(col, col.replace('_', ' '))
+
+
+def format_metric(col, value):
+    if value != value:                      # NaN
+        return "n/a"
+    if col in PERCENT:
+        return f"{value:.2f}%"
+    if col in CRORES:
+        return f"₹{value:,.2f}Cr"
+    return f"{value:,.0f}"
+
+
+def describe_plan(plan):
+    """One-line human summary of a plan's conditions"""
+    parts = []
+    for col, op, value in plan['filters']:
+        if op == 'between':
+            parts.append(f"{metric_label(col)} {format_metric(col, value[0])}–{format_metric(col, value[1])}")
+        else:
+            parts.append(f"{metric_label(col)} {op.replace('==', '=')} {format_metric(col, value)}")
+    for values in plan['zones'].values():
+        parts.append("in " + ", ".join(values))
+    return ", ".join(parts) or "all branches"
+
+
+def answer_query(query, df, cube=None, index=None):
+    """Markdown answer for a structured question, or None if it doesn't parse"""
+    plan = parse_query(query, df)
+    if plan is None:
+        return None
+    return format_answer(plan, execute_plan(plan, df, cube, index))
+
+
+def format_answer(plan, result, total=None):
+    """Markdown for a plan's result; total is the full match count when result
+    holds only the first rows (as the DuckDB backend returns them)"""
+    where = describe_plan(plan)
+
+    agg = plan['aggregate']
+    if agg:
+        name = "Branch count" if agg['func'] == 'count' else f"{agg['func'].title()} {metric_label(agg['metric'])}"
+        fmt = (lambda v: f"{int(v):,}") if agg['func'] == 'count' else (lambda v: format_metric(agg['metric'], v))
+        if plan['group_by']:
+            lines = [f"**📊 {name} by zone** ({where})\n", "| Zone | Value |", "|---|---|"]
+            lines += [f"| {zone} | {fmt(v)} |" for zone, v in result.items()]
+            return "\n".join(lines)
+        return f"**📊 {name}** ({where}): **{fmt(result)}**"
+
+    total = len(result) if total is None else total
+    rank = plan['rank']
+    cols = list(dict.fromkeys(
+        ([rank['metric']] if rank else []) + [c for c, _, _ in plan['filters']]
+    )) or ['Total_Deposits', 'NPA_Percent', 'CASA_Percent']
+    header = "🔎 "
+    if rank:
+        order = "Bottom" if rank['ascending'] else "Top"
+        header += f"{order} {len(result)} by {metric_label(rank['metric'])}"
+    else:
+        header += f"{total:,} branches match"
+    lines = [f"**{header}** ({where})\n"]
+    if len(result) == 0:
+        lines.append("No branches meet these conditions.")
+        return "\n".join(lines)
+
+    shown = result.head(MAX_ROWS_SHOWN)
+    lines.append("| Branch | Zone | " + " | ".join(metric_label(c) for c in cols) + " |")
+    lines.append("|---|---|" + "---|" * len(cols))
+    values = {c: metric_values(shown, c) for c in cols}
+    for i, (name, zone) in enumerate(zip(shown['Branch_Name'], shown['Zone'])):
+        lines.append(f"| {name} | {zone} | " + " | ".join(format_metric(c, values[c][i]) for c in cols) + " |")
+    if total > len(shown):
+        lines.append(f"\n…and {total - len(shown):,} more.")
+    return "\n".join(lines)
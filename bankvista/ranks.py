@@ -0,0 +1,124 @@
+"""
+Sorted metric indexes: top-N, bottom-N, rank and percentile lookups.
+
+    from bankvista.ranks import metric_index
+
+    idx = metric_index(df, key)                        # cached per dataset
+    idx.top('NPA_Percent', 10)                         # == df.nlargest(10, 'NPA_Percent')
+    idx.bottom('CASA_Percent', 5, zone='Telangana')    # == zone rows .nsmallest(5, ...)
+    idx.rank('Total_Deposits', i)                      # 1 = largest, for row position i
+    idx.percentile('NPA_Percent', 4.2)                 # % of branches below 4.2
+
+Each metric is argsorted once, on first use, in both directions (stable,
+so ties keep row order exactly as nlargest / nsmallest keep='first' do;
+missing values are left out, as there). Per-zone orders come from one
+lexsort on (zone, value), each zone a contiguous slice of it. After that a
+top-N is a slice of n positions and a rank is one array read, so every
+chat message, chart and rerun shares the same sort instead of repeating a
+partial sort of the full column.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from bankvista.query import metric_values
+
+
+class _Order:
+    """Sort orders of one metric: global and per zone, descending and ascending"""
+
+    def __init__(self, values, zone_codes, zones):
+        valid = np.flatnonzero(~np.isnan(values))
+        v = values[valid]
+        self.desc = valid[np.argsort(-v, kind='stable')]
+        self.asc = valid[np.argsort(v, kind='stable')]
+        self.sorted = values[self.asc]
+        self.rank = np.zeros(len(values), dtype=np.int64)        # 0 for missing values
+        self.rank[self.desc] = np.arange(1, len(self.desc) + 1)
+
+        codes = zone_codes[valid]
+        self.zone_desc = valid[np.lexsort((-v, codes))]
+        self.zone_asc = valid[np.lexsort((v, codes))]
+        self.bounds = np.searchsorted(np.sort(codes), np.arange(len(zones) + 1))
+
+
+class MetricIndex:
+    """Lazily built sort orders for the metrics of one dataset"""
+
+    def __init__(self, df):
+        self.df = df
+        codes, zones = (df['Zone'].factorize(sort=True) if 'Zone' in df.columns
+                        else (np.zeros(len(df), dtype=np.int64), np.array(['All'])))
+        self.zone_codes = np.asarray(codes)
+        self.zones = {str(z): i for i, z in enumerate(zones)}
+        self._orders = {}
+        self._lock = threading.Lock()
+
+    def order(self, metric):
+        order = self._orders.get(metric)
+        if order is None:
+            with self._lock:
+                order = self._orders.get(metric)
+                if order is None:
+                    values = metric_values(self.df, metric)
+                    order = self._orders[metric] = _Order(values, self.zone_codes, self.zones)
+        return order
+
+    # ---------------- TOP / BOTTOM ----------------
+    def positions(self, metric, n=10, ascending=False, zone=None):
+        """Row positions of the n largest (smallest when ascending) values, optionally within one zone"""
+        o = self.order(metric)
+        if zone is None:
+            return (o.asc if ascending else o.desc)[:n]
+        code = self.zones.get(str(zone))
+        if code is None:
+            return np.array([], dtype=np.int64)
+        start, end = o.bounds[code], o.bounds[code + 1]
+        return (o.zone_asc if ascending else o.zone_desc)[start:min(end, start + n)]
+
+    def top(self, metric, n=10, zone=None):
+        return self.df.iloc[self.positions(metric, n, False, zone)]
+
+    def bottom(self, metric, n=10, zone=None):
+        return self.df.iloc[self.positions(metric, n, True, zone)]
+
+    # ---------------- RANK / PERCENTILE ----------------
+    def rank(self, metric, position):
+        """1-based rank of a row by descending value (0 when its value is missing)"""
+        return int(self.order(metric).rank[position])
+
+    def count(self, metric):
+        """Branches with a value for metric"""
+        return len(self.order(metric).asc)
+
+    def percentile(self, metric, value):
+        """Share of branches (0-100) with a value below `value`, ties counted half"""
+        s = self.order(metric).sorted
+        if not len(s):
+            return float('nan')
+        below = np.searchsorted(s, value, 'left')
+        ties = np.searchsorted(s, value, 'right') - below
+        return float((below + 0.5 * ties) / len(s) * 100)
+
+
+# ---------------- PER-DATASET INDEXES ----------------
+_CACHE = OrderedDict()
+_MAX_CACHED = 8
+_lock = threading.Lock()
+
+
+def metric_index(df, key=None):
+    """The MetricIndex of a dataset, cached per dataset key (bankvista.data.dataset_key when not given)"""
+    if key is None:
+        from bankvista.data import dataset_key
+        key = dataset_key(df)
+    with _lock:
+        index = _CACHE.get(key)
+        if index is None:
+            index = _CACHE[key] = MetricIndex(df)
+            while len(_CACHE) > _MAX_CACHED:
+                _CACHE.popitem(last=False)
+        _CACHE.move_to_end(key)
+        return index
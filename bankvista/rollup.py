@@ -0,0 +1,190 @@
+"""
+Rollup cube over zone → region → branch, grade and risk band.
+
+    from bankvista.rollup import rollup_cube
+
+    cube = rollup_cube(df, key)                         # built once per dataset
+    cube.rollup(['Zone'])                               # one row per zone
+    cube.rollup(['Region'], Zone='Telangana')           # drill into one zone
+    cube.rollup(['Zone', 'Grade'])                      # any combination of dimensions
+    cube.branches(Zone='Telangana', Region='North')     # the branch rows of a cell
+    cube.zone_summary()                                 # the Zone Performance Details table
+
+One groupby over the finest cells (every Zone x Region x Grade x Risk Band
+combination present) collects, per metric, the sum, non-null count, min,
+max and the deposit-weighted sum. Every coarser level is a re-aggregation
+of those few cells, so a rollup, filter or drill-down costs time in the
+number of cells, not branches. The same groupby keeps the row positions
+of each cell, which serve the branch level.
+
+Rollup columns per metric m: `m_sum`, `m_mean`, `m_min`, `m_max`, plus
+`m_wmean` (deposit-weighted) for the ratio metrics in WEIGHTED; and
+`branches` and `deposit_ach` (sum of deposits / sum of targets). Region is
+only a dimension when the data has a Region column; Grade and Risk Band
+follow bankvista.rules.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from bankvista.rules import GRADE_LETTERS, RISK_BANDS, grade_index, risk_index, score_components
+
+CUBE_METRICS = ['Total_Deposits', 'Deposit_Target', 'Advances', 'Advance_Target', 'Staff_Count',
+                'NPA_Percent', 'CASA_Percent', 'CD_Ratio', 'Profit_Per_Staff', 'Business_Per_Staff']
+WEIGHTED = ['NPA_Percent', 'CASA_Percent', 'CD_Ratio', 'Profit_Per_Staff', 'Business_Per_Staff']
+HIERARCHY = ['Zone', 'Region']
+SCORE_INPUTS = ['Total_Deposits', 'Deposit_Target', 'Advances', 'Advance_Target', 'NPA_Percent', 'Profit_Per_Staff']
+
+ZONE_SUMMARY = {
+    # Zone Performance Details column -> rollup column
+    'Total Deposits': 'Total_Deposits_sum', 'Avg Deposits': 'Total_Deposits_mean',
+    'Total Advances': 'Advances_sum', 'Avg Advances': 'Advances_mean',
+    'Avg NPA': 'NPA_Percent_mean', 'Avg CASA': 'CASA_Percent_mean',
+    'Branches': 'branches', 'Total Staff': 'Staff_Count_sum',
+}
+DRILL_SUMMARY = {
+    'Branches': 'branches', 'Total Deposits': 'Total_Deposits_sum', 'Deposit Ach %': 'deposit_ach',
+    'Total Advances': 'Advances_sum', 'NPA % (dep-wtd)': 'NPA_Percent_wmean',
+    'CASA % (dep-wtd)': 'CASA_Percent_wmean', 'CD Ratio (dep-wtd)': 'CD_Ratio_wmean',
+    'Total Staff': 'Staff_Count_sum',
+}
+
+
+class RollupCube:
+    """Per-cell aggregates of one dataset, and the rows behind each cell"""
+
+    def __init__(self, df):
+        self.df = df
+        self.metrics = [m for m in CUBE_METRICS if m in df.columns]
+        self.integral = {f'{m}_sum' for m in self.metrics if pd.api.types.is_integer_dtype(df[m])}
+        keys = {d: df[d].astype(str).to_numpy() for d in HIERARCHY if d in df.columns}
+        if all(c in df.columns for c in SCORE_INPUTS):
+            parts = score_components(*(df[c] for c in SCORE_INPUTS))
+            grade = grade_index(np.round(sum(parts.values()), 1))
+            keys['Grade'] = pd.Categorical.from_codes(grade, GRADE_LETTERS)
+            keys['Risk Band'] = pd.Categorical.from_codes(risk_index(df['NPA_Percent']), RISK_BANDS)
+        self.dimensions = list(keys)
+
+        values = {}
+        deposits = df['Total_Deposits'].to_numpy(dtype=float)
+        for m in self.metrics:
+            x = df[m].to_numpy(dtype=float)
+            values[m] = x
+            if m in WEIGHTED:
+                present = ~np.isnan(x) & ~np.isnan(deposits)
+                values[f'{m}_wsum'] = np.where(present, x * deposits, np.nan)
+                values[f'{m}_wbase'] = np.where(present, deposits, np.nan)
+        frame = pd.DataFrame(values)
+
+        grouped = frame.groupby([pd.Series(v, name=d) for d, v in keys.items()], sort=True, observed=True, dropna=False)
+        self.cells = pd.concat([
+            grouped.size().rename('branches'),
+            grouped.sum(min_count=1).add_suffix('_sum'),
+            grouped[self.metrics].count().add_suffix('_n'),
+            grouped[self.metrics].min().add_suffix('_min'),
+            grouped[self.metrics].max().add_suffix('_max'),
+        ], axis=1)
+        self._rows = {k if isinstance(k, tuple) else (k,): v for k, v in grouped.indices.items()}
+
+    # ---------------- LOOKUPS ----------------
+    def _cells(self, where):
+        cells = self.cells
+        for dim, value in where.items():
+            if dim not in self.dimensions:
+                raise KeyError(f"Unknown dimension '{dim}' (have {self.dimensions})")
+            cells = cells[cells.index.get_level_values(dim).astype(str) == str(value)]
+        return cells
+
+    def rollup(self, levels=(), **where):
+        """Aggregates grouped by `levels` (dimension names) over the cells matching `where`;
+        with no levels, a single 'All' row"""
+        levels = list(levels)
+        cells = self._cells(where)
+        add = [c for c in cells.columns if c.endswith(('_sum', '_n')) or c == 'branches']
+        if levels:
+            grouped = cells.groupby(level=levels, sort=True, observed=True)
+            agg = pd.concat([grouped[add].sum(),
+                             grouped[[c for c in cells.columns if c.endswith('_min')]].min(),
+                             grouped[[c for c in cells.columns if c.endswith('_max')]].max()], axis=1)
+        else:
+            agg = pd.DataFrame([pd.concat([cells[add].sum(),
+                                           cells.filter(like='_min').min(),
+                                           cells.filter(like='_max').max()])],
+                               index=pd.Index(['All'], name='Level'))
+
+        out = pd.DataFrame({'branches': agg['branches'].astype(int)}, index=agg.index)
+        for m in self.metrics:
+            out[f'{m}_sum'] = agg[f'{m}_sum']
+            out[f'{m}_mean'] = agg[f'{m}_sum'] / agg[f'{m}_n'].replace(0, np.nan)
+            out[f'{m}_min'] = agg[f'{m}_min']
+            out[f'{m}_max'] = agg[f'{m}_max']
+            if m in WEIGHTED:
+                out[f'{m}_wmean'] = agg[f'{m}_wsum_sum'] / agg[f'{m}_wbase_sum'].replace(0, np.nan)
+        if 'Deposit_Target' in self.metrics:
+            out['deposit_ach'] = out['Total_Deposits_sum'] / out['Deposit_Target_sum'].replace(0, np.nan) * 100
+        return out
+
+    def total(self, **where):
+        """The rollup of everything matching `where`, as one Series"""
+        return self.rollup(**where).iloc[0]
+
+    def value(self, metric, func, levels=(), **where):
+        """One statistic ('sum', 'mean', 'wmean', 'min', 'max' or 'count') per group, or a scalar"""
+        col = 'branches' if func == 'count' else f'{metric}_{func}'
+        values = self.rollup(levels, **where)[col]
+        return values if levels else values.iloc[0]
+
+    def positions(self, **where):
+        """Row positions (into the dataset) of the branches matching `where`"""
+        cells = self._cells(where).index
+        keys = cells if isinstance(cells, pd.MultiIndex) else ((k,) for k in cells)
+        rows = [self._rows[tuple(k)] for k in keys]
+        return np.sort(np.concatenate(rows)) if rows else np.array([], dtype=np.int64)
+
+    def branches(self, **where):
+        """The branch rows matching `where`: the leaf level of the hierarchy"""
+        return self.df.iloc[self.positions(**where)]
+
+    # ---------------- TABLES ----------------
+    def _table(self, frame, columns):
+        cols = {name: col for name, col in columns.items() if col in frame.columns}
+        table = frame[list(cols.values())].round(2)
+        for col in self.integral.intersection(cols.values()):
+            if table[col].notna().all():
+                table[col] = table[col].astype('int64')
+        return table.set_axis(list(cols), axis=1)
+
+    def zone_summary(self):
+        """Per-zone table with the columns of the Zone Performance Details view"""
+        return self._table(self.rollup(['Zone']), ZONE_SUMMARY)
+
+    def summary(self, levels=(), **where):
+        """Readable drill-down table: counts, totals, achievement and deposit-weighted ratios"""
+        return self._table(self.rollup(levels, **where), DRILL_SUMMARY)
+
+
+# ---------------- PER-DATASET CUBES ----------------
+_CACHE = OrderedDict()
+_MAX_CACHED = 8
+_lock = threading.Lock()
+
+
+def rollup_cube(df, key=None):
+    """The RollupCube of a dataset, cached per dataset key (bankvista.data.dataset_key when not given)"""
+    if key is None:
+        from bankvista.data import dataset_key
+        key = dataset_key(df)
+    with _lock:
+        cube = _CACHE.get(key)
+        if cube is not None:
+            _CACHE.move_to_end(key)
+            return cube
+    cube = RollupCube(df)
+    with _lock:
+        _CACHE[key] = cube
+        while len(_CACHE) > _MAX_CACHED:
+            _CACHE.popitem(last=False)
+    return cube
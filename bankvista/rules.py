@@ -0,0 +1,256 @@
+"""
+Table-level scoring and narrative rules for branch profiles.
+
+    from bankvista.rules import narrative_table
+
+    table = narrative_table(profile_frame(df))
+    table.loc[0, 'risks']      # ['Advances growth below target.', ...]
+    table['grade'].value_counts()
+
+This module is the one home of the profile thresholds and point bands. It
+evaluates every threshold once over the whole table as boolean columns
+(`rule_flags`) and assembles the score, grade, takeaways, executive
+summary, risk drivers, focus areas, officer remarks and NPA comment for all
+branches with column operations. The batch renderer, the chat and the
+exports all read this table; `bankvista.scoring` is the per-row view of
+the same rules.
+"""
+
+import numpy as np
+import pandas as pd
+
+NPA_WATCH = 3          # healthy below, score band edge
+NPA_HIGH = 6           # stressed above
+NPA_REMARK = 5         # officer remark on asset quality
+PPS_BENCHMARK = 5      # profit per staff, Cr
+PPS_FLOOR = 3
+CASA_FLOOR = 40
+
+GRADES = [
+    (80, "A", "Excellent overall performance with strong fundamentals."),
+    (65, "B", "Good performance with minor improvement areas."),
+    (50, "C", "Average performance; focused corrective action required."),
+]
+GRADE_D = ("D", "Weak performance; immediate management intervention needed.")
+GRADE_LETTERS = np.array([g for _, g, _ in GRADES] + [GRADE_D[0]], dtype=object)
+GRADE_REMARKS = np.array([r for _, _, r in GRADES] + [GRADE_D[1]], dtype=object)
+RISK_BANDS = np.array(['Healthy', 'Watch', 'High Risk'], dtype=object)
+
+_SEP = "\n"
+
+
+# ═══════════════════════════════════════════════════════════════
+# FLAGS
+# ═══════════════════════════════════════════════════════════════
+
+def rule_flags(profiles):
+    """
+    Every threshold the profile rules test, as one boolean column each.
+
+    Both sides of a comparison are kept where the rules use both (e.g.
+    npa_under_watch and npa_over_watch), so missing values fall through to
+    the same branch each rule intends and values exactly on a threshold
+    land on the intended side.
+    """
+    d, t = profiles["total_deposits_cr"], profiles["deposit_target__cr_"]
+    adv, adv_t = profiles["advancescr"], profiles["advance_target"]
+    npa, pps = profiles["npa_%"], profiles["profit_per_staff"]
+    casa = (d * 0.5) / d * 100  # proxy, as in generate_risk_and_focus
+
+    return pd.DataFrame({
+        "deposit_met": d >= t,
+        "deposit_short": d < t,
+        "advance_met": adv >= adv_t,
+        "advance_short": adv < adv_t,
+        "npa_under_watch": npa < NPA_WATCH,
+        "npa_under_high": npa < NPA_HIGH,
+        "npa_within_watch": npa <= NPA_WATCH,
+        "npa_within_high": npa <= NPA_HIGH,
+        "npa_over_watch": npa > NPA_WATCH,
+        "npa_over_high": npa > NPA_HIGH,
+        "npa_over_remark": npa > NPA_REMARK,
+        "pps_at_benchmark": pps >= PPS_BENCHMARK,
+        "pps_at_floor": pps >= PPS_FLOOR,
+        "pps_under_benchmark": pps < PPS_BENCHMARK,
+        "pps_under_floor": pps < PPS_FLOOR,
+        "casa_under_floor": casa < CASA_FLOOR,
+    }, index=profiles.index)
+
+
+# ═══════════════════════════════════════════════════════════════
+# ASSEMBLY
+# ═══════════════════════════════════════════════════════════════
+
+def _pick(index, *choices, default=""):
+    """np.select over (mask, text) pairs as an object Series"""
+    masks = [np.asarray(m, dtype=bool) for m, _ in choices]
+    texts = [np.asarray(t, dtype=object) if not isinstance(t, str) else t for _, t in choices]
+    return pd.Series(np.select(masks, texts, default=default), index=index, dtype=object)
+
+
+def _item(index, mask, text):
+    """`text` plus a separator where mask holds, else ''"""
+    return _pick(index, (mask, text + _SEP))
+
+
+def _items(*parts):
+    """Concatenate _item columns and split them back into one list per row"""
+    joined = parts[0]
+    for part in parts[1:]:
+        joined = joined + part
+    return joined.str.rstrip(_SEP).str.split(_SEP)
+
+
+def deposit_points(deposits, target):
+    return np.minimum(np.asarray(deposits, float) / np.asarray(target, float) * 30, 30)
+
+
+def advance_points(advances, target):
+    return np.minimum(np.asarray(advances, float) / np.asarray(target, float) * 25, 25)
+
+
+def npa_points(npa):
+    npa = np.asarray(npa, float)
+    return np.select([npa <= NPA_WATCH, npa <= NPA_HIGH], [25, 15], 5)
+
+
+def profit_points(pps):
+    pps = np.asarray(pps, float)
+    return np.select([pps >= PPS_BENCHMARK, pps >= PPS_FLOOR], [20, 12], 5)
+
+
+def score_components(deposits, deposit_target, advances, advance_target, npa, pps):
+    """The four calculate_branch_score components as arrays (any array-likes)"""
+    return {
+        "deposits": deposit_points(deposits, deposit_target),
+        "advances": advance_points(advances, advance_target),
+        "npa": npa_points(npa),
+        "profitability": profit_points(pps),
+    }
+
+
+def grade_index(score):
+    """Position in GRADES of each score's grade (len(GRADES) for D)"""
+    score = np.asarray(score, float)
+    return np.select([score >= cut for cut, _, _ in GRADES], np.arange(len(GRADES)), len(GRADES))
+
+
+def risk_index(npa):
+    """Position in RISK_BANDS of each NPA value"""
+    npa = np.asarray(npa, float)
+    return np.select([npa < NPA_WATCH, npa < NPA_HIGH], [0, 1], 2)
+
+
+def branch_scores(profiles):
+    """(score, grade, grade_remark) columns; same values as calculate_branch_score / grade_branch"""
+    idx = profiles.index
+    parts = score_components(
+        profiles["total_deposits_cr"], profiles["deposit_target__cr_"],
+        profiles["advancescr"], profiles["advance_target"],
+        profiles["npa_%"], profiles["profit_per_staff"],
+    )
+    score = pd.Series(sum(parts.values()), index=idx).round(1)
+    grade = grade_index(score)
+    return (score, pd.Series(GRADE_LETTERS[grade], index=idx, dtype=object),
+            pd.Series(GRADE_REMARKS[grade], index=idx, dtype=object))
+
+
+def narrative_table(profiles, flags=None):
+    """
+    One row per profile: branch_id, score, grade, grade_remark, takeaways,
+    summary, risks, focus, remarks and npa_comment.
+
+    takeaways / risks / focus are lists of sentences; summary, remarks and
+    npa_comment are strings. The index matches `profiles`.
+    """
+    f = rule_flags(profiles) if flags is None else flags
+    idx = profiles.index
+    d, t = profiles["total_deposits_cr"], profiles["deposit_target__cr_"]
+    ahead = ((d / t - 1) * 100).round(1).astype(str)
+
+    npa_band = lambda healthy, moderate, high: _pick(  # noqa: E731
+        idx, (f["npa_under_watch"], healthy), (f["npa_under_high"], moderate), default=high)
+
+    # ---------------- KEY TAKEAWAYS ----------------
+    takeaways = _items(
+        _pick(idx, (f["deposit_met"], "Deposit performance is ahead of target by " + ahead + "%."),
+              default="Deposit growth is below target and needs focused mobilisation.") + _SEP,
+        _pick(idx, (f["advance_met"], "Advances growth is strong and above target."),
+              default="Advances growth is lagging and needs acceleration.") + _SEP,
+        npa_band("Asset quality is healthy with controlled NPAs.",
+                 "NPAs are moderately elevated; close monitoring required.",
+                 "High NPAs observed; immediate corrective action required.") + _SEP,
+        _pick(idx, (f["pps_at_benchmark"], "Profitability per staff is healthy."),
+              default="Profitability per staff is low, indicating efficiency gaps."),
+    )
+
+    # ---------------- EXECUTIVE SUMMARY ----------------
+    summary = (
+        "Branch " + profiles["branch_id"].astype(str) + " located in " + profiles["city"].astype(str)
+        + " (" + profiles["zone"].astype(str) + " Zone) has shown "
+        + _pick(idx, (f["deposit_met"], "strong"), default="moderate")
+        + " business performance during the review period. "
+        + _pick(idx, (f["deposit_met"], "Deposit mobilisation is above target, indicating healthy "
+                                        "customer acquisition and retention."),
+                default="Deposit mobilisation remains below target and requires focused efforts.") + " "
+        + _pick(idx, (f["advance_met"], "Advances growth is robust and supports overall balance sheet expansion."),
+                default="Advances growth is lagging and needs acceleration.") + " "
+        + npa_band("Asset quality remains healthy with NPAs well within acceptable limits.",
+                   "Asset quality indicators show moderately elevated NPAs, requiring close monitoring.",
+                   "Asset quality is under stress with high NPAs, requiring immediate corrective measures.") + " "
+        + _pick(idx, (f["pps_at_benchmark"], "Profitability indicators are satisfactory with healthy profit per staff."),
+                default="Profit per staff remains below benchmark levels, indicating scope for "
+                        "operational efficiency improvements.")
+    )
+
+    # ---------------- RISK DRIVERS & FOCUS AREAS ----------------
+    npa_high = f["npa_over_high"]
+    npa_moderate = f["npa_over_watch"] & ~npa_high
+    pps_mid = f["pps_under_benchmark"] & ~f["pps_under_floor"]
+    no_risk = ~(f["pps_under_floor"] | f["npa_over_watch"] | f["casa_under_floor"] | f["advance_short"])
+
+    risks = _items(
+        _item(idx, f["pps_under_floor"], "Low profit per staff impacting overall efficiency."),
+        _item(idx, npa_high, "High NPA posing asset quality risk."),
+        _item(idx, npa_moderate, "Moderately elevated NPA requiring close monitoring."),
+        _item(idx, f["casa_under_floor"], "Low CASA ratio affecting cost of funds."),
+        _item(idx, f["advance_short"], "Advances growth below target."),
+        _item(idx, no_risk, "No major risk drivers identified."),
+    )
+    focus = _items(
+        _item(idx, f["pps_under_floor"], "Improve staff productivity and cross-selling."),
+        _item(idx, pps_mid, "Enhance fee income and operational efficiency."),
+        _item(idx, npa_high, "Immediate recovery actions and SMA monitoring."),
+        _item(idx, npa_moderate, "Strengthen credit monitoring and early warning systems."),
+        _item(idx, f["casa_under_floor"], "Focused CASA mobilisation drives."),
+        _item(idx, f["advance_short"], "Push quality retail and MSME credit growth."),
+        _item(idx, no_risk, "Sustain current performance levels."),
+    )
+
+    # ---------------- OFFICER REMARKS ----------------
+    remarks = (
+        _pick(idx, (f["deposit_short"], "Deposit growth below target."), default="Deposit performance satisfactory.")
+        + _pick(idx, (f["advance_met"], " Advances growth strong."))
+        + _pick(idx, (f["npa_over_remark"], " Asset quality needs close monitoring."))
+    )
+
+    score, grade, grade_remark = branch_scores(profiles)
+    return pd.DataFrame({
+        "branch_id": profiles["branch_id"],
+        "score": score,
+        "grade": grade,
+        "grade_remark": grade_remark,
+        "takeaways": takeaways,
+        "summary": summary,
+        "risks": risks,
+        "focus": focus,
+        "remarks": remarks,
+        "npa_comment": npa_band("NPA level is within acceptable limits.",
+                                "NPA slightly elevated. Close monitoring required.",
+                                "High NPA. Immediate corrective action required."),
+    }, index=idx)
+
+
+def branch_rules(b):
+    """narrative_table for a single profile row, as a dict"""
+    return narrative_table(b.to_frame().T.infer_objects()).iloc[0].to_dict()
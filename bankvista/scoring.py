@@ -0,0 +1,63 @@
+"""
+Branch scoring, grading and narrative rules for one profile row.
+
+`b` is one row of the processed Branch_Profile sheet (see
+`bankvista.profile.profile_frame` for the column names). The thresholds
+and point bands live in `bankvista.rules`; these functions apply them to a
+single row. The renderer, chat and exports use `rules.narrative_table`,
+which applies the same rules to a whole table at once.
+"""
+
+from bankvista.rules import (
+    GRADE_LETTERS,
+    GRADE_REMARKS,
+    advance_points,
+    branch_rules,
+    deposit_points,
+    grade_index,
+    npa_points,
+    profit_points,
+)
+
+
+def generate_key_takeaways(b):
+    return branch_rules(b)["takeaways"]
+
+
+def generate_executive_summary(b):
+    return branch_rules(b)["summary"]
+
+
+def score_deposits(actual, target):
+    return float(deposit_points(actual, target))
+
+
+def score_advances(actual, target):
+    return float(advance_points(actual, target))
+
+
+def score_npa(npa):
+    return int(npa_points(npa))
+
+
+def score_profitability(profit_per_staff):
+    return int(profit_points(profit_per_staff))
+
+
+def calculate_branch_score(b):
+    score = 0
+    score += score_deposits(b.total_deposits_cr, b.deposit_target__cr_)
+    score += score_advances(b.advancescr, b.advance_target)
+    score += score_npa(b["npa_%"])
+    score += score_profitability(b.profit_per_staff)
+    return round(score, 1)
+
+
+def grade_branch(score):
+    i = int(grade_index(score))
+    return GRADE_LETTERS[i], GRADE_REMARKS[i]
+
+
+def generate_risk_and_focus(b):
+    rules = branch_rules(b)
+    return rules["risks"], rules["focus"]
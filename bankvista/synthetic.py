@@ -0,0 +1,158 @@
+"""
+Seeded, vectorized synthetic branch data at production scale.
+
+    from bankvista.synthetic import generate_branches
+    df = generate_branches(50_000, months=24, zones=40, seed=7)
+
+    python -m bankvista.synthetic --branches 50000 --months 24 --out data/branches.parquet
+
+Columns match the upload schema the app expects (Branch_ID, Branch_Name,
+Zone, Total_Deposits, Deposit_Target, Advances, Advance_Target, NPA_Percent,
+Profit_Per_Staff, CASA_Percent, CD_Ratio, Business_Per_Staff, Staff_Count),
+plus a Month column when more than one month is generated. The months end
+at `end` (default DEFAULT_END, a fixed month), so a seed always produces
+the same frame, Month included.
+
+The metrics are driven by three latent factors, so they correlate the way
+real branch books do:
+- branch size drives staff count and deposits,
+- zone and branch quality lift CASA and business per staff and lower NPA,
+- CD ratio drifts against CASA, and NPA rises with the CD ratio.
+NPA is right-skewed (gamma), and targets sit a few percent around actuals.
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+ZONE_NAMES = [
+    'Telangana', 'Andhra Pradesh', 'Karnataka', 'Tamil Nadu', 'Kerala', 'Maharashtra',
+    'Gujarat', 'Rajasthan', 'Punjab', 'Haryana', 'Delhi', 'Uttar Pradesh', 'Bihar',
+    'West Bengal', 'Odisha', 'Madhya Pradesh', 'Chhattisgarh', 'Jharkhand', 'Assam', 'Goa',
+]
+DEFAULT_END = '2025-12'          # last generated month; fixed so fixtures don't change by date
+
+
+def _zone_names(n):
+    names = ZONE_NAMES[:n]
+    return names + [f"Zone {i}" for i in range(len(names) + 1, n + 1)]
+
+
+def _ar1(rng, n, m, sd, phi=0.8):
+    """(n, m) AR(1) deviations that end at zero in the last month."""
+    out = np.zeros((n, m))
+    for j in range(m - 2, -1, -1):
+        out[:, j] = phi * out[:, j + 1] + rng.normal(0, sd, n)
+    return out
+
+
+def generate_branches(branches=1000, months=1, zones=8, seed=0, end=None):
+    """N branches x M months of correlated branch metrics as one DataFrame."""
+    rng = np.random.default_rng(seed)
+    n, m = branches, months
+
+    # ---------------- BRANCH STRUCTURE ----------------
+    zone_names = np.array(_zone_names(zones))
+    zone_weights = rng.dirichlet(np.full(zones, 4.0))
+    zone_idx = np.sort(rng.choice(zones, size=n, p=zone_weights))
+    zone_quality = rng.normal(0, 0.6, zones)[zone_idx]
+
+    size = rng.normal(0, 1, n)
+    quality = zone_quality + rng.normal(0, 0.8, n)
+
+    staff = np.clip(np.round(np.exp(3.2 + 0.35 * size)), 5, 150).astype(int)
+    bps = np.clip(np.exp(np.log(75) + 0.15 * quality + rng.normal(0, 0.12, n)), 20, 250)
+    casa = np.clip(38 + 3.5 * quality + rng.normal(0, 5, n), 12, 70)
+    cd = np.clip(74 - 0.25 * (casa - 38) + rng.normal(0, 7, n), 35, 120)
+    npa = np.clip(rng.gamma(2.0, 1.6, n) * np.exp(-0.3 * quality + 0.02 * (cd - 74)), 0.1, 30)
+
+    # ---------------- MONTHLY HISTORY ----------------
+    # Deposits grow ~0.8% a month; NPA, CASA and CD ratio follow mean-reverting walks.
+    growth = np.exp(np.cumsum(rng.normal(0.008, 0.02, (n, m)), axis=1))
+    growth /= growth[:, -1:]                     # last month equals the base level
+    npa_m = np.clip(npa[:, None] * np.exp(_ar1(rng, n, m, 0.08)), 0.1, 30)
+    casa_m = np.clip(casa[:, None] + _ar1(rng, n, m, 1.0), 10, 75)
+    cd_m = np.clip(cd[:, None] + _ar1(rng, n, m, 1.5), 30, 125)
+
+    business = (bps * staff)[:, None] * growth
+    deposits = business / (1 + cd_m / 100)
+    advances = deposits * cd_m / 100
+
+    dep_ach = np.clip(rng.normal(0.98, 0.08, (n, 1)) + rng.normal(0, 0.02, (n, m)), 0.6, 1.4)
+    adv_ach = np.clip(0.5 * dep_ach + 0.5 * rng.normal(0.97, 0.09, (n, 1)), 0.6, 1.4)
+    profit_ps = np.clip(0.075 * business / staff[:, None] - 0.35 * npa_m
+                        + rng.normal(0, 0.6, (n, m)), 0.2, None)
+
+    # ---------------- ASSEMBLE ----------------
+    ids = np.char.add('B', np.char.zfill(np.arange(1, n + 1).astype(str), len(str(n)) + 1))
+    zone_col = zone_names[zone_idx]
+    serial = pd.Series(zone_idx).groupby(zone_idx).cumcount().to_numpy() + 1
+    names = np.char.add(np.char.add(zone_col.astype(str), ' Branch '), serial.astype(str))
+
+    def flat(a):
+        return a.reshape(-1)
+
+    def rep(a):
+        return np.repeat(a, m)
+
+    df = pd.DataFrame({
+        'Branch_ID': rep(ids),
+        'Branch_Name': rep(names),
+        'Zone': rep(zone_col),
+        'Total_Deposits': flat(deposits).round(2),
+        'Deposit_Target': flat(deposits / dep_ach).round(2),
+        'Advances': flat(advances).round(2),
+        'Advance_Target': flat(advances / adv_ach).round(2),
+        'NPA_Percent': flat(npa_m).round(2),
+        'Profit_Per_Staff': flat(profit_ps).round(2),
+        'CASA_Percent': flat(casa_m).round(2),
+        'CD_Ratio': flat(cd_m).round(2),
+        'Business_Per_Staff': flat(business / staff[:, None]).round(2),
+        'Staff_Count': rep(staff),
+    })
+    if m > 1:
+        end = pd.Timestamp(end or DEFAULT_END).to_period('M')
+        periods = pd.period_range(end=end, periods=m, freq='M').to_timestamp(how='end').normalize()
+        df.insert(3, 'Month', np.tile(periods.values, n))
+    return df
+
+
+def write_dataset(df, path):
+    """Write df as CSV, XLSX (streamed through XlsxWriter) or Parquet, by file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if ext == '.csv':
+        df.to_csv(path, index=False)
+    elif ext == '.parquet':
+        df.to_parquet(path, index=False)
+    elif ext == '.xlsx':
+        from bankvista.xlsx_engine import open_workbook
+
+        xl = open_workbook(path, 'xlsxwriter')
+        ws = xl.add_sheet('Branches')
+        xl.append_rows(ws, df.itertuples(index=False),
+                       header=df.columns, header_style={'bold': True})
+        xl.close()
+    else:
+        raise ValueError(f"Unsupported output format '{ext}' (use .csv, .xlsx or .parquet)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic BankVista dataset.")
+    parser.add_argument('--branches', type=int, default=10_000)
+    parser.add_argument('--months', type=int, default=1)
+    parser.add_argument('--zones', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--end', help=f"last month, e.g. 2026-09 (default: {DEFAULT_END})")
+    parser.add_argument('--out', required=True, help="output path (.csv, .xlsx or .parquet)")
+    args = parser.parse_args(argv)
+
+    df = generate_branches(args.branches, args.months, args.zones, args.seed, args.end)
+    write_dataset(df, args.out)
+    print(f"✅ {len(df):,} rows ({args.branches:,} branches x {args.months} months) → {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+"""
+Analytical backends: the in-memory DataFrame, or DuckDB over Parquet snapshots.
+
+    from bankvista.warehouse import DuckDBBackend, FrameBackend
+
+    backend = DuckDBBackend('data/history/*.parquet')     # or FrameBackend(df)
+    backend.kpis()                      # {'branches': ..., 'avg_npa': ...}
+    backend.overview()                  # org totals and largest zones, for the chat prompt
+    backend.zone_summary()              # one row per zone
+    backend.top_n('NPA_Percent', 10)    # ten rows
+    backend.anomalies()                 # z-score outliers, as AnomalyDetector returns them
+    backend.answer("npa above 4 in telangana")   # structured chat answer, or None
+
+Both backends expose the same methods, so the app calls one interface
+whether the data lives in memory or not. DuckDBBackend scans the Parquet
+files in place and pushes every aggregate, top-N and filter down to SQL.
+Only small result sets become DataFrames, so branch x month histories far
+bigger than memory stay usable. When the files hold a Month column, every
+query runs against the latest month ('latest' view); 'branches' keeps the
+full history.
+
+duckdb is optional: `available()` reports whether it is installed, and it
+is only imported when a DuckDBBackend is created.
+"""
+
+import glob
+import hashlib
+import importlib.util
+import os
+
+from bankvista.query import MAX_ROWS_SHOWN, format_answer, parse_query
+
+ANOMALY_METRICS = ['NPA_Percent', 'CASA_Percent', 'CD_Ratio', 'Profit_Per_Staff', 'Business_Per_Staff']
+ZONE_COLUMNS = ['Total Deposits', 'Avg Deposits', 'Total Advances', 'Avg Advances',
+                'Avg NPA', 'Avg CASA', 'Branches', 'Total Staff']
+
+
+def available():
+    return importlib.util.find_spec('duckdb') is not None
+
+
+# ═══════════════════════════════════════════════════════════════
+# IN-MEMORY BACKEND
+# ═══════════════════════════════════════════════════════════════
+
+class FrameBackend:
+    """The uploaded DataFrame behind the backend interface; aggregates and top-N
+    lists come from its bankvista.rollup cube and bankvista.ranks index
+    (cached per dataset `key`)"""
+
+    def __init__(self, df, key=None):
+        self.df = df
+        self.key = key
+
+    def cube(self):
+        from bankvista.rollup import rollup_cube
+        return rollup_cube(self.df, self.key)
+
+    def index(self):
+        from bankvista.ranks import metric_index
+        return metric_index(self.df, self.key)
+
+    def kpis(self):
+        df = self.df
+        return {
+            'branches': len(df),
+            'total_deposits': df['Total_Deposits'].sum(),
+            'total_staff': df['Staff_Count'].sum(),
+            'deposit_achievement': df['Total_Deposits'].sum() / df['Deposit_Target'].sum() * 100,
+            'avg_npa': df['NPA_Percent'].mean(),
+            'avg_casa': df['CASA_Percent'].mean(),
+            'avg_bps': df['Business_Per_Staff'].mean(),
+        }
+
+    def overview(self, max_zones=40):
+        """Org totals and the max_zones largest zones by deposits (branches, deposits, npa, casa)"""
+        cube = self.cube()
+        org = cube.total()
+        zones = cube.rollup(['Zone']).rename(columns={
+            'Total_Deposits_sum': 'deposits', 'NPA_Percent_mean': 'npa', 'CASA_Percent_mean': 'casa'
+        }).sort_values('deposits', ascending=False).head(max_zones)
+        return {
+            'branches': int(org['branches']), 'deposits': org['Total_Deposits_sum'],
+            'advances': org['Advances_sum'], 'npa': org['NPA_Percent_mean'], 'casa': org['CASA_Percent_mean'],
+            'zones': zones[['branches', 'deposits', 'npa', 'casa']],
+        }
+
+    def zone_summary(self):
+        return self.cube().zone_summary()
+
+    def top_n(self, metric, n=10, ascending=False, zone=None):
+        return self.df.iloc[self.index().positions(metric, n, ascending, zone)]
+
+    def anomalies(self):
+        from bankvista.analytics import AnomalyDetector
+        return AnomalyDetector(self.df).detect_anomalies()
+
+    def answer(self, query):
+        from bankvista.query import answer_query
+        return answer_query(query, self.df, self.cube(), self.index())
+
+
+# ═══════════════════════════════════════════════════════════════
+# DUCKDB BACKEND
+# ═══════════════════════════════════════════════════════════════
+
+def _q(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(text):
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _files(source):
+    pattern = os.path.join(source, '**', '*.parquet') if os.path.isdir(source) else source
+    return pattern, sorted(glob.glob(pattern, recursive=True))
+
+
+class DuckDBBackend:
+    """Parquet file(s), directory or glob queried in place through DuckDB"""
+
+    def __init__(self, source, database=':memory:'):
+        import duckdb
+
+        self.source, files = _files(source)
+        if not files:
+            raise FileNotFoundError(f"No Parquet files match {source!r}")
+        self.con = duckdb.connect(database)
+        self.con.execute(
+            f"CREATE VIEW branches AS SELECT * FROM read_parquet({_literal(self.source)}, union_by_name = true)"
+        )
+        self.columns = [r[0] for r in self.con.execute("DESCRIBE branches").fetchall()]
+        latest = "SELECT * FROM branches"
+        if 'Month' in self.columns:
+            latest += " WHERE Month = (SELECT max(Month) FROM branches)"
+        self.con.execute(f"CREATE VIEW latest AS {latest}")
+
+        # Content key for caches: file names, sizes and modification times
+        h = hashlib.blake2b(digest_size=8)
+        for f in files:
+            st = os.stat(f)
+            h.update(f"{f}|{st.st_size}|{st.st_mtime_ns}".encode())
+        self.key = h.hexdigest()
+        self.files = len(files)
+        self._zones = None
+
+    # ---------------- QUERY HELPERS ----------------
+    def _cursor(self):
+        # One cursor per call: Streamlit sessions query from different threads.
+        return self.con.cursor()
+
+    def _frame(self, sql, params=()):
+        return self._cursor().execute(sql, list(params)).df()
+
+    def _scalar(self, sql, params=()):
+        return self._cursor().execute(sql, list(params)).fetchone()[0]
+
+    def _column(self, name):
+        if name == 'Deposit_Achievement':
+            return '("Total_Deposits" / "Deposit_Target" * 100)'
+        if name not in self.columns:
+            raise ValueError(f"Unknown column '{name}'")
+        return _q(name)
+
+    def history_rows(self):
+        return self._scalar("SELECT count(*) FROM branches")
+
+    def latest_frame(self, max_rows):
+        """The latest snapshot as a DataFrame, reservoir-sampled to max_rows; returns (df, sampled)"""
+        rows = self._scalar("SELECT count(*) FROM latest")
+        if rows <= max_rows:
+            return self._frame("SELECT * FROM latest"), False
+        return self._frame(f"SELECT * FROM latest USING SAMPLE reservoir({int(max_rows)} ROWS) REPEATABLE (7)"), True
+
+    # ---------------- BACKEND INTERFACE ----------------
+    def kpis(self):
+        row = self._cursor().execute("""
+            SELECT count(*), sum(Total_Deposits), sum(Staff_Count),
+                   sum(Total_Deposits) / sum(Deposit_Target) * 100,
+                   avg(NPA_Percent), avg(CASA_Percent), avg(Business_Per_Staff)
+            FROM latest
+        """).fetchone()
+        keys = ['branches', 'total_deposits', 'total_staff', 'deposit_achievement', 'avg_npa', 'avg_casa', 'avg_bps']
+        return dict(zip(keys, row))
+
+    def overview(self, max_zones=40):
+        """Org totals and the max_zones largest zones by deposits (branches, deposits, npa, casa)"""
+        branches, deposits, advances, npa, casa = self._cursor().execute("""
+            SELECT count(*), sum(Total_Deposits), sum(Advances), avg(NPA_Percent), avg(CASA_Percent) FROM latest
+        """).fetchone()
+        zones = self._frame(f"""
+            SELECT Zone, count(*) AS branches, sum(Total_Deposits) AS deposits,
+                   avg(NPA_Percent) AS npa, avg(CASA_Percent) AS casa
+            FROM latest GROUP BY Zone ORDER BY deposits DESC NULLS LAST LIMIT {int(max_zones)}
+        """).set_index('Zone')
+        return {'branches': branches, 'deposits': deposits, 'advances': advances, 'npa': npa, 'casa': casa,
+                'zones': zones}
+
+    def zone_summary(self):
+        zone_stats = self._frame("""
+            SELECT Zone,
+                   sum(Total_Deposits), avg(Total_Deposits), sum(Advances), avg(Advances),
+                   avg(NPA_Percent), avg(CASA_Percent), count(*), sum(Staff_Count)
+            FROM latest GROUP BY Zone ORDER BY Zone
+        """).set_index('Zone').round(2)
+        zone_stats.columns = ZONE_COLUMNS
+        return zone_stats
+
+    def top_n(self, metric, n=10, ascending=False, zone=None):
+        where, params = ("WHERE Zone = ?", [zone]) if zone is not None else ("", [])
+        order = 'ASC' if ascending else 'DESC'
+        return self._frame(
+            f"SELECT * FROM latest {where} ORDER BY {self._column(metric)} {order} NULLS LAST LIMIT {int(n)}",
+            params
+        )
+
+    def anomalies(self, threshold=2.0, limit=5000):
+        """Same records as AnomalyDetector.detect_anomalies, computed in one SQL pass"""
+        metrics = [m for m in ANOMALY_METRICS if m in self.columns]
+        if not metrics:
+            return []
+        stats = ", ".join(f"avg({_q(m)}) AS m{i}, stddev_samp({_q(m)}) AS s{i}" for i, m in enumerate(metrics))
+        unions = " UNION ALL ".join(
+            f"SELECT Branch_Name, '{m}' AS metric, {_q(m)} AS value, m{i} AS org_mean, "
+            f"({_q(m)} - m{i}) / s{i} AS z FROM latest, stats WHERE s{i} > 0"
+            for i, m in enumerate(metrics)
+        )
+        rows = self._cursor().execute(f"""
+            WITH stats AS (SELECT {stats} FROM latest)
+            SELECT * FROM ({unions}) WHERE abs(z) > ? ORDER BY abs(z) DESC LIMIT {int(limit)}
+        """, [threshold]).fetchall()
+        return [{
+            'branch': branch,
+            'metric': metric,
+            'value': round(value, 2),
+            'org_mean': round(mean, 2),
+            'z_score': round(z, 2),
+            'direction': 'HIGH ⬆️' if z > 0 else 'LOW ⬇️',
+            'severity': 'Critical' if abs(z) > 3 else 'Warning'
+        } for branch, metric, value, mean, z in rows]
+
+    def zone_values(self):
+        """Distinct Zone (and Region) values, for parsing chat questions"""
+        if self._zones is None:
+            cols = [c for c in ('Zone', 'Region') if c in self.columns]
+            self._zones = self._frame(
+                f"SELECT DISTINCT {', '.join(_q(c) for c in cols)} FROM latest"
+            ) if cols else None
+        return self._zones
+
+    def run_plan(self, plan):
+        """Execute a bankvista.query plan in SQL; returns (result, total matching rows)"""
+        clauses, params = [], []
+        for col, values in plan['zones'].items():
+            clauses.append(f"CAST({_q(col)} AS VARCHAR) IN ({', '.join('?' * len(values))})")
+            params += values
+        for col, op, value in plan['filters']:
+            if op == 'between':
+                clauses.append(f"{self._column(col)} BETWEEN ? AND ?")
+                params += list(value)
+            else:
+                clauses.append(f"{self._column(col)} {'=' if op == '==' else op} ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        agg = plan['aggregate']
+        if agg:
+            func = {'mean': 'avg', 'count': 'count'}.get(agg['func'], agg['func'])
+            expr = 'count(*)' if func == 'count' else f"{func}({self._column(agg['metric'])})"
+            if plan['group_by']:
+                g = _q(plan['group_by'])
+                result = self._frame(f"SELECT {g}, {expr} AS v FROM latest{where} GROUP BY {g} ORDER BY {g}", params)
+                return result.set_index(plan['group_by'])['v'], len(result)
+            value = self._scalar(f"SELECT {expr} FROM latest{where}", params)
+            return (float('nan') if value is None else value), 1
+
+        rank = plan['rank']
+        if rank:
+            order = 'ASC' if rank['ascending'] else 'DESC'
+            result = self._frame(
+                f"SELECT * FROM latest{where} ORDER BY {self._column(rank['metric'])} {order} NULLS LAST "
+                f"LIMIT {int(rank['n'])}", params
+            )
+            return result, len(result)
+        total = self._scalar(f"SELECT count(*) FROM latest{where}", params)
+        return self._frame(f"SELECT * FROM latest{where} LIMIT {MAX_ROWS_SHOWN}", params), total
+
+    def answer(self, query):
+        zones = self.zone_values()
+        if zones is None:
+            return None
+        plan = parse_query(query, zones)
+        if plan is None:
+            return None
+        result, total = self.run_plan(plan)
+        return format_answer(plan, result, total)
@@ -0,0 +1,299 @@
+"""
+Pluggable xlsx writer backends used by the BankVista exporters.
+
+Both `create_excel_dashboard` and the branch profile report write
+through the small interface below instead of talking to openpyxl directly:
+
+    engine = open_workbook(target, engine="xlsxwriter")
+    ws = engine.add_sheet("Dashboard")
+    engine.write(ws, 1, 1, "Title", {"bold": True, "bg_color": "5B4B8A"})
+    engine.merge(ws, 1, 1, 1, 6)
+    engine.append_rows(ws, df.itertuples(index=False), header=list(df.columns))
+    engine.close()
+
+Rows and columns are 1-based, as in openpyxl. Styles are plain dicts using
+XlsxWriter's property names:
+
+    bold, font_size, font_color, bg_color, align, valign, text_wrap, border
+
+Colours are hex strings without the leading '#'. `border: 1` means a thin
+border on all four sides.
+
+Backends:
+- "openpyxl"   : the original behaviour, whole workbook held in memory.
+- "xlsxwriter" : XlsxWriter in constant_memory mode. Bulk rows added with
+                 `append_rows` are streamed to disk row by row; cell-addressed
+                 writes are buffered per sheet and emitted in row order on
+                 close, since constant_memory cannot revisit a flushed row.
+
+The default backend can be changed with the BANKVISTA_XLSX_ENGINE env var.
+"""
+
+import os
+
+ENGINES = ("openpyxl", "xlsxwriter")
+DEFAULT_ENGINE = "openpyxl"
+DEFAULT_FONT_SIZE = 11            # XlsxWriter's default; openpyxl fonts get it explicitly
+
+
+def _style_key(style):
+    return tuple(sorted(style.items())) if style else ()
+
+
+def _col_letter(col):
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+# ═══════════════════════════════════════════════════════════════
+# OPENPYXL BACKEND
+# ═══════════════════════════════════════════════════════════════
+
+class OpenpyxlEngine:
+    """Random-access backend on top of openpyxl (current behaviour)."""
+
+    name = "openpyxl"
+
+    def __init__(self, target):
+        from openpyxl import Workbook
+
+        self.target = target
+        self.wb = Workbook()
+        self.wb.remove(self.wb.active)
+        self._styles = {}
+
+    def _resolve(self, style):
+        key = _style_key(style)
+        if key not in self._styles:
+            from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+            resolved = {}
+            font = {}
+            if style.get("bold"):
+                font["bold"] = True
+            if style.get("font_size"):
+                font["size"] = style["font_size"]
+            if style.get("font_color"):
+                font["color"] = style["font_color"]
+            if font:
+                # XlsxWriter writes its default size on every format; match it
+                font.setdefault("size", DEFAULT_FONT_SIZE)
+                resolved["font"] = Font(**font)
+            if style.get("bg_color"):
+                resolved["fill"] = PatternFill("solid", fgColor=style["bg_color"])
+            align = {}
+            if style.get("align"):
+                align["horizontal"] = style["align"]
+            if style.get("valign"):
+                align["vertical"] = "center" if style["valign"] == "vcenter" else style["valign"]
+            if style.get("text_wrap"):
+                align["wrap_text"] = True
+            if align:
+                resolved["alignment"] = Alignment(**align)
+            if style.get("border"):
+                side = Side(style="thin")
+                resolved["border"] = Border(left=side, right=side, top=side, bottom=side)
+            self._styles[key] = resolved
+        return self._styles[key]
+
+    def _apply(self, cell, style):
+        if style:
+            for attr, obj in self._resolve(style).items():
+                setattr(cell, attr, obj)
+
+    def add_sheet(self, title, hidden=False):
+        ws = self.wb.create_sheet(title)
+        if hidden:
+            ws.sheet_state = "hidden"
+        return ws
+
+    def write(self, ws, row, col, value, style=None):
+        cell = ws.cell(row=row, column=col, value=value)
+        self._apply(cell, style)
+
+    def merge(self, ws, first_row, first_col, last_row, last_col, value=None, style=None):
+        ws.merge_cells(start_row=first_row, start_column=first_col,
+                       end_row=last_row, end_column=last_col)
+        if value is not None:
+            ws.cell(row=first_row, column=first_col).value = value
+        if style:
+            for r in range(first_row, last_row + 1):
+                for c in range(first_col, last_col + 1):
+                    self._apply(ws.cell(row=r, column=c), style)
+
+    def append_rows(self, ws, rows, header=None, header_style=None):
+        if header is not None:
+            ws.append(list(header))
+            for cell in ws[ws.max_row]:
+                self._apply(cell, header_style)
+        for row_data in rows:
+            ws.append(row_data)
+
+    def set_row_height(self, ws, row, height):
+        ws.row_dimensions[row].height = height
+
+    def set_column_width(self, ws, col, width):
+        ws.column_dimensions[_col_letter(col)].width = width
+
+    def add_list_validation(self, ws, cell_ref, source):
+        from openpyxl.worksheet.datavalidation import DataValidation
+
+        dv = DataValidation(type="list", formula1=source)
+        dv.add(cell_ref)
+        ws.add_data_validation(dv)
+
+    def close(self):
+        self.wb.save(self.target)
+
+
+# ═══════════════════════════════════════════════════════════════
+# XLSXWRITER BACKEND (constant_memory)
+# ═══════════════════════════════════════════════════════════════
+
+class _BufferedSheet:
+    def __init__(self, ws):
+        self.ws = ws
+        self.cells = {}
+        self.merges = []
+        self.heights = {}
+        self.next_row = 0      # first 0-based row not yet flushed
+
+    def pending(self):
+        return self.cells or self.merges or self.heights
+
+
+class XlsxWriterEngine:
+    """Streaming backend on top of XlsxWriter with constant_memory=True."""
+
+    name = "xlsxwriter"
+
+    def __init__(self, target, constant_memory=True):
+        import xlsxwriter
+
+        self.wb = xlsxwriter.Workbook(target, {
+            "constant_memory": constant_memory,
+            "nan_inf_to_errors": True,
+        })
+        self._formats = {}
+        self._sheets = []
+
+    def _format(self, style):
+        if not style:
+            return None
+        key = _style_key(style)
+        if key not in self._formats:
+            props = dict(style)
+            for colour in ("font_color", "bg_color"):
+                if colour in props:
+                    props[colour] = "#" + props[colour]
+            if "bg_color" in props:
+                props["pattern"] = 1
+            self._formats[key] = self.wb.add_format(props)
+        return self._formats[key]
+
+    def add_sheet(self, title, hidden=False):
+        sheet = _BufferedSheet(self.wb.add_worksheet(title))
+        if hidden:
+            sheet.ws.hide()
+        self._sheets.append(sheet)
+        return sheet
+
+    def _check_row(self, sheet, row):
+        if row - 1 < sheet.next_row:
+            raise ValueError(
+                f"Row {row} of sheet '{sheet.ws.name}' was already streamed; "
+                "constant_memory sheets cannot be revisited"
+            )
+
+    def write(self, sheet, row, col, value, style=None):
+        self._check_row(sheet, row)
+        sheet.cells[(row - 1, col - 1)] = (value, style)
+
+    def merge(self, sheet, first_row, first_col, last_row, last_col, value=None, style=None):
+        self._check_row(sheet, first_row)
+        sheet.merges.append((first_row - 1, first_col - 1, last_row - 1, last_col - 1, style))
+        if value is not None:
+            prev_style = sheet.cells.get((first_row - 1, first_col - 1), (None, style))[1]
+            sheet.cells[(first_row - 1, first_col - 1)] = (value, prev_style)
+
+    def set_row_height(self, sheet, row, height):
+        self._check_row(sheet, row)
+        sheet.heights[row - 1] = height
+
+    def set_column_width(self, sheet, col, width):
+        sheet.ws.set_column(col - 1, col - 1, width)
+
+    def add_list_validation(self, sheet, cell_ref, source):
+        sheet.ws.data_validation(cell_ref, {"validate": "list", "source": source})
+
+    def _flush(self, sheet):
+        """Emit buffered cells and merges of one sheet in row order."""
+        if not sheet.pending():
+            return
+        ws = sheet.ws
+        merges_by_row = {}
+        covered = set()
+        for m in sheet.merges:
+            merges_by_row.setdefault(m[0], []).append(m)
+            for r in range(m[0], m[2] + 1):
+                for c in range(m[1], m[3] + 1):
+                    if (r, c) != (m[0], m[1]):
+                        covered.add((r, c))
+
+        cols_by_row = {}
+        for r, c in sheet.cells:
+            cols_by_row.setdefault(r, []).append(c)
+
+        rows = sorted(set(cols_by_row) | set(merges_by_row) | set(sheet.heights))
+        for r in rows:
+            if r in sheet.heights:
+                ws.set_row(r, sheet.heights[r])
+            starts = {m[1]: m for m in merges_by_row.get(r, [])}
+            # Multi-row merges write blanks into later rows, so they go last.
+            for c in sorted(cols_by_row.get(r, [])):
+                if c in starts or (r, c) in covered:
+                    continue
+                value, style = sheet.cells[(r, c)]
+                ws.write(r, c, value, self._format(style))
+            for c in sorted(starts, key=lambda c: (starts[c][2] > r, c)):
+                fr, fc, lr, lc, merge_style = starts[c]
+                value, cell_style = sheet.cells.get((fr, fc), ("", None))
+                fmt = self._format(merge_style or cell_style)
+                ws.merge_range(fr, fc, lr, lc, "" if value is None else value, fmt)
+            sheet.next_row = max(sheet.next_row, r + 1, *(m[2] + 1 for m in starts.values()))
+
+        sheet.cells.clear()
+        sheet.merges.clear()
+        sheet.heights.clear()
+
+    def append_rows(self, sheet, rows, header=None, header_style=None):
+        self._flush(sheet)
+        ws = sheet.ws
+        r = sheet.next_row
+        if header is not None:
+            fmt = self._format(header_style)
+            for c, h in enumerate(header):
+                ws.write(r, c, h, fmt)
+            r += 1
+        for row_data in rows:
+            ws.write_row(r, 0, row_data)
+            r += 1
+        sheet.next_row = r
+
+    def close(self):
+        for sheet in self._sheets:
+            self._flush(sheet)
+        self.wb.close()
+
+
+def open_workbook(target, engine=None):
+    """Create a workbook writer for `target` (path or binary file object)."""
+    engine = engine or os.getenv("BANKVISTA_XLSX_ENGINE", DEFAULT_ENGINE)
+    if engine == "openpyxl":
+        return OpenpyxlEngine(target)
+    if engine == "xlsxwriter":
+        return XlsxWriterEngine(target)
+    raise ValueError(f"Unknown xlsx engine '{engine}' (expected one of {ENGINES})")
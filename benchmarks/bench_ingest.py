@@ -0,0 +1,66 @@
+"""
+Serial vs parallel ingestion of a multi-file monthly drop.
+
+    python benchmarks/bench_ingest.py                          # 30 CSV files, 100k branches
+    python benchmarks/bench_ingest.py --files 30 --format xlsx --branches 30000
+
+Splits a synthetic dataset into --files zone files (with about 2% of rows
+repeated across files to exercise de-duplication), serializes them in
+memory, and loads them through bankvista.ingest.load_files with a single
+worker, with threads and with processes. Reports wall time, rows/sec, and
+the slowest single file, which is the lower bound a parallel load can reach.
+"""
+
+import argparse
+import io
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def make_files(branches, files, fmt, seed=7):
+    import numpy as np
+    import pandas as pd
+
+    from bankvista.synthetic import generate_branches
+
+    df = generate_branches(branches, zones=files, seed=seed)
+    repeats = df.sample(frac=0.02, random_state=seed)
+    out = []
+    for i, part in enumerate(np.array_split(df, files)):
+        if i == 0:
+            part = pd.concat([part, repeats])
+        buf = io.BytesIO()
+        if fmt == 'csv':
+            part.to_csv(buf, index=False)
+        else:
+            part.to_excel(buf, index=False)
+        out.append((f"zone_{i:02d}.{fmt}", buf.getvalue()))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--branches', type=int, default=100_000)
+    parser.add_argument('--files', type=int, default=30)
+    parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    from bankvista.ingest import load_files
+
+    files = make_files(args.branches, args.files, args.format)
+    print(f"{len(files)} {args.format} files, {sum(len(d) for _, d in files) / 1e6:.1f} MB")
+    print(f"\n{'mode':<10}{'wall s':>9}{'rows/s':>12}{'speedup':>9}{'slowest s':>11}{'dupes':>8}")
+    for mode, workers in [('serial', 1), ('thread', args.workers), ('process', args.workers)]:
+        executor = 'thread' if mode == 'serial' else mode
+        df, r = load_files(files, workers=workers, executor=executor)
+        slowest = max(f['seconds'] for f in r['files'])
+        print(f"{mode:<10}{r['wall_s']:>9.2f}{r['rows_per_s']:>12,}{r['speedup']:>9}{slowest:>11.2f}"
+              f"{r['duplicates_dropped']:>8,}")
+
+
+if __name__ == '__main__':
+    main()
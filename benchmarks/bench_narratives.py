@@ -0,0 +1,68 @@
+"""
+Throughput, fallback and resume behaviour of the narrative stage against the local stub.
+
+    python benchmarks/bench_narratives.py                                 # 4,000 profiles
+    python benchmarks/bench_narratives.py --profiles 500 --latency 1.0 --fail-rate 0.1 --concurrency 64
+
+Requests go through bankvista.gateway's 'custom' provider; --concurrency
+sets its limit (BANKVISTA_CUSTOM_CONCURRENCY) for this process.
+
+Starts bankvista.narratives' OpenAI-compatible stub server in this process
+and makes three passes:
+1. a cold run over fresh profiles with a short --stop-after budget, to
+   simulate an interrupted batch;
+2. a resumed run that should only ask for the branches still missing;
+3. a warm run that should be served entirely from the cache.
+The stub can also be made to answer some requests with 429 (--fail-rate)
+or to hang (--slow-rate) past --timeout, which exercises retries and
+template fallbacks.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--profiles', type=int, default=4000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--timeout', type=float, default=5.0)
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--fail-rate', type=float, default=0.05)
+    parser.add_argument('--slow-rate', type=float, default=0.01)
+    parser.add_argument('--stop-after', type=int, default=None,
+                        help="profiles in the interrupted first pass (default: half)")
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    os.environ['BANKVISTA_CUSTOM_CONCURRENCY'] = str(args.concurrency)
+
+    from bankvista.narratives import Endpoint, narrate, serve_stub
+    from bankvista.profile import profile_frame
+    from bankvista.synthetic import generate_branches
+
+    server = serve_stub(args.port, args.latency, args.fail_rate, args.slow_rate, slow_s=args.timeout * 3)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = Endpoint(f"http://127.0.0.1:{args.port}/v1", 'stub')
+
+    profiles = profile_frame(generate_branches(args.profiles, seed=11))
+    cache = os.path.join(tempfile.mkdtemp(prefix='bankvista_narr_'), 'narratives.jsonl')
+    first = args.stop_after or args.profiles // 2
+
+    serial_s = args.profiles * args.latency
+    print(f"{args.profiles:,} profiles, stub latency {args.latency}s → serial would take ~{serial_s:,.0f}s\n")
+    print(f"{'pass':<12}{'seconds':>9}{'per s':>8}{'llm':>7}{'cached':>8}{'fallback':>10}  reasons")
+    for name, rows in [('interrupted', profiles.head(first)), ('resumed', profiles), ('warm', profiles)]:
+        _, stats = narrate(rows, cache, endpoint, args.timeout)
+        print(f"{name:<12}{stats['seconds']:>9}{stats['branches_per_s']:>8}{stats['llm']:>7}"
+              f"{stats['cached']:>8}{stats['fallback']:>10}  {stats['errors'] or ''}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
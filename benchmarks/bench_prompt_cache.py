@@ -0,0 +1,74 @@
+"""
+Prompt-prefix cache hit rate and latency savings against the configured LLM providers.
+
+    OPENAI_API_KEY=... python benchmarks/bench_prompt_cache.py
+    python benchmarks/bench_prompt_cache.py --branches 2000 --rounds 3     # Ollama, if running
+
+Sends a set of free-form questions (ones bankvista.query does not answer
+locally) through call_ai for one synthetic dataset, --rounds times. Every
+question shares the dataset's prompt prefix, so after the first call the
+provider should serve most prompt tokens from its cache. Prints the
+per-provider token counts and cached ratio from GATEWAY.metrics(), and the
+average latency of cache hits against misses.
+
+Providers only cache prefixes past a minimum length (1,024 tokens for
+OpenAI); the estimated prefix size is printed first.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+QUESTIONS = [
+    "Which zones should we worry about this quarter?",
+    "How is asset quality trending across the network?",
+    "Where could we grow low-cost deposits?",
+    "Summarise the strengths of the best performing branches",
+    "What would you look at first as a new zonal head?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--branches', type=int, default=1000)
+    parser.add_argument('--zones', type=int, default=24)
+    parser.add_argument('--rounds', type=int, default=2)
+    args = parser.parse_args()
+
+    from bankvista.chat import build_prompt_prefix, call_ai, init_ai_backends
+    from bankvista.data import dataset_key
+    from bankvista.gateway import GATEWAY
+    from bankvista.synthetic import generate_branches
+
+    backends = init_ai_backends()
+    if not backends:
+        sys.exit("No LLM provider configured (set OPENAI_API_KEY / GROQ_API_KEY / GEMINI_API_KEY or start Ollama)")
+
+    df = generate_branches(args.branches, zones=args.zones, seed=3)
+    key = dataset_key(df)
+    prefix = build_prompt_prefix(df, key)
+    print(f"providers: {', '.join(backends)}; prefix ~{len(prefix) // 4:,} tokens ({len(prefix):,} chars)\n")
+
+    for r in range(args.rounds):
+        start = time.perf_counter()
+        for q in QUESTIONS:
+            call_ai(q, df, key=key)
+        print(f"round {r + 1}: {len(QUESTIONS)} questions in {time.perf_counter() - start:.1f}s")
+
+    print(f"\n{'provider':<10}{'calls':>7}{'prompt tok':>12}{'cached':>9}{'ratio':>8}"
+          f"{'hit ms':>9}{'miss ms':>9}{'saving':>8}")
+    for name, m in GATEWAY.metrics().items():
+        if not m['metered']:
+            continue
+        ratio = f"{m['cached_ratio']:.0%}" if m['cached_ratio'] is not None else '-'
+        saving = f"{m['latency_saving_pct']}%" if m['latency_saving_pct'] is not None else '-'
+        print(f"{name:<10}{m['metered']:>7}{m['prompt_tokens']:>12,}{m['cached_tokens']:>9,}{ratio:>8}"
+              f"{m['avg_hit_ms'] or '-':>9}{m['avg_miss_ms'] or '-':>9}{saving:>8}")
+
+
+if __name__ == '__main__':
+    main()
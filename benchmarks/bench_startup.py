@@ -0,0 +1,102 @@
+"""
+Cold-import profile of the app and the bankvista modules (`-X importtime`).
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --targets app bankvista.export --top 15 --out startup.json
+
+Each target is imported in a fresh interpreter, `-X importtime` is parsed,
+and the report lists the target's cumulative import time (interpreter
+startup excluded), the heaviest packages it pulled in, and which heavy
+optional dependencies were loaded eagerly.
+Results are averaged over --repeat runs.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_TARGETS = [
+    'bankvista', 'bankvista.analytics', 'bankvista.charts',
+    'bankvista.chat', 'bankvista.export', 'app',
+]
+HEAVY = ['plotly', 'openpyxl', 'xlsxwriter', 'openai', 'groq',
+         'google.genai', 'google.generativeai', 'requests', 'pandas', 'numpy', 'streamlit']
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def profile(target):
+    probe = (
+        f"import {target}; import sys, json; "
+        f"print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    )
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', probe],
+        capture_output=True, text=True, cwd=ROOT,
+        env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+    )
+    if proc.returncode != 0:
+        return {'error': proc.stderr.strip().splitlines()[-1]}
+
+    # importtime prints a module after its children, indented two spaces per level.
+    children = {}
+    total_us = 0
+    for m in LINE.finditer(proc.stderr):
+        cumulative, indent, name = int(m.group(2)), len(m.group(3)), m.group(4)
+        if indent == 3:
+            root = name.split('.')[0]
+            children[root] = children.get(root, 0) + cumulative
+        elif indent == 1:
+            if name == target:
+                total_us = cumulative
+                break
+            children = {}
+    return {
+        'total_ms': total_us / 1000,
+        'packages_ms': {k: v / 1000 for k, v in children.items()},
+        'heavy_loaded': json.loads(proc.stdout.strip().splitlines()[-1]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--targets', nargs='+', default=DEFAULT_TARGETS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=8)
+    parser.add_argument('--out', help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    report = {}
+    for target in args.targets:
+        runs = [profile(target) for _ in range(args.repeat)]
+        if any('error' in r for r in runs):
+            report[target] = next(r for r in runs if 'error' in r)
+            print(f"{target:<24} FAILED: {report[target]['error']}")
+            continue
+        total = sum(r['total_ms'] for r in runs) / len(runs)
+        packages = {}
+        for r in runs:
+            for k, v in r['packages_ms'].items():
+                packages[k] = packages.get(k, 0) + v / len(runs)
+        top = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+        report[target] = {
+            'total_ms': round(total, 1),
+            'top_packages_ms': {k: round(v, 1) for k, v in top},
+            'heavy_loaded': runs[-1]['heavy_loaded'],
+        }
+        print(f"{target:<24} {total:8.1f} ms   eager: {', '.join(runs[-1]['heavy_loaded']) or '-'}")
+        for k, v in top:
+            print(f"    {k:<28} {v:8.1f} ms")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
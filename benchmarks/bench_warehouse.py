@@ -0,0 +1,85 @@
+"""
+In-memory pandas backend vs DuckDB over Parquet, on a branch x month history.
+
+    python benchmarks/bench_warehouse.py                         # 20k branches x 24 months
+    python benchmarks/bench_warehouse.py --branches 100000 --months 36 --keep data/history
+
+Writes the synthetic history to Parquet (through DuckDB, so pyarrow is not
+needed), then times each backend operation the app uses: KPIs, zone summary,
+top-N, anomaly stats and a structured chat question. The pandas side gets
+the latest month already in memory. The DuckDB side scans the files in place
+and also reports how many rows it materialized.
+"""
+
+import argparse
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+QUESTION = "how many branches have npa above 4 and casa below 35"
+
+
+def timed(fn, repeat):
+    fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, out
+
+
+def rows_of(result):
+    return len(result) if hasattr(result, '__len__') and not isinstance(result, str) else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--branches', type=int, default=20_000)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--keep', help="write the Parquet history here instead of a temp dir")
+    args = parser.parse_args()
+
+    import duckdb
+
+    from bankvista.synthetic import generate_branches
+    from bankvista.warehouse import DuckDBBackend, FrameBackend
+
+    out_dir = args.keep or tempfile.mkdtemp(prefix='bankvista_wh_')
+    os.makedirs(out_dir, exist_ok=True)
+    history = generate_branches(args.branches, months=args.months, zones=max(8, args.branches // 2500), seed=7)
+    path = os.path.join(out_dir, 'history.parquet')
+    duckdb.from_df(history).write_parquet(path)
+    latest = history[history['Month'] == history['Month'].max()].reset_index(drop=True)
+    print(f"{len(history):,} history rows → {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    del history
+
+    ops = {
+        'kpis': lambda b: b.kpis(),
+        'zone_summary': lambda b: b.zone_summary(),
+        'top_n': lambda b: b.top_n('NPA_Percent', 10),
+        'anomalies': lambda b: b.anomalies(),
+        'chat_query': lambda b: b.answer(QUESTION),
+    }
+    backends = {'pandas (in memory)': FrameBackend(latest), 'duckdb (parquet)': DuckDBBackend(path)}
+
+    print(f"\n{'operation':<14}" + "".join(f"{name:>22}" for name in backends) + f"{'rows out':>10}")
+    for op, fn in ops.items():
+        cells, out_rows = [], None
+        for backend in backends.values():
+            ms, out = timed(lambda: fn(backend), args.repeat)
+            cells.append(f"{ms:>19.1f} ms")
+            out_rows = rows_of(out)
+        print(f"{op:<14}" + "".join(cells) + f"{out_rows:>10}")
+    print(f"\npeak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
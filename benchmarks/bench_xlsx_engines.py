@@ -0,0 +1,184 @@
+"""
+Compare the openpyxl and XlsxWriter (constant_memory) export backends.
+
+    python benchmarks/bench_xlsx_engines.py                  # 10k / 100k / 1M rows
+    python benchmarks/bench_xlsx_engines.py --rows 10000 50000
+    python benchmarks/bench_xlsx_engines.py --parity-only
+
+Every (engine, rows) case runs in its own subprocess so that peak RSS
+(ru_maxrss) belongs to that case alone. Before timing, a parity check renders
+`create_excel_dashboard` and the branch profile with both engines and compares
+sheets, sheet state, merged ranges, data validations and cell formats.
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ENGINES = ("openpyxl", "xlsxwriter")
+
+
+def make_frame(rows, seed=7):
+    from bankvista.synthetic import generate_branches
+
+    return generate_branches(rows, seed=seed)
+
+
+def sample_profile_row():
+    import pandas as pd
+
+    return pd.Series({
+        'branch_id': 'B1001', 'branch_name': 'Mansoorabad', 'zone': 'Hyderabad',
+        'city': 'Hyderabad', 'risk_flag': 'Watch', 'npa_%': 4.2,
+        'total_deposits_cr': 110.97, 'deposit_target__cr_': 105.46,
+        'advancescr': 232.29, 'advance_target': 240.0, 'advance_ach_pct': 96.79,
+        'profit_per_staff': 4.1, 'profit_cr': 10.25, 'staff_strength': 25,
+    })
+
+
+# ═══════════════════════════════════════════════════════════════
+# PARITY
+# ═══════════════════════════════════════════════════════════════
+
+def _rgb(color):
+    return (color.rgb or "")[-6:] if color is not None and isinstance(color.rgb, str) else ""
+
+
+def describe(buf):
+    """Reduce a workbook to the structure both engines must agree on."""
+    from openpyxl import load_workbook
+
+    buf.seek(0)
+    wb = load_workbook(buf)
+    out = {}
+    for ws in wb.worksheets:
+        cells = {}
+        for row in ws.iter_rows():
+            for c in row:
+                fmt = (
+                    bool(c.font.bold), c.font.sz if c.font.bold or c.font.sz != 11 else None,
+                    _rgb(c.font.color) if c.font.color is not None and _rgb(c.font.color) != "000000" else "",
+                    _rgb(c.fill.fgColor) if c.fill.fill_type == "solid" else "",
+                    c.alignment.horizontal, c.alignment.vertical, bool(c.alignment.wrap_text),
+                    c.border.left.style,
+                )
+                if c.value is None and not any(fmt):
+                    continue
+                cells[c.coordinate] = (c.value, fmt)
+        out[ws.title] = {
+            'state': ws.sheet_state,
+            'merged': sorted(str(r) for r in ws.merged_cells.ranges),
+            'validations': sorted(
+                (str(dv.sqref), dv.type, (dv.formula1 or "").lstrip("=")) for dv in ws.data_validations.dataValidation
+            ),
+            'cells': cells,
+        }
+    return out
+
+
+def check_parity():
+    from bankvista.export import create_excel_dashboard
+    from bankvista.profile import render_branch_profile
+
+    df = make_frame(50)
+    results = {}
+    for name, render in [
+        ('dashboard', lambda engine: create_excel_dashboard(df, engine=engine)),
+        ('profile', lambda engine: _render_profile(render_branch_profile, engine)),
+    ]:
+        a, b = (describe(render(engine)) for engine in ENGINES)
+        problems = []
+        if list(a) != list(b):
+            problems.append(f"sheets differ: {list(a)} vs {list(b)}")
+        for sheet in set(a) & set(b):
+            for key in ('state', 'merged', 'validations'):
+                if a[sheet][key] != b[sheet][key]:
+                    problems.append(f"{sheet}.{key}: {a[sheet][key]} vs {b[sheet][key]}")
+            for coord in sorted(set(a[sheet]['cells']) | set(b[sheet]['cells'])):
+                if a[sheet]['cells'].get(coord) != b[sheet]['cells'].get(coord):
+                    problems.append(f"{sheet}!{coord}: {a[sheet]['cells'].get(coord)} vs {b[sheet]['cells'].get(coord)}")
+        results[name] = problems
+    return results
+
+
+def _render_profile(render, engine):
+    buf = io.BytesIO()
+    render(sample_profile_row(), buf, engine)
+    return buf
+
+
+# ═══════════════════════════════════════════════════════════════
+# TIMING
+# ═══════════════════════════════════════════════════════════════
+
+def run_case(engine, rows):
+    """Runs inside the child process; prints one JSON result line."""
+    import resource
+
+    from bankvista.export import create_excel_dashboard
+
+    df = make_frame(rows)
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    buf = create_excel_dashboard(df, engine=engine)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    size = len(buf.getbuffer())
+    print(json.dumps({
+        'engine': engine, 'rows': rows, 'seconds': round(elapsed, 3),
+        'peak_rss_mb': round(peak_rss / 1024, 1),
+        'export_rss_mb': round((peak_rss - base_rss) / 1024, 1),
+        'file_mb': round(size / 1e6, 2),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES), choices=ENGINES)
+    parser.add_argument('--parity-only', action='store_true')
+    parser.add_argument('--out', help="write results as JSON to this path")
+    parser.add_argument('--case', nargs=2, metavar=('ENGINE', 'ROWS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        run_case(args.case[0], int(args.case[1]))
+        return
+
+    parity = check_parity()
+    for name, problems in parity.items():
+        print(f"parity[{name}]: {'OK' if not problems else f'{len(problems)} differences'}")
+        for p in problems[:20]:
+            print(f"  - {p}")
+    if args.parity_only:
+        sys.exit(1 if any(parity.values()) else 0)
+
+    results = []
+    print(f"\n{'engine':<12}{'rows':>10}{'seconds':>10}{'peak MB':>10}{'export MB':>11}{'file MB':>9}")
+    for rows in args.rows:
+        for engine in args.engines:
+            proc = subprocess.run(
+                [sys.executable, __file__, '--case', engine, str(rows)],
+                capture_output=True, text=True, cwd=ROOT,
+            )
+            if proc.returncode != 0:
+                print(f"{engine:<12}{rows:>10}  FAILED: {proc.stderr.strip().splitlines()[-1:]}")
+                continue
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            results.append(r)
+            print(f"{engine:<12}{rows:>10}{r['seconds']:>10}{r['peak_rss_mb']:>10}{r['export_rss_mb']:>11}{r['file_mb']:>9}")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'parity': parity, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
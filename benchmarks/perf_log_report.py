@@ -0,0 +1,75 @@
+"""
+Summarise the app's JSON-lines timing log (bankvista.perf) per interaction.
+
+    python benchmarks/perf_log_report.py                       # logs/perf.jsonl
+    python benchmarks/perf_log_report.py before.jsonl after.jsonl
+
+Runs are grouped by what triggered them: a full page rerun ("page") or a
+single tab fragment rerun ("fragment:chat", "fragment:predictions", ...).
+For each group, the report lists the number of runs and the p50 / p95 of
+the run's total time and of every stage inside it. Pass two logs to compare
+interaction latency before and after a change.
+"""
+
+import json
+import sys
+from collections import defaultdict
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return float('nan')
+    k = (len(values) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def summarise(path):
+    runs = defaultdict(dict)
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            rec = json.loads(line)
+            run = runs[rec['run']]
+            run['trigger'] = f"fragment:{rec['fragment']}" if rec.get('fragment') else 'page'
+            if 'ms' in rec:
+                run.setdefault(rec['name'], 0.0)
+                run[rec['name']] += rec['ms']
+
+    groups = defaultdict(lambda: defaultdict(list))
+    for run in runs.values():
+        trigger = run.pop('trigger')
+        for stage, ms in run.items():
+            groups[trigger][stage].append(ms)
+    return groups
+
+
+def report(path):
+    groups = summarise(path)
+    print(f"\n{path}")
+    for trigger in sorted(groups):
+        stages = groups[trigger]
+        total = stages.get('run.total', [])
+        print(f"  {trigger:<24} runs={len(total):<5} p50={percentile(total, .5):9.1f} ms  p95={percentile(total, .95):9.1f} ms")
+        for stage in sorted(stages, key=lambda s: -percentile(stages[s], .5)):
+            if stage == 'run.total':
+                continue
+            v = stages[stage]
+            print(f"      {stage:<28} n={len(v):<5} p50={percentile(v, .5):9.1f}  p95={percentile(v, .95):9.1f}")
+    return groups
+
+
+def main():
+    paths = sys.argv[1:] or ['logs/perf.jsonl']
+    results = [report(p) for p in paths]
+    if len(results) == 2:
+        before, after = results
+        print("\nInteraction p50 before → after (ms)")
+        for trigger in sorted(set(before) | set(after)):
+            b = percentile(before.get(trigger, {}).get('run.total', []), .5)
+            a = percentile(after.get(trigger, {}).get('run.total', []), .5)
+            print(f"  {trigger:<24} {b:9.1f} → {a:9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+"""
+Benchmark suite for the analytics and export hot paths.
+
+    python benchmarks/suite.py                                 # 1k / 10k / 100k branches
+    python benchmarks/suite.py --sizes 1000 20000 --only heatmap zone
+    python benchmarks/suite.py --out results/main.json
+    python benchmarks/suite.py --out results/pr.json --compare results/main.json
+
+Every case runs on a seeded synthetic dataset (bankvista.synthetic) at each
+size. It records the median and min wall time over --repeat runs, the
+tracemalloc peak of one extra run, and the process RSS high-water mark.
+Results are written as JSON with run metadata. --compare prints per-case
+ratios against an earlier result file and exits non-zero when a case slows
+down by more than --threshold.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CHAT_QUERIES = [
+    "Which branches have bad loans?",
+    "Where can we grow CASA?",
+    "Show me top performers",
+    "Give me an overview",
+]
+
+
+# ═══════════════════════════════════════════════════════════════
+# CASES
+# ═══════════════════════════════════════════════════════════════
+# Each case takes the dataset and returns a zero-argument callable to time.
+# `max_rows` keeps the per-row cases (profile rendering) to a practical size.
+
+def case_excel_dashboard(df):
+    from bankvista.export import create_excel_dashboard
+    return lambda: create_excel_dashboard(df)
+
+
+def case_detect_anomalies(df):
+    from bankvista.analytics import AnomalyDetector
+    return lambda: AnomalyDetector(df).detect_anomalies()
+
+
+def case_multivariate_anomalies(df):
+    from bankvista.analytics import MultivariateDetector
+    return lambda: MultivariateDetector(df).detect(limit=100)
+
+
+def case_predict_npa_trend(df):
+    from bankvista.analytics import PredictiveAnalytics
+    name = df['Branch_Name'].iloc[len(df) // 2]
+    return lambda: PredictiveAnalytics(df).predict_npa_trend(name)
+
+
+def case_build_context(df):
+    from bankvista.chat import build_enhanced_context
+    return lambda: build_enhanced_context(CHAT_QUERIES[0], df)
+
+
+def case_local_response(df):
+    from bankvista.chat import get_enhanced_local_response
+    from bankvista.data import dataset_key
+
+    key = dataset_key(df)
+    return lambda: [get_enhanced_local_response(q, df, key) for q in CHAT_QUERIES]
+
+
+def case_metric_index(df):
+    from bankvista.ranks import MetricIndex
+
+    def run():
+        idx = MetricIndex(df)
+        zone = df['Zone'].iloc[0]
+        return ([idx.top(m, 10) for m in ('NPA_Percent', 'CASA_Percent', 'Total_Deposits')]
+                + [idx.bottom('CASA_Percent', 5, zone=zone), idx.rank('NPA_Percent', 0)])
+    return run
+
+
+def case_structured_query(df):
+    from bankvista.query import answer_query
+    zone = df['Zone'].iloc[0]
+    queries = [f"branches in {zone} with NPA above 4 and CASA below 35",
+               "bottom 10 by profit per staff", "average casa by zone"]
+    return lambda: [answer_query(q, df) for q in queries]
+
+
+def case_heatmap(df):
+    from bankvista.charts import create_performance_heatmap
+    return lambda: create_performance_heatmap(df)
+
+
+def case_zone(df):
+    from bankvista.charts import create_zone_comparison
+    return lambda: create_zone_comparison(df)
+
+
+def case_zone_cached(df):
+    from bankvista.charts import create_zone_comparison
+    from bankvista.data import dataset_key
+    from bankvista.figcache import cached_figure
+
+    key = dataset_key(df)
+    return lambda: cached_figure('zone', key, lambda: create_zone_comparison(df))
+
+
+def case_branch_scoring(df):
+    from bankvista.profile import profile_frame
+    from bankvista.scoring import calculate_branch_score, grade_branch
+
+    profiles = profile_frame(df)
+
+    def run():
+        return [grade_branch(calculate_branch_score(b)) for _, b in profiles.iterrows()]
+    return run
+
+
+def case_narrative_table(df):
+    from bankvista.profile import profile_frame
+    from bankvista.rules import narrative_table
+
+    profiles = profile_frame(df)
+    return lambda: narrative_table(profiles)
+
+
+def case_scenario(df):
+    from bankvista.scenario import ScenarioModel
+
+    model = ScenarioModel(df)
+    steps = [{'deposit_target_pct': -5}, {'deposit_target_pct': -5, 'npa_delta': -1.0},
+             {'npa_delta': -1.0, 'zones': [df['Zone'].iloc[0]]}, {}]
+    return lambda: [model.run(s) for s in steps]
+
+
+def case_peer_benchmarks(df):
+    from bankvista.peers import compute_benchmarks
+    return lambda: compute_benchmarks(df)
+
+
+def case_rollup_cube(df):
+    from bankvista.rollup import RollupCube
+
+    def run():
+        cube = RollupCube(df)
+        zone = df['Zone'].iloc[0]
+        return cube.zone_summary(), cube.summary(['Grade'], Zone=zone), cube.branches(Zone=zone)
+    return run
+
+
+def case_profile_render(df):
+    from bankvista.profile import profile_frame, render_branch_profile
+
+    b = profile_frame(df.head(1)).iloc[0]
+    return lambda: render_branch_profile(b, io.BytesIO())
+
+
+def case_profiles_zip(df):
+    from bankvista.export import create_profiles_zip
+    return lambda: create_profiles_zip(df)
+
+
+CASES = {
+    'excel_dashboard': (case_excel_dashboard, None),
+    'detect_anomalies': (case_detect_anomalies, None),
+    'multivariate_anomalies': (case_multivariate_anomalies, None),
+    'predict_npa_trend': (case_predict_npa_trend, None),
+    'build_context': (case_build_context, None),
+    'local_response': (case_local_response, None),
+    'metric_index': (case_metric_index, None),
+    'structured_query': (case_structured_query, None),
+    'heatmap': (case_heatmap, None),
+    'zone': (case_zone, None),
+    'zone_cached': (case_zone_cached, None),
+    'branch_scoring': (case_branch_scoring, None),
+    'narrative_table': (case_narrative_table, None),
+    'scenario': (case_scenario, None),
+    'peer_benchmarks': (case_peer_benchmarks, None),
+    'rollup_cube': (case_rollup_cube, None),
+    'profile_render': (case_profile_render, 1),
+    'profiles_zip': (case_profiles_zip, 200),
+}
+
+
+# ═══════════════════════════════════════════════════════════════
+# RUNNER
+# ═══════════════════════════════════════════════════════════════
+
+def measure(fn, repeat):
+    fn()                                   # warm-up: imports, caches
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'median_s': round(statistics.median(times), 6),
+        'min_s': round(min(times), 6),
+        'tracemalloc_peak_mb': round(peak / 1e6, 2),
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+    }
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = {(r['case'], r['rows']): r for r in json.load(f)['results']}
+    regressions = []
+    print(f"\n{'case':<20}{'rows':>9}{'base s':>11}{'now s':>11}{'ratio':>8}")
+    for r in results:
+        base = baseline.get((r['case'], r['rows']))
+        if not base:
+            continue
+        ratio = r['median_s'] / base['median_s'] if base['median_s'] else float('inf')
+        mark = '  ⚠️' if ratio > threshold else ''
+        print(f"{r['case']:<20}{r['rows']:>9}{base['median_s']:>11.4f}{r['median_s']:>11.4f}{ratio:>8.2f}{mark}")
+        if ratio > threshold:
+            regressions.append((r['case'], r['rows'], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--only', nargs='+', choices=sorted(CASES), help="run only these cases")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--out', help="write results as JSON to this path")
+    parser.add_argument('--compare', help="earlier results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="slowdown ratio that counts as a regression (default 1.25)")
+    args = parser.parse_args()
+
+    from bankvista.synthetic import generate_branches
+
+    names = args.only or list(CASES)
+    results = []
+    print(f"{'case':<20}{'rows':>9}{'median s':>11}{'min s':>11}{'peak MB':>10}{'RSS MB':>9}")
+    for size in args.sizes:
+        df = generate_branches(size, zones=max(4, size // 2500), seed=args.seed)
+        for name in names:
+            setup, max_rows = CASES[name]
+            rows = min(size, max_rows) if max_rows else size
+            if max_rows and any(r['case'] == name and r['rows'] == rows for r in results):
+                continue
+            r = {'case': name, 'rows': rows, **measure(setup(df.head(rows)), args.repeat)}
+            results.append(r)
+            print(f"{name:<20}{rows:>9}{r['median_s']:>11.4f}{r['min_s']:>11.4f}"
+                  f"{r['tracemalloc_peak_mb']:>10}{r['max_rss_mb']:>9}")
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w') as f:
+            json.dump({'meta': metadata(), 'sizes': args.sizes, 'results': results}, f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than {args.threshold}x baseline")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import pytest
+
+from bankvista.query import answer_query, execute_plan, parse_query
+from bankvista.ranks import metric_index
+from bankvista.rollup import rollup_cube
+from bankvista.synthetic import generate_branches
+
+
+@pytest.fixture(scope='module')
+def df():
+    return generate_branches(2000, seed=5)
+
+
+@pytest.mark.parametrize('question', [
+    "how many branches have total deposits above 500",
+    "number of branches with total deposits above 500",
+])
+def test_count_wins_over_sum_phrase(df, question):
+    plan = parse_query(question, df)
+    assert plan['aggregate'] == {'func': 'count', 'metric': None}
+    assert plan['filters'] == [('Total_Deposits', '>', 500.0)]
+    expected = int((df['Total_Deposits'] > 500).sum())
+    assert execute_plan(plan, df) == expected
+    assert execute_plan(plan, df, rollup_cube(df, 'test'), metric_index(df, 'test')) == expected
+
+
+def test_sum_phrase_without_count(df):
+    plan = parse_query("total deposits of branches with npa above 4", df)
+    assert plan['aggregate'] == {'func': 'sum', 'metric': 'Total_Deposits'}
+    assert plan['filters'] == [('NPA_Percent', '>', 4.0)]
+    assert plan['rank'] is None
+
+
+def test_filter_metric_is_not_an_aggregate(df):
+    plan = parse_query("branches with total deposits above 500", df)
+    assert plan['aggregate'] is None
+    assert plan['filters'] == [('Total_Deposits', '>', 500.0)]
+
+
+def test_count_with_rank_word_follows_the_plan(df):
+    # "highest" must not turn a count into a ranking the cube path ignores
+    plan = parse_query("how many branches have the highest npa above 8", df)
+    assert plan['aggregate'] == {'func': 'count', 'metric': None}
+    assert plan['rank'] is None
+    assert execute_plan(plan, df, rollup_cube(df, 'test')) == int((df['NPA_Percent'] > 8).sum())
+
+
+def test_rank_without_aggregate(df):
+    plan = parse_query("top 5 by npa", df)
+    assert plan['aggregate'] is None
+    assert plan['rank'] == {'metric': 'NPA_Percent', 'ascending': False, 'n': 5}
+
+
+def test_headcount_is_a_staff_sum(df):
+    answer = answer_query("how many staff are there", df)
+    assert f"{int(df['Staff_Count'].sum()):,}" in answer